@@ -0,0 +1,149 @@
+"""
+SEO Sentinel Reports API
+Report views served from the cached report model; the PDF is only rendered when asked for.
+Every view needs the signed link's expires/token query parameters.
+"""
+
+import asyncio
+import os
+import re
+
+from fastapi import APIRouter, Depends, HTTPException, Request
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import FileResponse, HTMLResponse, Response, StreamingResponse
+
+from app.core.dependencies import signed_report_link
+from app.db.database import session_scope
+from app.reports.renderers import report_html, report_json
+from app.services.scan_service import ScanService
+
+router = APIRouter()
+
+BYTE_RANGE = re.compile(r'bytes=(\d*)-(\d*)')
+CHUNK_BYTES = 64 * 1024
+
+# PDF renders in flight in this process; concurrent requests for a scan share one
+_renders = {}
+
+
+def _unavailable(error):
+    """LookupError: no such scan; ValueError: the scan has no report (yet)"""
+    return HTTPException(status_code=404 if isinstance(error, LookupError) else 409, detail=str(error))
+
+
+def _report_model(scan_id):
+    with session_scope() as session:
+        return ScanService(session).report_model(scan_id)
+
+
+async def _model(scan_id):
+    """The scan's report model; a cache miss streams the issues, so it is built off the event loop"""
+    try:
+        return await run_in_threadpool(_report_model, scan_id)
+    except (LookupError, ValueError) as e:
+        raise _unavailable(e)
+
+
+def _report_pdf(scan_id):
+    with session_scope() as session:
+        return ScanService(session).report_pdf(scan_id)
+
+
+async def _pdf(scan_id):
+    """(path, content key) of the scan's PDF, rendering it once however many requests ask"""
+    render = _renders.get(scan_id)
+    if render is None:
+        render = asyncio.ensure_future(run_in_threadpool(_report_pdf, scan_id))
+        _renders[scan_id] = render
+        render.add_done_callback(lambda _: _renders.pop(scan_id, None))
+    # A client hanging up mustn't cancel the render other requests are waiting on
+    return await asyncio.shield(render)
+
+
+def _etag(stat, key):
+    """Strong validator: the content key alone would survive a re-render, which changes the bytes"""
+    return f'"{key[:24] if key else format(stat.st_size, "x")}-{stat.st_mtime_ns:x}"'
+
+
+def _etag_matches(header, etag):
+    tags = [tag.strip().removeprefix('W/') for tag in header.split(',')]
+    return '*' in tags or etag in tags
+
+
+def _byte_range(header, size):
+    """(start, end) of a single byte range; None to send the whole file (other units, multiple ranges)"""
+    match = BYTE_RANGE.fullmatch(header.strip())
+    if not match or not any(match.groups()):
+        return None
+    first, last = match.groups()
+    if first:
+        start, end = int(first), int(last) if last else size - 1
+        if last and end < start:
+            return None  # invalid, so ignored
+    else:
+        start, end = size - int(last), size - 1
+        if not int(last):
+            start = size  # "bytes=-0" selects nothing
+    if start >= size:
+        raise HTTPException(status_code=416, headers={'Content-Range': f'bytes */{size}'})
+    return max(start, 0), min(end, size - 1)
+
+
+def _read(path, start, end):
+    with open(path, 'rb') as f:
+        f.seek(start)
+        remaining = end - start + 1
+        while remaining:
+            chunk = f.read(min(CHUNK_BYTES, remaining))
+            if not chunk:
+                return
+            remaining -= len(chunk)
+            yield chunk
+
+
+@router.get("/{scan_id}", dependencies=[Depends(signed_report_link)])
+async def report(scan_id: int):
+    """The report as compact JSON (counts, issue rows, recommendations)"""
+    return Response(report_json(await _model(scan_id)), media_type='application/json')
+
+
+@router.get("/{scan_id}/html", response_class=HTMLResponse, dependencies=[Depends(signed_report_link)])
+async def report_page(scan_id: int, request: Request):
+    """The report as a standalone HTML page"""
+    model = await _model(scan_id)
+    # The PDF link carries this page's signature along
+    pdf_url = request.url_for('report_pdf', scan_id=scan_id).include_query_params(
+        expires=request.query_params['expires'], token=request.query_params['token'])
+    return HTMLResponse(report_html(model, pdf_url=str(pdf_url)))
+
+
+@router.get("/{scan_id}/pdf", dependencies=[Depends(signed_report_link)])
+async def report_pdf(scan_id: int, request: Request):
+    """The PDF report, rendered on first request; answers If-None-Match, Range and If-Range"""
+    try:
+        path, key = await _pdf(scan_id)
+    except (LookupError, ValueError) as e:
+        raise _unavailable(e)
+
+    stat = os.stat(path)
+    etag = _etag(stat, key)
+    headers = {'ETag': etag, 'Accept-Ranges': 'bytes', 'Cache-Control': 'private, no-cache'}
+    if _etag_matches(request.headers.get('if-none-match', ''), etag):
+        return Response(status_code=304, headers=headers)
+
+    filename = f'seo_report_scan_{scan_id}.pdf'
+    byte_range = None
+    # If-Range: a client resuming an older file gets the current one whole
+    if 'range' in request.headers and request.headers.get('if-range', etag) == etag:
+        byte_range = _byte_range(request.headers['range'], stat.st_size)
+    if byte_range is None:
+        return FileResponse(path, media_type='application/pdf', filename=filename, headers=headers,
+                            stat_result=stat, content_disposition_type='inline')
+
+    start, end = byte_range
+    headers.update({
+        'Content-Range': f'bytes {start}-{end}/{stat.st_size}',
+        'Content-Length': str(end - start + 1),
+        'Content-Disposition': f'inline; filename="{filename}"',
+    })
+    return StreamingResponse(_read(path, start, end), status_code=206, media_type='application/pdf', headers=headers)
@@ -0,0 +1,51 @@
+"""
+SEO Sentinel Websites API
+Per-website endpoints: issue trends read from the precomputed rollups
+"""
+
+from datetime import datetime, timedelta
+
+from fastapi import APIRouter, Depends, HTTPException
+
+from app.core.dependencies import get_db
+from app.db.repositories import TREND_PERIODS, TrendRepository
+
+router = APIRouter()
+
+MAX_TREND_DAYS = 730
+
+
+def _point(row):
+    return {
+        'period_start': row.period_start.isoformat(),
+        'issue_type': row.issue_type,
+        'severity': row.severity,
+        'scans': row.scans,
+        'open_issues': row.open_issues,
+        'max_open_issues': row.max_open_issues,
+        'avg_open_issues': round(row.total_open_issues / row.scans, 2) if row.scans else 0,
+        'new_issues': row.new_issues,
+        'resolved_issues': row.resolved_issues,
+    }
+
+
+@router.get("/{website_id}/trends")
+async def website_trends(website_id: int, period: str = 'day', days: int = 90, breakdown: bool = False,
+                         db=Depends(get_db)):
+    """Issue health over the last `days`: totals, or every type/severity with breakdown=true"""
+    if period not in TREND_PERIODS:
+        raise HTTPException(status_code=400, detail=f"period must be one of {', '.join(TREND_PERIODS)}")
+    days = max(1, min(days, MAX_TREND_DAYS))
+    since = datetime.now() - timedelta(days=days - 1)
+
+    def load(session):
+        repository = TrendRepository(session)
+        rows = repository.breakdown(website_id, period, since) if breakdown else repository.series(website_id, period, since)
+        return [_point(row) for row in rows]
+
+    return {
+        'website_id': website_id,
+        'period': period,
+        'since': since.date().isoformat(),
+        'points': await db.run_sync(load),
+    }
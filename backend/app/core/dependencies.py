@@ -0,0 +1,33 @@
+"""
+SEO Sentinel API Dependencies
+FastAPI dependencies shared by the routers
+"""
+
+from fastapi import Header, HTTPException
+
+from app.core.security import metrics_token_valid, report_link_valid
+from app.db.database import acquire_async_session
+
+
+async def get_db():
+    """AsyncSession per request; rolled back on error, always returned to the pool"""
+    session = await acquire_async_session()
+    try:
+        yield session
+    except Exception:
+        await session.rollback()
+        raise
+    finally:
+        await session.close()
+
+
+def signed_report_link(scan_id: int, expires: int = 0, token: str = ''):
+    """Reports are opened by the signed links in report emails (see security.report_link_params)"""
+    if not report_link_valid(scan_id, expires, token):
+        raise HTTPException(status_code=403, detail='Report link is invalid or has expired')
+
+
+def metrics_token(authorization: str = Header('')):
+    """Internal metrics are for operators holding METRICS_TOKEN"""
+    if not metrics_token_valid(authorization):
+        raise HTTPException(status_code=401, detail='Not authenticated', headers={'WWW-Authenticate': 'Bearer'})
@@ -0,0 +1,43 @@
+"""
+SEO Sentinel Security
+Signed report links and the operator token guarding internal endpoints
+"""
+
+import hashlib
+import hmac
+import time
+
+from app.core.config import config
+
+
+def _secret():
+    key = config.API['secret_key']
+    if not key:
+        raise RuntimeError('SECRET_KEY is not set: report links cannot be signed')
+    return key.encode()
+
+
+def report_signature(scan_id, expires):
+    """HMAC of the scan id and expiry; one signature opens every view of the report"""
+    return hmac.new(_secret(), f'report:{scan_id}:{expires}'.encode(), hashlib.sha256).hexdigest()
+
+
+def report_link_params(scan_id, now=None):
+    """Query parameters ({'expires', 'token'}) that open a scan's report until config.REPORT['link_days'] pass"""
+    expires = int(now if now is not None else time.time()) + config.REPORT['link_days'] * 86400
+    return {'expires': expires, 'token': report_signature(scan_id, expires)}
+
+
+def report_link_valid(scan_id, expires, token, now=None):
+    """True if `token` was signed for this scan and `expires` hasn't passed"""
+    if not token or expires < (now if now is not None else time.time()):
+        return False
+    return hmac.compare_digest(token, report_signature(scan_id, expires))
+
+
+def metrics_token_valid(authorization):
+    """True for an `Authorization: Bearer <METRICS_TOKEN>` header; always False while no token is set"""
+    token = config.API['metrics_token']
+    if not token or not authorization:
+        return False
+    return hmac.compare_digest(authorization.encode(), f'Bearer {token}'.encode())
@@ -0,0 +1,100 @@
+"""
+SEO Sentinel Crawl Checkpoints
+Periodic on-disk snapshots of a running crawl so an interrupted scan can resume
+"""
+
+import json
+import os
+import shutil
+import time
+
+from app.core.config import config
+
+
+STATE_FILE = 'state.json'
+
+
+class CrawlCheckpoint:
+    """Generational crawl state in one directory per scan
+
+    Each save writes a new generation of the binary seen sets
+    (`<name>.<generation>.bin`) and then atomically replaces state.json,
+    which names the generation it belongs to. A crash at any point leaves
+    the previous state.json and its files intact, so the frontier, seen
+    sets, stats and sink offsets always come from the same instant.
+    """
+
+    def __init__(self, directory):
+        self.directory = str(directory)
+        self.generation = 0
+        self.saved_at = None
+
+    @classmethod
+    def for_scan(cls, scan_id):
+        """Checkpoint directory for a Scan row"""
+        return cls(os.path.join(config.CRAWLER['checkpoint_dir'], f'scan_{scan_id}'))
+
+    @property
+    def state_path(self):
+        return os.path.join(self.directory, STATE_FILE)
+
+    def exists(self):
+        return os.path.exists(self.state_path)
+
+    def path(self, name, generation=None):
+        """Path of a binary file belonging to a generation"""
+        generation = self.generation if generation is None else generation
+        return os.path.join(self.directory, f'{name}.{generation}.bin')
+
+    def load(self):
+        """Return the last saved state, or None if there is no checkpoint"""
+        try:
+            with open(self.state_path, 'r', encoding='utf-8') as f:
+                state = json.load(f)
+        except (OSError, ValueError):
+            return None
+        self.generation = state['generation']
+        self.saved_at = state.get('saved_at')
+        return state
+
+    def save(self, state, fingerprint_sets):
+        """Write a new generation: seen sets first, then state.json
+
+        `fingerprint_sets` maps names to FingerprintSet objects; their
+        file paths are recorded in the state under 'files'.
+        """
+        os.makedirs(self.directory, exist_ok=True)
+        generation = self.generation + 1
+
+        files = {}
+        for name, fingerprints in fingerprint_sets.items():
+            if fingerprints is None:
+                continue
+            path = self.path(name, generation)
+            fingerprints.save(path)
+            files[name] = path
+
+        state = {**state, 'generation': generation, 'saved_at': time.time(), 'files': files}
+        tmp_path = f'{self.state_path}.tmp'
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(state, f, separators=(',', ':'))
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, self.state_path)
+
+        previous = self.generation
+        self.generation = generation
+        self.saved_at = state['saved_at']
+        self._remove_generation(previous)
+        return state
+
+    def _remove_generation(self, generation):
+        for name in os.listdir(self.directory):
+            if name.endswith(f'.{generation}.bin'):
+                os.remove(os.path.join(self.directory, name))
+
+    def clear(self):
+        """Delete the checkpoint once the scan has finished"""
+        shutil.rmtree(self.directory, ignore_errors=True)
+        self.generation = 0
+        self.saved_at = None
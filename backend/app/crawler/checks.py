@@ -0,0 +1,154 @@
+"""
+SEO Sentinel Checks
+Pluggable per-page SEO checks that run against a shared PageRecord
+"""
+
+import time
+from datetime import datetime
+from urllib.parse import urljoin
+
+
+CHECK_REGISTRY = {}
+
+
+def register_check(cls):
+    """Class decorator adding a check to the registry under its `name`"""
+    CHECK_REGISTRY[cls.name] = cls
+    return cls
+
+
+class SEOCheck:
+    """Base class for checks
+
+    `requires` lists the PageRecord fields the check reads, so the analyzer
+    only collects what the enabled checks need. Checks with
+    `error_pages = False` are skipped for 4xx/5xx responses.
+    """
+
+    name = None
+    requires = ()
+    error_pages = False
+
+    def run(self, page):
+        """Yield issue dicts for one page"""
+        raise NotImplementedError
+
+
+@register_check
+class BrokenLinkCheck(SEOCheck):
+    """Pages that answered with an error status"""
+
+    name = 'broken_links'
+    requires = ('status', 'referer')
+    error_pages = True
+
+    def run(self, page):
+        if page.status >= 400:
+            yield {
+                'type': 'broken_link',
+                'url': page.url,
+                'status': page.status,
+                'referenced_from': page.referer or 'Direct',
+                'timestamp': datetime.now().isoformat()
+            }
+
+
+@register_check
+class MissingAltTextCheck(SEOCheck):
+    """Images without (or with empty) alt text"""
+
+    name = 'missing_alt_text'
+    requires = ('images', 'title')
+
+    def run(self, page):
+        for src, alt in page.images:
+            if not src:
+                continue
+            if alt is None or alt.strip() == "":
+                yield {
+                    'type': 'missing_alt_text',
+                    'page_url': page.url,
+                    'page_title': page.title or 'No Title',
+                    'img_src': urljoin(page.url, src),
+                    'img_filename': src.split('/')[-1]
+                }
+
+
+@register_check
+class MetaTagCheck(SEOCheck):
+    """Missing/short titles and missing meta descriptions"""
+
+    name = 'meta_issues'
+    requires = ('title', 'meta')
+
+    def run(self, page):
+        meta_issues = []
+
+        if not page.title or len(page.title.strip()) < 10:
+            meta_issues.append('Missing or too short page title')
+
+        if not page.meta_description:
+            meta_issues.append('Missing meta description')
+
+        if meta_issues:
+            yield {
+                'type': 'meta_issues',
+                'page_url': page.url,
+                'issues': meta_issues
+            }
+
+
+def resolve_check_names(checks=None):
+    """Pick the enabled checks: an explicit list/CSV, else everything"""
+    if checks:
+        names = checks.split(',') if isinstance(checks, str) else list(checks)
+    else:
+        names = list(CHECK_REGISTRY)
+
+    names = [name.strip() for name in names if name.strip()]
+    unknown = [name for name in names if name not in CHECK_REGISTRY]
+    if unknown:
+        raise ValueError(f"Unknown SEO checks: {', '.join(unknown)}")
+    return names
+
+
+class CheckSuite:
+    """The checks enabled for one scan, with per-check CPU time and issue counts"""
+
+    def __init__(self, names):
+        self.checks = [CHECK_REGISTRY[name]() for name in names]
+        self.names = sorted(check.name for check in self.checks)
+        self.fields = set()
+        for check in self.checks:
+            self.fields.update(check.requires)
+
+        self.timings = {
+            check.name: {'pages': 0, 'issues': 0, 'cpu_seconds': 0.0}
+            for check in self.checks
+        }
+
+    def run(self, page):
+        """Run every applicable check on a page and yield the issues found"""
+        is_error = page.status >= 400
+
+        for check in self.checks:
+            if is_error and not check.error_pages:
+                continue
+
+            started = time.process_time()
+            issues = list(check.run(page))
+            elapsed = time.process_time() - started
+
+            timing = self.timings[check.name]
+            timing['pages'] += 1
+            timing['issues'] += len(issues)
+            timing['cpu_seconds'] += elapsed
+
+            yield from issues
+
+    def report(self):
+        """Timings rounded for the crawl summary"""
+        return {
+            name: {**timing, 'cpu_seconds': round(timing['cpu_seconds'], 6)}
+            for name, timing in self.timings.items()
+        }
@@ -0,0 +1,425 @@
+"""
+SEO Sentinel Database Crawler
+Runs the crawl for a Scan record, resumes interrupted scans and bulk-loads their issues
+"""
+
+import os
+import time
+from concurrent.futures import wait
+from datetime import datetime
+from functools import lru_cache
+
+from app.core.config import config
+from app.crawler.checkpoint import CrawlCheckpoint
+from app.crawler.frontier import normalize_url
+from app.crawler.preflight import expected_pages
+from app.crawler.runner import get_crawl_runner
+from app.crawler.seen_set import fingerprint64
+from app.crawler.sinks import ISSUE_GROUPS, issue_group, read_ndjson_issues
+from app.db.models import Issue, Scan, ScanStatus
+from app.db.repositories import IssueRepository, ScanRepository, TrendRepository
+
+
+# Spider issue 'type' -> Issue.issue_type
+ISSUE_TYPES = {
+    'broken_link': 'broken_link',
+    'missing_alt_text': 'missing_alt_text',
+    'meta_issues': 'meta_issue',
+}
+
+# Issue report group -> Scan counter column
+SCAN_COUNTERS = {
+    'broken_links': 'broken_links_count',
+    'missing_alt_text': 'missing_alt_text_count',
+    'meta_issues': 'meta_issues_count',
+}
+
+
+# String column -> max length, so one long URL can't fail a whole batch
+COLUMN_LENGTHS = {
+    column.name: column.type.length
+    for column in Issue.__table__.columns
+    if getattr(column.type, 'length', None)
+}
+
+
+@lru_cache(maxsize=65536)
+def _normalized(url):
+    # Many issues share a page URL; normalize each one once
+    return normalize_url(url)
+
+
+def issue_severity(issue):
+    """Severity for a spider issue dict"""
+    kind = issue.get('type')
+    if kind == 'broken_link':
+        status = issue.get('status') or 0
+        if status == 0 or status >= 500:
+            return 'critical'
+        return 'high' if issue.get('link_type') in (None, 'page') else 'medium'
+    if kind == 'meta_issues':
+        return 'medium'
+    return 'low'
+
+
+def issue_fingerprint(row):
+    """Stable identity of an issue across scans: type + normalized page URL + target
+
+    Broken links are keyed on the broken URL alone: each one is reported
+    once per scan, from whichever referring page was parsed first, so the
+    referring page is data rather than identity. Returned as a signed
+    64-bit integer so it fits a BIGINT column.
+    """
+    target = row['broken_url'] or row['image_url'] or row['meta_issue_description'] or ''
+    if target.startswith(('http://', 'https://')):
+        target = _normalized(target)
+    page_url = _normalized(row['page_url']) if row['page_url'] and row['issue_type'] != 'broken_link' else ''
+
+    value = fingerprint64(f"{row['issue_type']}|{page_url}|{target}")
+    return value - (1 << 64) if value >= (1 << 63) else value
+
+
+def issue_to_row(scan_id, issue, website_id=None):
+    """Map a spider issue dict onto Issue columns (a plain dict, not an ORM object)"""
+    kind = issue.get('type')
+    row = {
+        'scan_id': scan_id,
+        'website_id': website_id,
+        'fingerprint': None,
+        'is_resolved': False,
+        'issue_type': ISSUE_TYPES.get(kind, kind),
+        'severity': issue_severity(issue),
+        'page_url': None,
+        'page_title': None,
+        'broken_url': None,
+        'status_code': None,
+        'referenced_from': None,
+        'image_url': None,
+        'image_filename': None,
+        'meta_issue_description': None,
+    }
+
+    if kind == 'broken_link':
+        referenced_from = issue.get('referenced_from')
+        row['page_url'] = referenced_from if referenced_from != 'Direct' else issue.get('url')
+        row['broken_url'] = issue.get('url')
+        row['status_code'] = issue.get('status')
+        row['referenced_from'] = referenced_from
+    elif kind == 'missing_alt_text':
+        row['page_url'] = issue.get('page_url')
+        row['page_title'] = issue.get('page_title')
+        row['image_url'] = issue.get('img_src')
+        row['image_filename'] = issue.get('img_filename')
+    else:
+        row['page_url'] = issue.get('page_url')
+        details = issue.get('issues')
+        row['meta_issue_description'] = '; '.join(details) if isinstance(details, list) else details
+
+    row['fingerprint'] = issue_fingerprint(row)
+    for column, length in COLUMN_LENGTHS.items():
+        value = row.get(column)
+        if value is not None and len(value) > length:
+            row[column] = value[:length]
+    return row
+
+
+def issue_from_row(row):
+    """Issue row back to the spider issue dict the reports render"""
+    if row.issue_type == 'broken_link':
+        return {'type': 'broken_link', 'url': row.broken_url, 'status': row.status_code,
+                'referenced_from': row.referenced_from or row.page_url}
+    if row.issue_type == 'missing_alt_text':
+        return {'type': 'missing_alt_text', 'page_url': row.page_url, 'page_title': row.page_title,
+                'img_src': row.image_url, 'img_filename': row.image_filename}
+    return {'type': 'meta_issues', 'page_url': row.page_url,
+            'issues': (row.meta_issue_description or '').split('; ')}
+
+
+class ScanCrawler:
+    """Run crawls for Scan rows with on-disk checkpoints
+
+    Every scan crawls with a checkpoint directory derived from its id, so a
+    worker that dies mid-crawl (OOM kill, deploy) leaves the scan RUNNING
+    with a checkpoint_path; `resume()` picks it up by Scan.id or
+    celery_task_id and continues from the last checkpoint.
+    """
+
+    def __init__(self, session, runner=None, defer_ingest=False):
+        self.session = session
+        self.runner = runner or get_crawl_runner()
+        # True when a separate worker calls complete() (see app.tasks)
+        self.defer_ingest = defer_ingest
+
+    def find_scan(self, scan_id=None, celery_task_id=None):
+        """Look a scan up by primary key or by the Celery task that owns it"""
+        query = self.session.query(Scan)
+        if scan_id is not None:
+            return query.filter(Scan.id == scan_id).first()
+        if celery_task_id is not None:
+            return query.filter(Scan.celery_task_id == celery_task_id).first()
+        raise ValueError('scan_id or celery_task_id is required')
+
+    @staticmethod
+    def issues_path(scan):
+        """Stable NDJSON issue file, so a resumed crawl appends to the same file"""
+        return str(config.REPORTS_DIR / f'scan_{scan.id}_issues.ndjson')
+
+    @staticmethod
+    def snapshots_path(scan):
+        """Page snapshots this scan writes for the next scan's conditional requests"""
+        return str(config.REPORTS_DIR / f'scan_{scan.id}_pages.ndjson')
+
+    @staticmethod
+    def link_cache_path(scan):
+        """Link statuses shared by every scan of the website, whichever worker runs it"""
+        return os.path.join(config.CRAWLER['link_cache_dir'], f'website_{scan.website_id}.json')
+
+    @staticmethod
+    def seen_set_path(scan):
+        """mmap'd URL-seen set file of a crawl too large to keep the set in RAM"""
+        return os.path.join(config.CRAWLER['seen_set_dir'], f'scan_{scan.id}_seen.bin')
+
+    @staticmethod
+    def spills_seen_set(scan, estimated_pages=None):
+        """Whether a crawl is expected to outgrow CRAWLER['seen_set_spill_pages']"""
+        return expected_pages(scan.website.max_pages, estimated_pages) > config.CRAWLER['seen_set_spill_pages']
+
+    def previous_snapshots(self, scan):
+        """Page snapshots of the website's last completed scan, if it left any"""
+        previous, _ = ScanRepository(self.session).list_for_website(
+            scan.website_id, before_id=scan.id, limit=1, status=ScanStatus.COMPLETED
+        )
+        return previous[0].page_snapshots_path if previous else None
+
+    def _begin(self, scan, spider_kwargs):
+        """Mark a scan RUNNING (uncommitted); returns the spider kwargs for its crawl"""
+        checkpoint = CrawlCheckpoint.for_scan(scan.id)
+        resuming = checkpoint.exists()
+
+        scan.status = ScanStatus.RUNNING
+        scan.checkpoint_path = checkpoint.directory
+        scan.error_message = None
+        if resuming:
+            scan.resume_count = (scan.resume_count or 0) + 1
+        else:
+            scan.started_at = datetime.now()
+
+        # Size estimate from the pre-flight probe, if there was one
+        spider_kwargs = dict(spider_kwargs)
+        estimated_pages = spider_kwargs.pop('estimated_pages', None)
+        seen_set_path = self.seen_set_path(scan) if self.spills_seen_set(scan, estimated_pages) else None
+        if seen_set_path:
+            os.makedirs(os.path.dirname(seen_set_path), exist_ok=True)
+            if not resuming and os.path.exists(seen_set_path):
+                os.remove(seen_set_path)  # Left by a crawl that died before its first checkpoint
+
+        if not spider_kwargs.get('checks'):
+            # No explicit list: the checks the owner's plan includes
+            spider_kwargs['checks'] = config.get_tier_checks(scan.user.subscription_tier)
+
+        return {
+            'previous_snapshots': self.previous_snapshots(scan),
+            **spider_kwargs,
+            'sink': f'ndjson:{self.issues_path(scan)}',
+            'link_cache_file': self.link_cache_path(scan),
+            'snapshots_out': self.snapshots_path(scan),
+            'seen_set_path': seen_set_path,
+            'checkpoint_dir': checkpoint.directory,
+        }
+
+    @staticmethod
+    def _wait(futures, heartbeat=None):
+        """Block until the crawls finish, calling heartbeat() every third of CRAWLER['lease_seconds']"""
+        interval = config.CRAWLER['lease_seconds'] / 3
+        while heartbeat is not None and wait(futures, timeout=interval).not_done:
+            heartbeat()
+
+    def run(self, scan, heartbeat=None, **spider_kwargs):
+        """Crawl (or continue crawling) a scan and record the outcome"""
+        website = scan.website
+        spider_kwargs = self._begin(scan, spider_kwargs)
+        self.session.commit()
+
+        started = time.perf_counter()
+        try:
+            future = self.runner.submit(website.domain, website.max_pages, **spider_kwargs)
+            self._wait([future], heartbeat)
+            results = future.result()
+        except Exception as e:
+            # The checkpoint stays on disk: a later resume() can still continue
+            scan.error_message = str(e)
+            self.session.commit()
+            raise
+
+        self._record_results(scan, results, time.perf_counter() - started)
+        return results
+
+    def run_many(self, scans, per_scan_kwargs=None, heartbeat=None, **spider_kwargs):
+        """Crawl several scans at once on the shared reactor; returns {scan_id: results or exception}
+
+        Each scan still gets its own spider, so page budget, checkpoint,
+        issue file and per-host politeness (download slots, adaptive
+        throttle) stay per domain; only the process and reactor are shared.
+        One failing crawl does not affect the others.
+        """
+        per_scan_kwargs = per_scan_kwargs or {}
+        crawls = []
+        for scan in scans:
+            if scan.status == ScanStatus.COMPLETED or scan.crawled_at is not None:
+                continue
+            kwargs = self._begin(scan, {**spider_kwargs, **per_scan_kwargs.get(scan.id, {})})
+            crawls.append((scan, kwargs))
+        self.session.commit()
+
+        started = time.perf_counter()
+        finished_at = {}
+        futures = []
+        for scan, kwargs in crawls:
+            future = self.runner.submit(scan.website.domain, scan.website.max_pages, **kwargs)
+            future.add_done_callback(lambda _, scan_id=scan.id: finished_at.setdefault(scan_id, time.perf_counter()))
+            futures.append((scan, future))
+        self._wait([future for _, future in futures], heartbeat)
+
+        outcomes = {}
+        for scan, future in futures:
+            try:
+                results = future.result()
+            except Exception as e:
+                scan.error_message = str(e)
+                self.session.commit()
+                outcomes[scan.id] = e
+                continue
+            self._record_results(scan, results, finished_at.get(scan.id, time.perf_counter()) - started)
+            outcomes[scan.id] = results
+        return outcomes
+
+    def resume(self, scan_id=None, celery_task_id=None, **spider_kwargs):
+        """Continue an interrupted scan from its last checkpoint"""
+        scan = self.find_scan(scan_id, celery_task_id)
+        if scan is None:
+            raise LookupError(f'Scan not found: {scan_id or celery_task_id}')
+        if scan.status == ScanStatus.COMPLETED or scan.crawled_at is not None:
+            return None
+        return self.run(scan, **spider_kwargs)
+
+    def interrupted_scans(self, stale_after=None):
+        """RUNNING scans whose crawl has stopped checkpointing (dead worker)"""
+        if stale_after is None:
+            stale_after = 3 * config.CRAWLER['checkpoint_interval']
+        now = time.time()
+
+        interrupted = []
+        scans = self.session.query(Scan).filter(Scan.status == ScanStatus.RUNNING, Scan.checkpoint_path.isnot(None))
+        for scan in scans:
+            checkpoint = CrawlCheckpoint(scan.checkpoint_path)
+            checkpoint.load()
+            last_activity = checkpoint.saved_at
+            if last_activity is None and scan.started_at is not None:
+                last_activity = scan.started_at.timestamp()
+            if last_activity is None or now - last_activity > stale_after:
+                interrupted.append(scan)
+        return interrupted
+
+    def ingest_issues(self, scan, issues, batch_size=5000):
+        """Diff a scan's issue stream against the website's open issues
+
+        Only issues first seen in this scan are inserted and only issues
+        that disappeared are updated (resolved); issues that persist from
+        scan to scan are not written at all. Runs in the caller's
+        transaction and is idempotent: a retried ingest first undoes the
+        scan's previous one.
+        """
+        repository = IssueRepository(self.session)
+        repository.undo_scan(scan.id)
+        open_issues = repository.open_fingerprints(scan.website_id)
+        previous, _ = ScanRepository(self.session).list_for_website(
+            scan.website_id, before_id=scan.id, limit=1, status=ScanStatus.COMPLETED
+        )
+
+        counts = {group: 0 for group in ISSUE_GROUPS.values()}
+        present = set()
+        breakdown = {}  # (issue_type, severity) -> {'open', 'new', 'resolved'}
+
+        def tally(key, name, amount=1):
+            bucket = breakdown.setdefault(key, {'open': 0, 'new': 0, 'resolved': 0})
+            bucket[name] += amount
+
+        def new_rows():
+            for issue in issues:
+                group = issue_group(issue)
+                counts[group] = counts.get(group, 0) + 1
+                row = issue_to_row(scan.id, issue, scan.website_id)
+                fingerprint = row['fingerprint']
+                if fingerprint in present:
+                    continue  # Reported twice in this scan
+                present.add(fingerprint)
+                key = (row['issue_type'], row['severity'])
+                tally(key, 'open')
+                if fingerprint not in open_issues:
+                    tally(key, 'new')
+                    yield row
+
+        new = repository.bulk_insert(new_rows(), batch_size)
+        resolved = [issue_id for fingerprint, issue_id in open_issues.items() if fingerprint not in present]
+        repository.resolve(resolved, scan.id, previous[0].id if previous else None, datetime.now())
+        if resolved:
+            for key, count in repository.resolved_summary(scan.id).items():
+                tally(key, 'resolved', count)
+
+        for group, column in SCAN_COUNTERS.items():
+            setattr(scan, column, counts.get(group, 0))
+        scan.new_issues_count = new
+        scan.resolved_issues_count = len(resolved)
+        return {
+            'new': new,
+            'unchanged': len(open_issues) - len(resolved),
+            'resolved': len(resolved),
+            'breakdown': breakdown,
+        }
+
+    def complete(self, scan):
+        """Ingest a finished crawl's issues and mark the scan COMPLETED
+
+        Issue rows, counters, trend rollups and the status flip commit
+        together; a scan that is already COMPLETED is left alone, so
+        retrying this is safe. Returns the ingest counts (None if skipped).
+        """
+        if scan.status == ScanStatus.COMPLETED:
+            return None
+        try:
+            ingested = self.ingest_issues(scan, read_ndjson_issues(scan.report_json_path))
+            scan.status = ScanStatus.COMPLETED
+            scan.completed_at = datetime.now()
+            scan.website.last_scan_at = scan.completed_at
+            TrendRepository(self.session).record_scan(scan, ingested['breakdown'])
+            self.session.commit()
+        except Exception:
+            self.session.rollback()
+            raise
+        return ingested
+
+    def _record_results(self, scan, results, duration):
+        stats = results['stats']
+
+        scan.pages_crawled = stats['pages_crawled']
+        scan.pages_found = (stats.get('coverage') or {}).get('urls_discovered') or stats['pages_crawled']
+        scan.report_json_path = results.get('issues_file')
+        scan.duration_seconds = (scan.duration_seconds or 0) + duration
+
+        finished = stats.get('close_reason') == 'finished'
+        if finished:
+            scan.crawled_at = datetime.now()
+            scan.checkpoint_path = None
+            scan.page_snapshots_path = self.snapshots_path(scan)
+            seen_set_path = self.seen_set_path(scan)
+            if os.path.exists(seen_set_path):
+                os.remove(seen_set_path)  # Only needed while the crawl can still resume
+        # Otherwise (shutdown, timeout) the scan stays RUNNING and resumable
+
+        try:
+            self.session.commit()
+        except Exception:
+            self.session.rollback()
+            raise
+        if finished and not self.defer_ingest:
+            self.complete(scan)
@@ -0,0 +1,180 @@
+"""
+SEO Sentinel Crawl Frontier
+URL normalization, fingerprints, priorities and streaming sitemap parsing
+"""
+
+import gzip
+import heapq
+import io
+import re
+from urllib.parse import parse_qsl, urlencode, urlsplit, urlunsplit
+
+from lxml import etree
+from scrapy.dupefilters import BaseDupeFilter
+
+from app.core.config import config
+from app.crawler.seen_set import FingerprintSet, fingerprint64
+
+
+DEFAULT_PORTS = {'http': 80, 'https': 443}
+
+# Query parameters that select a page of results rather than a distinct page
+PAGINATION_PARAMS = {'page', 'p', 'pg', 'offset', 'start'}
+
+_MULTI_SLASH = re.compile(r'/{2,}')
+
+
+def _is_ignored_param(name, ignored):
+    name = name.lower()
+    if name in ignored:
+        return True
+    # utm_source, filter_color, filter[brand] ...
+    return any(name.startswith(prefix) for prefix in ('utm_', 'filter'))
+
+
+def normalize_url(url, ignored_params=None):
+    """Canonical form used for de-duplication
+
+    Lower-cases scheme and host, drops default ports, fragments and
+    tracking/sort/filter parameters, collapses repeated slashes and sorts
+    the remaining query parameters.
+    """
+    if ignored_params is None:
+        ignored_params = config.CRAWLER['ignored_query_params']
+
+    parts = urlsplit(url.strip())
+    scheme = parts.scheme.lower()
+    host = (parts.hostname or '').lower()
+    if parts.port and parts.port != DEFAULT_PORTS.get(scheme):
+        host = f'{host}:{parts.port}'
+
+    path = _MULTI_SLASH.sub('/', parts.path) or '/'
+    query = sorted(
+        (name, value)
+        for name, value in parse_qsl(parts.query, keep_blank_values=True)
+        if not _is_ignored_param(name, ignored_params)
+    )
+    return urlunsplit((scheme, host, path, urlencode(query), ''))
+
+
+def url_fingerprint(url):
+    """64-bit integer fingerprint of the normalized URL"""
+    return fingerprint64(normalize_url(url))
+
+
+def url_priority(url, depth=0, sitemap_priority=None):
+    """Scheduling priority - higher runs first
+
+    Favours shallow paths and sitemap-declared priorities, and pushes
+    pagination and other parameterised listing URLs to the back.
+    """
+    parts = urlsplit(url)
+    segments = [segment for segment in parts.path.split('/') if segment]
+    params = {name.lower() for name, _ in parse_qsl(parts.query)}
+
+    score = 100 - 10 * len(segments) - 5 * depth
+    if not segments and not params:
+        score += 100  # Homepage
+    if params & PAGINATION_PARAMS:
+        score -= 40
+    elif params:
+        score -= 20
+    if sitemap_priority is not None:
+        score += int(sitemap_priority * 50)
+    return score
+
+
+def iter_sitemap(body):
+    """Stream ('url' | 'sitemap', loc, priority, lastmod) entries from a sitemap
+
+    Handles urlsets, sitemap indexes and gzip bodies without building the
+    whole tree.
+    """
+    source = io.BytesIO(body)
+    if body[:2] == b'\x1f\x8b':
+        source = gzip.GzipFile(fileobj=source)
+
+    parser = etree.iterparse(
+        source,
+        events=('end',),
+        tag=('{*}url', '{*}sitemap'),
+        resolve_entities=False,
+        no_network=True,
+        huge_tree=True,
+        recover=True,
+    )
+
+    try:
+        for _, el in parser:
+            loc = (el.findtext('{*}loc') or '').strip()
+            if loc:
+                kind = 'sitemap' if etree.QName(el).localname == 'sitemap' else 'url'
+                try:
+                    priority = float(el.findtext('{*}priority') or '')
+                except ValueError:
+                    priority = None
+                yield kind, loc, priority, el.findtext('{*}lastmod')
+
+            # Free parsed entries as we go
+            el.clear()
+            while el.getprevious() is not None:
+                del el.getparent()[0]
+    except (etree.XMLSyntaxError, OSError, EOFError):
+        return  # Truncated or corrupt sitemap: keep what was read
+
+
+class TopK:
+    """Keep the `size` highest-priority items seen in a stream"""
+
+    def __init__(self, size):
+        self.size = size
+        self._heap = []
+        self._counter = 0  # Tie-breaker keeping heap comparisons on ints
+
+    def push(self, priority, item):
+        if self.size <= 0:
+            return
+        self._counter += 1
+        entry = (priority, -self._counter, item)
+        if len(self._heap) < self.size:
+            heapq.heappush(self._heap, entry)
+        elif priority > self._heap[0][0]:
+            heapq.heapreplace(self._heap, entry)
+
+    def drain(self):
+        """Items in descending priority order"""
+        entries = sorted(self._heap, reverse=True)
+        self._heap = []
+        return [(priority, item) for priority, _, item in entries]
+
+
+class FrontierDupeFilter(BaseDupeFilter):
+    """Request de-duplication on normalized-URL fingerprints
+
+    Fingerprints live in a packed FingerprintSet; set SEEN_SET_PATH to back
+    it with an mmap'd file for crawls too large to keep in RAM, and
+    SEEN_SET_CHECKPOINT to start from a checkpointed set on resume.
+    """
+
+    def __init__(self, path=None, checkpoint=None):
+        if checkpoint:
+            self.fingerprints = FingerprintSet.load(checkpoint, path=path)
+        else:
+            self.fingerprints = FingerprintSet(path=path)
+
+    @classmethod
+    def from_settings(cls, settings):
+        return cls(settings.get('SEEN_SET_PATH'), settings.get('SEEN_SET_CHECKPOINT'))
+
+    def request_seen(self, request):
+        return not self.fingerprints.add(url_fingerprint(request.url))
+
+    def close(self, reason):
+        if reason == 'finished':
+            self.fingerprints.close()
+        else:
+            # An interrupted crawl still checkpoints this set from spider.closed()
+            self.fingerprints.flush()
+
+    def __len__(self):
+        return len(self.fingerprints)
@@ -0,0 +1,98 @@
+"""
+SEO Sentinel HTML Analyzer
+Walks a parsed page once and collects everything the SEO checks need
+"""
+
+from parsel import Selector
+from scrapy.http import TextResponse
+
+
+# PageRecord field -> element that fills it; lxml filters these in C during the walk
+FIELD_TAGS = {
+    'images': 'img',
+    'title': 'title',
+    'meta': 'meta',
+    'links': 'a',
+    'canonical': 'link',
+}
+
+
+class PageRecord:
+    """Compact summary of one crawled page, shared by every check"""
+
+    __slots__ = ('url', 'status', 'referer', 'title', 'meta', 'images', 'links', 'canonical')
+
+    def __init__(self, url, status=200, referer=''):
+        self.url = url
+        self.status = status
+        self.referer = referer
+        self.title = None
+        self.meta = {}       # lower-cased meta name/property -> content
+        self.images = []     # (src, alt) tuples; alt is None when the attribute is missing
+        self.links = []      # raw href values in document order
+        self.canonical = None
+
+    @property
+    def meta_description(self):
+        return self.meta.get('description')
+
+    def __repr__(self):
+        return f"<PageRecord(url={self.url}, images={len(self.images)}, links={len(self.links)})>"
+
+
+def _tags_for(fields):
+    if fields is None:
+        return tuple(FIELD_TAGS.values())
+    return tuple(FIELD_TAGS[field] for field in fields if field in FIELD_TAGS)
+
+
+def analyze_tree(root, url, status=200, referer='', fields=None):
+    """Build a PageRecord from an lxml root in a single document walk
+
+    `fields` limits collection to the PageRecord fields the enabled checks
+    need; None collects everything.
+    """
+    page = PageRecord(url, status, referer)
+    tags = _tags_for(fields)
+    if root is None or not tags:
+        return page
+
+    images = page.images
+    links = page.links
+    meta = page.meta
+
+    for el in root.iter(*tags):
+        tag = el.tag
+        if tag == 'img':
+            images.append((el.get('src'), el.get('alt')))
+        elif tag == 'a':
+            href = el.get('href')
+            if href:
+                links.append(href)
+        elif tag == 'meta':
+            name = el.get('name') or el.get('property')
+            if name:
+                meta.setdefault(name.lower(), el.get('content'))
+        elif tag == 'title':
+            if page.title is None:
+                page.title = el.text
+        elif tag == 'link':
+            if page.canonical is None and (el.get('rel') or '').lower() == 'canonical':
+                page.canonical = el.get('href')
+
+    return page
+
+
+def analyze_response(response, fields=None):
+    """Build a PageRecord for a Scrapy response, reusing its cached selector"""
+    referer = response.request.headers.get('Referer', b'').decode('utf-8') if response.request else ''
+
+    if response.status >= 400 or not isinstance(response, TextResponse):
+        return PageRecord(response.url, response.status, referer)
+
+    return analyze_tree(response.selector.root, response.url, response.status, referer, fields)
+
+
+def analyze_html(html, url, status=200, fields=None):
+    """Build a PageRecord from raw HTML (fixtures, benchmarks, re-analysis)"""
+    return analyze_tree(Selector(text=html).root, url, status, fields=fields)
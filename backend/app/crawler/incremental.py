@@ -0,0 +1,111 @@
+"""
+SEO Sentinel Incremental Crawl State
+Per-URL validators (ETag, Last-Modified, content hash) carried between scans
+"""
+
+import hashlib
+import json
+import os
+
+
+def content_hash(body):
+    """Stable fingerprint of a page body"""
+    return hashlib.sha1(body).hexdigest()
+
+
+class PageSnapshotStore:
+    """Read-only view of the page snapshots written by the previous scan
+
+    Only the conditional-request validators are kept in memory; the full
+    snapshot (issues, links, assets) is read from disk when a page turns
+    out to be unchanged. With `checks` (CheckSuite.names), snapshots taken
+    by a different set of checks are left out: their issues would not be
+    this scan's, so those pages are fetched and checked again.
+    """
+
+    def __init__(self, path, checks=None):
+        self.path = str(path)
+        self.checks = sorted(checks) if checks is not None else None
+        self.other_checks = 0  # snapshots left out for their checks
+        self._index = {}  # url -> (offset, etag, last_modified)
+        self._file = None
+        self._load_index()
+
+    def _load_index(self):
+        try:
+            self._file = open(self.path, 'rb')
+        except OSError:
+            return  # First scan of the site: nothing to reuse
+
+        offset = 0
+        for line in self._file:
+            if line.endswith(b'\n'):
+                snapshot = json.loads(line)
+                if self.checks is not None and snapshot.get('checks') != self.checks:
+                    self.other_checks += 1
+                else:
+                    self._index[snapshot['url']] = (offset, snapshot.get('etag'), snapshot.get('last_modified'))
+            offset += len(line)
+
+    def __len__(self):
+        return len(self._index)
+
+    def __contains__(self, url):
+        return url in self._index
+
+    def validators(self, url):
+        """Return (etag, last_modified) for a URL, or (None, None)"""
+        entry = self._index.get(url)
+        return (entry[1], entry[2]) if entry else (None, None)
+
+    def get(self, url):
+        """Load the full snapshot for a URL from disk"""
+        entry = self._index.get(url)
+        if entry is None:
+            return None
+        self._file.seek(entry[0])
+        return json.loads(self._file.readline())
+
+    def close(self):
+        if self._file:
+            self._file.close()
+
+
+class PageSnapshotWriter:
+    """Stream page snapshots for the next scan to an NDJSON file"""
+
+    def __init__(self, path, resume_offset=None, resume_count=0):
+        self.path = str(path)
+        self.count = 0
+        if resume_offset is None:
+            self._file = open(self.path, 'w', encoding='utf-8')
+        else:
+            # Resumed scan: keep the snapshots written up to the checkpoint
+            self._file = open(self.path, 'a', encoding='utf-8')
+            self._file.truncate(resume_offset)
+            self._file.seek(0, os.SEEK_END)
+            self.count = resume_count
+
+    def write(self, url, etag=None, last_modified=None, body_hash=None, issues=(), links=(), assets=(), checks=()):
+        snapshot = {
+            'url': url,
+            'etag': etag,
+            'last_modified': last_modified,
+            'content_hash': body_hash,
+            'checks': sorted(checks),  # the CheckSuite that found `issues`
+            'issues': list(issues),
+            'links': list(links),
+            'assets': [list(asset) for asset in assets],
+        }
+        self._file.write(json.dumps(snapshot, separators=(',', ':')) + '\n')
+        self.count += 1
+
+    def offset(self):
+        """Flush, fsync and return the byte offset a checkpoint can resume from"""
+        self._file.flush()
+        os.fsync(self._file.fileno())
+        return self._file.tell()
+
+    def close(self):
+        if not self._file.closed:
+            self._file.close()
@@ -0,0 +1,251 @@
+"""
+SEO Sentinel Link Validator
+Checks image and outbound URLs with HEAD requests and a shared status cache
+"""
+
+import json
+import os
+import time
+from collections import OrderedDict
+from datetime import datetime
+from urllib.parse import urljoin, urlparse
+
+import scrapy
+from scrapy.exceptions import IgnoreRequest
+
+from app.core.config import config
+from app.crawler.seen_set import FingerprintSet, fingerprint64
+
+
+# HEAD answers that often mean "HEAD not supported" rather than "broken"
+HEAD_FALLBACK_STATUSES = {403, 405, 501}
+
+# Status recorded for network failures (DNS, timeouts, refused connections)
+NETWORK_ERROR_STATUS = 0
+
+
+class StatusCache:
+    """LRU cache of URL -> HTTP status with a time-to-live"""
+
+    def __init__(self, max_entries=100000, ttl=86400):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._entries = OrderedDict()  # url -> (status, checked_at)
+        self.hits = 0
+        self.misses = 0
+
+    def __len__(self):
+        return len(self._entries)
+
+    def get(self, url, now=None):
+        """Return the cached status or None if missing/expired"""
+        entry = self._entries.get(url)
+        now = now or time.time()
+
+        if entry is None or now - entry[1] > self.ttl:
+            if entry is not None:
+                del self._entries[url]
+            self.misses += 1
+            return None
+
+        self._entries.move_to_end(url)
+        self.hits += 1
+        return entry[0]
+
+    def set(self, url, status, now=None):
+        self._entries[url] = (status, now or time.time())
+        self._entries.move_to_end(url)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def save(self, path):
+        """Persist unexpired entries so the next scan of the site can reuse them
+
+        Written to a temporary file and renamed, so a worker loading the
+        file while another saves it never reads half of it.
+        """
+        now = time.time()
+        entries = [
+            [url, status, checked_at]
+            for url, (status, checked_at) in self._entries.items()
+            if now - checked_at <= self.ttl
+        ]
+        os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+        tmp_path = f'{path}.{os.getpid()}.tmp'
+        with open(tmp_path, 'w') as f:
+            json.dump(entries, f, separators=(',', ':'))
+        os.replace(tmp_path, path)
+
+    def load(self, path):
+        """Merge a saved cache; entries this process checked more recently win"""
+        try:
+            with open(path, 'r') as f:
+                entries = json.load(f)
+        except (OSError, ValueError):
+            return
+        for url, status, checked_at in entries:
+            current = self._entries.get(url)
+            if current is None or current[1] < checked_at:
+                self.set(url, status, checked_at)
+
+    def summary(self):
+        return {'entries': len(self), 'hits': self.hits, 'misses': self.misses}
+
+
+# One cache per site, shared by every scan that runs in this worker process;
+# least recently crawled sites are dropped past CRAWLER['link_cache_max_sites']
+_site_caches = OrderedDict()
+
+
+def get_status_cache(domain):
+    """Return the process-wide status cache for a site"""
+    cache = _site_caches.get(domain)
+    if cache is None:
+        cache = StatusCache(
+            max_entries=config.CRAWLER['link_cache_max_entries'],
+            ttl=config.CRAWLER['link_cache_ttl']
+        )
+        _site_caches[domain] = cache
+        while len(_site_caches) > config.CRAWLER['link_cache_max_sites']:
+            _site_caches.popitem(last=False)
+    _site_caches.move_to_end(domain)
+    return cache
+
+
+class LinkValidator:
+    """Validate the images and outbound links collected from crawled pages
+
+    Internal page links are already checked by the crawl itself; this stage
+    covers what the CrawlSpider rules never request. Each distinct URL is
+    checked at most once per scan, and not at all while the shared cache
+    holds a fresh status for it.
+    """
+
+    def __init__(self, domain, cache, check_images=True, check_external=True):
+        self.domain = domain
+        self.cache = cache
+        self.check_images = check_images
+        self.check_external = check_external
+
+        self._seen = FingerprintSet()
+        self.pending = {}  # url -> (kind, page_url) for checks still in flight
+        self.stats = {'urls': 0, 'cache_hits': 0, 'head_requests': 0, 'get_fallbacks': 0}
+
+    def _is_internal(self, host):
+        return host == self.domain or host.endswith('.' + self.domain)
+
+    def targets(self, page):
+        """(url, kind) pairs to validate for a page"""
+        if self.check_images:
+            for src, _ in page.images:
+                if src:
+                    yield urljoin(page.url, src), 'image'
+
+        if self.check_external:
+            for href in page.links:
+                url = urljoin(page.url, href)
+                host = urlparse(url).hostname or ''
+                if host and not self._is_internal(host):
+                    yield url, 'external'
+
+    def process_page(self, page, callback, errback):
+        """Yield issues for cached broken URLs and HEAD requests for unknown ones"""
+        return self.process_targets(page.url, self.targets(page), callback, errback)
+
+    def process_targets(self, page_url, targets, callback, errback):
+        """Validate (url, kind) pairs found on page_url"""
+        for url, kind in targets:
+            if not url.startswith(('http://', 'https://')):
+                continue
+
+            url = url.split('#', 1)[0]
+            if not self._seen.add(fingerprint64(url)):
+                continue
+            self.stats['urls'] += 1
+
+            status = self.cache.get(url)
+            if status is not None:
+                self.stats['cache_hits'] += 1
+                if self.is_broken(status):
+                    yield self.build_issue(url, status, page_url, kind)
+                continue
+
+            yield self._head_request(url, kind, page_url, callback, errback)
+
+    def _head_request(self, url, kind, page_url, callback, errback):
+        self.stats['head_requests'] += 1
+        self.pending[url] = (kind, page_url)
+        return scrapy.Request(
+            url,
+            method='HEAD',
+            callback=callback,
+            errback=errback,
+            dont_filter=True,  # Deduplicated above; also bypasses the offsite filter
+            priority=-10,      # Pages first, validation fills the gaps
+            meta={
+                'link_check': {'url': url, 'kind': kind, 'page_url': page_url},
+                'handle_httpstatus_all': True,
+            }
+        )
+
+    def checkpoint(self):
+        """(seen URL set, checks in flight) for a crawl checkpoint"""
+        return self._seen, self.pending
+
+    def resume(self, seen, pending, callback, errback):
+        """Restore checkpointed state; returns requests re-issuing the checks that were in flight"""
+        self._seen = seen
+        return [
+            self._head_request(url, kind, page_url, callback, errback)
+            for url, (kind, page_url) in pending.items()
+        ]
+
+    def handle_response(self, response, callback, errback):
+        """Return a fallback GET request, a broken-link issue, or None"""
+        check = response.meta['link_check']
+
+        if response.request.method == 'HEAD' and response.status in HEAD_FALLBACK_STATUSES:
+            self.stats['get_fallbacks'] += 1
+            return response.request.replace(
+                method='GET',
+                headers={'Range': 'bytes=0-0'},
+                callback=callback,
+                errback=errback,
+            )
+
+        self.pending.pop(check['url'], None)
+        self.cache.set(check['url'], response.status)
+        if self.is_broken(response.status):
+            return self.build_issue(check['url'], response.status, check['page_url'], check['kind'])
+        return None
+
+    def handle_failure(self, failure):
+        """Record network failures; requests refused by robots.txt stay unchecked"""
+        request = getattr(failure, 'request', None)
+        if request is None or 'link_check' not in request.meta:
+            return None
+        if failure.check(IgnoreRequest):
+            self.pending.pop(request.meta['link_check']['url'], None)
+            return None
+
+        check = request.meta['link_check']
+        self.pending.pop(check['url'], None)
+        self.cache.set(check['url'], NETWORK_ERROR_STATUS)
+        issue = self.build_issue(check['url'], NETWORK_ERROR_STATUS, check['page_url'], check['kind'])
+        issue['error'] = failure.type.__name__
+        return issue
+
+    @staticmethod
+    def is_broken(status):
+        return status == NETWORK_ERROR_STATUS or status >= 400
+
+    @staticmethod
+    def build_issue(url, status, page_url, kind):
+        return {
+            'type': 'broken_link',
+            'url': url,
+            'status': status,
+            'referenced_from': page_url,
+            'link_type': kind,
+            'timestamp': datetime.now().isoformat()
+        }
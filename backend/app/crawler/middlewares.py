@@ -0,0 +1,51 @@
+"""
+SEO Sentinel Middlewares
+Request-level policies for SEOSentinelSpider
+"""
+
+from scrapy.exceptions import IgnoreRequest
+from scrapy.http import Request
+from scrapy.spidermiddlewares.depth import DepthMiddleware
+
+
+class PageBudgetMiddleware:
+    """Drop queued page requests once the spider has used its page budget
+
+    Only CrawlSpider page requests (those carrying a 'rule' in meta) count
+    against the budget, so link validation requests still complete.
+    """
+
+    def process_request(self, request, spider):
+        if 'rule' in request.meta and getattr(spider, 'page_budget_exhausted', False):
+            raise IgnoreRequest('Page budget exhausted')
+        return None
+
+
+class ConditionalRequestMiddleware:
+    """Send If-None-Match / If-Modified-Since for pages seen in the previous scan"""
+
+    def process_request(self, request, spider):
+        store = getattr(spider, 'previous_pages', None)
+        if store is None or request.method != 'GET' or 'link_check' in request.meta or request.meta.get('unconditional'):
+            return None
+
+        etag, last_modified = store.validators(request.url)
+        if etag:
+            request.headers.setdefault('If-None-Match', etag)
+        if last_modified:
+            request.headers.setdefault('If-Modified-Since', last_modified)
+        return None
+
+
+class LinkCheckDepthMiddleware(DepthMiddleware):
+    """DepthMiddleware that leaves link validation requests alone
+
+    A HEAD check (or its GET fallback) is not a step deeper into the site,
+    so it must not be dropped at DEPTH_LIMIT: links on the deepest pages
+    would go unchecked, and stay pending in the checkpoint forever.
+    """
+
+    def _filter(self, request, response, spider):
+        if isinstance(request, Request) and 'link_check' in request.meta:
+            return True
+        return super()._filter(request, response, spider)
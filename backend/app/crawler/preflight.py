@@ -0,0 +1,257 @@
+"""
+SEO Sentinel Crawl Pre-flight
+Fast async checks (DNS, redirects, robots.txt, sitemaps, size) that decide whether and how to crawl
+"""
+
+import asyncio
+import re
+import socket
+import time
+from urllib.parse import urljoin, urlsplit
+
+import httpx
+from protego import Protego
+
+from app.core.config import config
+from app.crawler.frontier import iter_sitemap
+
+HREF_RE = re.compile(rb'''href\s*=\s*["']([^"'#\s>]+)''', re.IGNORECASE)
+
+# Reasons a crawl is not worth starting
+DNS_FAILED = 'dns_failed'
+UNREACHABLE = 'unreachable'
+OFFSITE_REDIRECT = 'offsite_redirect'
+HTTP_ERROR = 'http_error'
+NOT_HTML = 'not_html'
+ROBOTS_DISALLOWED = 'robots_disallowed'
+
+
+def split_target(target):
+    """(scheme or None, host, port or None) for 'example.com', 'https://www.example.com/shop', ..."""
+    target = target.strip()
+    if '://' not in target:
+        target = f'//{target}'
+    parts = urlsplit(target)
+    try:
+        port = parts.port
+    except ValueError:
+        port = None
+    return parts.scheme or None, (parts.hostname or '').rstrip('.').lower(), port
+
+
+def bare_host(host):
+    return host[4:] if host.startswith('www.') else host
+
+
+def same_site(host, other):
+    """www.example.com and example.com are the same site; anything else is not"""
+    return bare_host(host) == bare_host(other)
+
+
+class Preflight:
+    """Probe a site before committing a crawl worker to it
+
+    `run()` resolves the host, follows homepage redirects to the canonical
+    scheme and host (www vs apex, http -> https), reads robots.txt for our
+    user agent, counts sitemap URLs (capped, extrapolated for big sitemap
+    indexes) and returns a plain dict: 'ok' and 'reason' decide whether to
+    crawl, `crawl_kwargs()` turns it into spider arguments.
+    """
+
+    def __init__(self, client=None, settings=None):
+        self.settings = {**config.PREFLIGHT, **(settings or {})}
+        self.user_agent = config.CRAWLER['user_agent']
+        self._client = client
+
+    def _new_client(self):
+        return httpx.AsyncClient(
+            headers={'User-Agent': self.user_agent},
+            timeout=self.settings['timeout'],
+            follow_redirects=True,
+            max_redirects=self.settings['max_redirects'],
+        )
+
+    async def run(self, target):
+        started = time.perf_counter()
+        scheme, host, port = split_target(target)
+        result = {
+            'target': target, 'ok': False, 'reason': None, 'host': host,
+            'addresses': [], 'start_url': None, 'canonical_host': None,
+            'redirects': [], 'status': None, 'robots': None, 'sitemaps': None,
+            'homepage_links': 0, 'estimated_pages': 0,
+        }
+        client = self._client or self._new_client()
+        try:
+            await asyncio.wait_for(self._probe(client, scheme, host, port, result), self.settings['total_timeout'])
+        except asyncio.TimeoutError:
+            result['reason'] = result['reason'] or UNREACHABLE
+        finally:
+            if self._client is None:
+                await client.aclose()
+        result['ok'] = result['reason'] is None
+        result['elapsed'] = round(time.perf_counter() - started, 3)
+        return result
+
+    async def _probe(self, client, scheme, host, port, result):
+        try:
+            infos = await asyncio.get_running_loop().getaddrinfo(host, None, type=socket.SOCK_STREAM)
+        except (socket.gaierror, UnicodeError):
+            result['reason'] = DNS_FAILED
+            return
+        result['addresses'] = sorted({info[4][0] for info in infos})
+
+        response, body = await self._homepage(client, scheme, host, port)
+        if response is None:
+            result['reason'] = UNREACHABLE
+            return
+
+        final = response.url
+        result['redirects'] = [str(r.url) for r in response.history]
+        result['status'] = response.status_code
+        result['canonical_host'] = final.host
+        result['start_url'] = f'{final.scheme}://{final.host}' + (f':{final.port}' if final.port else '') + '/'
+        if not same_site(final.host, host):
+            result['reason'] = OFFSITE_REDIRECT
+            return
+        if response.status_code >= 400:
+            result['reason'] = HTTP_ERROR
+            return
+        if 'html' not in response.headers.get('content-type', 'text/html'):
+            result['reason'] = NOT_HTML
+            return
+
+        links = set()
+        for href in HREF_RE.findall(body):
+            url = urljoin(str(final), href.decode('utf-8', 'ignore'))
+            parts = urlsplit(url)
+            if parts.scheme in ('http', 'https') and same_site(parts.hostname or '', final.host):
+                links.add(url.split('#')[0])
+        result['homepage_links'] = len(links)
+
+        origin = result['start_url'].rstrip('/')
+        result['robots'] = robots = await self._robots(client, origin)
+        if config.CRAWLER['obey_robots_txt'] and not robots['allowed']:
+            result['reason'] = ROBOTS_DISALLOWED
+            return
+
+        result['sitemaps'] = sitemaps = await self._sitemaps(client, robots['sitemaps'] or [f'{origin}/sitemap.xml'], final.host)
+        result['estimated_pages'] = max(sitemaps['estimated_urls'], result['homepage_links'] + 1)
+
+    async def _fetch(self, client, url, limit):
+        """GET with a body size cap; returns (response, body) or (None, b'')"""
+        try:
+            async with client.stream('GET', url) as response:
+                body = bytearray()
+                async for chunk in response.aiter_bytes():
+                    body.extend(chunk)
+                    if len(body) >= limit:
+                        break
+                return response, bytes(body)
+        except (httpx.HTTPError, httpx.InvalidURL, UnicodeError):
+            return None, b''
+
+    async def _homepage(self, client, scheme, host, port):
+        """Try the given scheme, else https then http; the first answer wins"""
+        netloc = f'{host}:{port}' if port else host
+        for candidate in ([scheme] if scheme else ['https', 'http']):
+            response, body = await self._fetch(client, f'{candidate}://{netloc}/', self.settings['max_page_bytes'])
+            if response is not None:
+                return response, body
+        return None, b''
+
+    async def _robots(self, client, origin):
+        robots = {'status': None, 'allowed': True, 'crawl_delay': None, 'sitemaps': []}
+        response, body = await self._fetch(client, f'{origin}/robots.txt', self.settings['max_page_bytes'])
+        if response is None:
+            return robots
+        robots['status'] = response.status_code
+        if response.status_code != 200:
+            return robots  # Missing or broken robots.txt: crawl as the spider would
+        try:
+            parser = Protego.parse(body.decode('utf-8', 'ignore'))
+        except (AttributeError, ValueError):
+            return robots
+        robots['allowed'] = parser.can_fetch(f'{origin}/', self.user_agent)
+        robots['crawl_delay'] = parser.crawl_delay(self.user_agent)
+        robots['sitemaps'] = list(parser.sitemaps)
+        return robots
+
+    async def _sitemaps(self, client, roots, host):
+        """Count sitemap URLs breadth-first within max_sitemaps files
+
+        When a sitemap index lists more files than the cap allows, the URL
+        count is extrapolated from the average of the files that were read.
+        """
+        summary = {'files': 0, 'urls': 0, 'estimated_urls': 0, 'truncated': False, 'found': []}
+        pending, seen = list(roots), set()
+        url_files = 0  # files that listed pages rather than child sitemaps
+        while pending and summary['files'] < self.settings['max_sitemaps']:
+            batch = [url for url in pending[:self.settings['max_sitemaps'] - summary['files']] if url not in seen]
+            pending = pending[len(batch):]
+            seen.update(batch)
+            fetched = await asyncio.gather(*(self._fetch(client, url, self.settings['max_sitemap_bytes']) for url in batch))
+            for url, (response, body) in zip(batch, fetched):
+                if response is None or response.status_code != 200:
+                    continue
+                summary['files'] += 1
+                summary['found'].append(url)
+                summary['truncated'] |= len(body) >= self.settings['max_sitemap_bytes']
+                listed_pages = False
+                for kind, loc, _, _ in iter_sitemap(body):
+                    if kind == 'sitemap':
+                        pending.append(loc)
+                    else:
+                        listed_pages = True
+                        summary['urls'] += same_site(urlsplit(loc).hostname or '', host)
+                url_files += listed_pages
+        unread_children = len([url for url in pending if url not in seen])
+
+        estimated = summary['urls']
+        if unread_children and url_files:
+            estimated += round(summary['urls'] / url_files * unread_children)
+            summary['truncated'] = True
+        summary['estimated_urls'] = estimated
+        return summary
+
+
+def crawl_kwargs(result):
+    """Spider arguments for a passed pre-flight: canonical start URL, skip absent sitemaps
+
+    'estimated_pages' is only passed on when sitemaps were read: counted
+    from the homepage alone it is a lower bound, not a size. ScanCrawler
+    consumes it; it never reaches the spider.
+    """
+    kwargs = {'start_url': result['start_url']}
+    if result['sitemaps'] is not None and not result['sitemaps']['files']:
+        kwargs['use_sitemaps'] = False
+    if result['sitemaps'] and result['sitemaps']['files']:
+        kwargs['estimated_pages'] = result['estimated_pages']
+    return kwargs
+
+
+def expected_pages(max_pages, estimated_pages=None):
+    """Pages a crawl is expected to reach: its budget (inf when unlimited), capped by the estimate"""
+    budget = max_pages or float('inf')
+    return budget if estimated_pages is None else min(budget, estimated_pages)
+
+
+def run_preflight(target, **settings):
+    """Blocking wrapper for scripts and sync workers"""
+    return asyncio.run(Preflight(settings=settings).run(target))
+
+
+async def preflight_many(targets, concurrency=20, **settings):
+    """Pre-flight many sites at once over one connection pool"""
+    semaphore = asyncio.Semaphore(concurrency)
+    async with httpx.AsyncClient(
+        headers={'User-Agent': config.CRAWLER['user_agent']},
+        timeout=config.PREFLIGHT['timeout'], follow_redirects=True,
+        max_redirects=config.PREFLIGHT['max_redirects'],
+    ) as client:
+        probe = Preflight(client=client, settings=settings)
+
+        async def one(target):
+            async with semaphore:
+                return await probe.run(target)
+
+        return await asyncio.gather(*(one(target) for target in targets))
@@ -0,0 +1,176 @@
+"""
+SEO Sentinel Crawl Runner
+Runs SEOSentinelSpider crawls in-process on one long-lived Twisted reactor
+"""
+
+import subprocess
+import sys
+import threading
+import time
+from concurrent.futures import Future
+
+from scrapy import signals
+from scrapy.crawler import Crawler, CrawlerRunner
+
+from app.crawler.seo_spider import SEOSentinelSpider
+
+
+# Command used to estimate what a `scrapy runspider` subprocess pays before crawling
+SUBPROCESS_BASELINE_CMD = [
+    sys.executable, '-c',
+    'import scrapy.crawler, scrapy.spiders; from twisted.internet import reactor'
+]
+
+
+class CrawlRunner:
+    """Run many SEOSentinelSpider crawls inside one worker process
+
+    Twisted's reactor can only be started once per process, so the runner
+    owns a single reactor thread and schedules every crawl onto it. Crawls
+    can be run one after another with `crawl()` or concurrently with
+    `crawl_many()` / `submit()`; results come back as Python dicts.
+    """
+
+    def __init__(self, settings=None):
+        self.settings = settings or {}
+        self._runner = None
+        self._thread = None
+        self._lock = threading.Lock()
+
+        # Overhead accounting
+        self.timings = {
+            'crawls': 0,
+            'setup_seconds': 0.0,
+            'crawl_seconds': 0.0,
+        }
+        self._subprocess_baseline = None
+
+    def start(self):
+        """Start the reactor thread (idempotent)"""
+        with self._lock:
+            if self._thread is not None:
+                return
+
+            from twisted.internet import reactor
+
+            self._runner = CrawlerRunner(self.settings)
+            self._thread = threading.Thread(
+                target=reactor.run,
+                kwargs={'installSignalHandlers': False},
+                name='crawl-reactor',
+                daemon=True
+            )
+            self._thread.start()
+
+    def stop(self, timeout=30):
+        """Stop running crawls and the reactor; the runner cannot be restarted"""
+        if self._thread is None:
+            return
+
+        from twisted.internet import reactor
+
+        def _shutdown():
+            d = self._runner.stop()
+            d.addBoth(lambda _: reactor.stop())
+
+        reactor.callFromThread(_shutdown)
+        self._thread.join(timeout)
+
+    def submit(self, domain, max_pages=500, **spider_kwargs):
+        """Schedule a crawl and return a Future resolving to the results dict"""
+        self.start()
+
+        from twisted.internet import reactor
+
+        future = Future()
+        submitted_at = time.perf_counter()
+        reactor.callFromThread(
+            self._schedule, future, submitted_at, domain, max_pages, spider_kwargs
+        )
+        return future
+
+    def crawl(self, domain, max_pages=500, timeout=None, **spider_kwargs):
+        """Run a single crawl and block until it finishes"""
+        return self.submit(domain, max_pages, **spider_kwargs).result(timeout)
+
+    def crawl_many(self, domains, max_pages=500, timeout=None, **spider_kwargs):
+        """Run several crawls concurrently and return their results in order"""
+        futures = [self.submit(domain, max_pages, **spider_kwargs) for domain in domains]
+        return [future.result(timeout) for future in futures]
+
+    def _schedule(self, future, submitted_at, domain, max_pages, spider_kwargs):
+        """Create and start a crawler (runs on the reactor thread)"""
+        if not future.set_running_or_notify_cancel():
+            return
+
+        crawler = Crawler(SEOSentinelSpider, self._runner.settings)
+        timing = {}
+
+        def _opened(spider):
+            timing['opened_at'] = time.perf_counter()
+
+        crawler.signals.connect(_opened, signal=signals.spider_opened)
+
+        spider_kwargs.setdefault('save_json', False)
+        d = self._runner.crawl(crawler, domain=domain, max_pages=max_pages, **spider_kwargs)
+
+        def _done(_):
+            finished_at = time.perf_counter()
+            opened_at = timing.get('opened_at', finished_at)
+            self._record(opened_at - submitted_at, finished_at - opened_at)
+            future.set_result(crawler.spider.results)
+
+        def _failed(failure):
+            future.set_exception(failure.value)
+
+        d.addCallbacks(_done, _failed)
+
+    def _record(self, setup_seconds, crawl_seconds):
+        with self._lock:
+            self.timings['crawls'] += 1
+            self.timings['setup_seconds'] += setup_seconds
+            self.timings['crawl_seconds'] += crawl_seconds
+
+    def measure_subprocess_overhead(self, runs=3):
+        """Time interpreter startup + Scrapy/Twisted import in a fresh process"""
+        samples = []
+        for _ in range(runs):
+            started = time.perf_counter()
+            subprocess.run(SUBPROCESS_BASELINE_CMD, check=True, capture_output=True)
+            samples.append(time.perf_counter() - started)
+
+        self._subprocess_baseline = min(samples)
+        return self._subprocess_baseline
+
+    def overhead_report(self):
+        """Compare per-crawl setup cost against the `scrapy runspider` path"""
+        if self._subprocess_baseline is None:
+            self.measure_subprocess_overhead()
+
+        with self._lock:
+            crawls = self.timings['crawls']
+            setup = self.timings['setup_seconds']
+            crawl = self.timings['crawl_seconds']
+
+        avg_setup = setup / crawls if crawls else 0.0
+        saved = max(self._subprocess_baseline - avg_setup, 0.0)
+
+        return {
+            'crawls': crawls,
+            'avg_inprocess_setup_seconds': round(avg_setup, 4),
+            'avg_crawl_seconds': round(crawl / crawls, 4) if crawls else 0.0,
+            'subprocess_startup_seconds': round(self._subprocess_baseline, 4),
+            'saved_seconds_per_crawl': round(saved, 4),
+            'saved_seconds_total': round(saved * crawls, 2),
+        }
+
+
+_default_runner = None
+
+
+def get_crawl_runner(settings=None):
+    """Return the process-wide runner (one reactor per process)"""
+    global _default_runner
+    if _default_runner is None:
+        _default_runner = CrawlRunner(settings)
+    return _default_runner
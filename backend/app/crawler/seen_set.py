@@ -0,0 +1,200 @@
+"""
+SEO Sentinel Seen Set
+Memory-compact set of 64-bit URL fingerprints for very large crawls
+"""
+
+import hashlib
+import mmap
+import os
+import shutil
+import struct
+
+
+MAGIC = b'SEOFPS01'
+HEADER = struct.Struct('<8sQQ')  # magic, count, capacity
+EMPTY = 0
+
+
+def fingerprint64(text):
+    """64-bit fingerprint of a string (0 is reserved for empty slots)"""
+    value = int.from_bytes(hashlib.blake2b(text.encode('utf-8'), digest_size=8).digest(), 'big')
+    return value or 1
+
+
+class FingerprintSet:
+    """Open-addressing hash set of 64-bit integers in one packed table
+
+    Each slot is 8 bytes, so the set costs 8 / load-factor bytes per URL
+    (roughly 11-23 bytes) instead of the ~100+ bytes of a Python set of
+    hex strings. With `path`, the table lives in an mmap'd file and the OS
+    can page it out; the file can be reopened to restore the set.
+    """
+
+    def __init__(self, capacity=1024, max_load=0.7, path=None):
+        self.max_load = max_load
+        self.path = str(path) if path else None
+        self._count = 0
+        self._file = None
+        self._buf = None
+        self._table = None
+
+        if self.path and os.path.exists(self.path) and os.path.getsize(self.path) > HEADER.size:
+            self._open_existing()
+        else:
+            self._allocate(self._round_capacity(capacity))
+
+    @classmethod
+    def load(cls, source, path=None):
+        """Restore a set saved with save(); with `path`, work on an mmap'd copy
+
+        The source file is never modified, so a checkpoint stays valid
+        while the restored set keeps growing.
+        """
+        if path:
+            shutil.copyfile(source, path)
+            return cls(path=path)
+
+        fingerprints = cls()
+        fingerprints._release()
+        with open(source, 'rb') as f:
+            fingerprints._attach(bytearray(f.read()), source)
+        return fingerprints
+
+    @staticmethod
+    def _round_capacity(capacity):
+        size = 1024
+        while size < capacity:
+            size <<= 1
+        return size
+
+    # -- storage ---------------------------------------------------------
+
+    def _new_buffer(self, capacity, path):
+        nbytes = HEADER.size + capacity * 8
+        if path is None:
+            return None, bytearray(nbytes)
+
+        f = open(path, 'w+b')
+        f.truncate(nbytes)
+        return f, mmap.mmap(f.fileno(), nbytes)
+
+    def _allocate(self, capacity):
+        self._file, self._buf = self._new_buffer(capacity, self.path)
+        self._capacity = capacity
+        self._mask = capacity - 1
+        self._table = memoryview(self._buf)[HEADER.size:].cast('Q')
+        self._write_header()
+
+    def _open_existing(self):
+        self._file = open(self.path, 'r+b')
+        self._attach(mmap.mmap(self._file.fileno(), 0), self.path)
+
+    def _attach(self, buf, source):
+        self._buf = buf
+        magic, count, capacity = HEADER.unpack_from(buf, 0)
+        if magic != MAGIC:
+            raise ValueError(f'Not a fingerprint set file: {source}')
+        self._count = count
+        self._capacity = capacity
+        self._mask = capacity - 1
+        self._table = memoryview(self._buf)[HEADER.size:].cast('Q')
+
+    def _write_header(self):
+        HEADER.pack_into(self._buf, 0, MAGIC, self._count, self._capacity)
+
+    def _release(self):
+        self._table.release()
+        self._table = None
+        if self._file is not None:
+            self._buf.close()
+            self._file.close()
+
+    def _grow(self):
+        old_table = self._table
+        old_capacity = self._capacity
+        new_capacity = old_capacity * 2
+
+        tmp_path = f'{self.path}.grow' if self.path else None
+        new_file, new_buf = self._new_buffer(new_capacity, tmp_path)
+        new_table = memoryview(new_buf)[HEADER.size:].cast('Q')
+        mask = new_capacity - 1
+
+        for i in range(old_capacity):
+            value = old_table[i]
+            if value != EMPTY:
+                slot = value & mask
+                while new_table[slot] != EMPTY:
+                    slot = (slot + 1) & mask
+                new_table[slot] = value
+
+        self._release()
+        self._file, self._buf, self._table = new_file, new_buf, new_table
+        self._capacity = new_capacity
+        self._mask = mask
+        if tmp_path:
+            os.replace(tmp_path, self.path)
+        self._write_header()
+
+    # -- set API ---------------------------------------------------------
+
+    def add(self, value):
+        """Add a fingerprint; returns True if it was not already present"""
+        value = value or 1
+        table = self._table
+        mask = self._mask
+        slot = value & mask
+        while True:
+            current = table[slot]
+            if current == EMPTY:
+                break
+            if current == value:
+                return False
+            slot = (slot + 1) & mask
+
+        table[slot] = value
+        self._count += 1
+        if self._count > self._capacity * self.max_load:
+            self._grow()
+        return True
+
+    def __contains__(self, value):
+        value = value or 1
+        table = self._table
+        mask = self._mask
+        slot = value & mask
+        while True:
+            current = table[slot]
+            if current == value:
+                return True
+            if current == EMPTY:
+                return False
+            slot = (slot + 1) & mask
+
+    def __len__(self):
+        return self._count
+
+    @property
+    def nbytes(self):
+        return HEADER.size + self._capacity * 8
+
+    def flush(self):
+        """Persist the count and, for file-backed sets, the table"""
+        self._write_header()
+        if self._file is not None:
+            self._buf.flush()
+
+    def save(self, path):
+        """Write a copy of the set to `path` (used by checkpoints)"""
+        self._write_header()
+        tmp_path = f'{path}.tmp'
+        with open(tmp_path, 'wb') as f:
+            f.write(self._buf)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, path)
+
+    def close(self):
+        if self._table is None:
+            return
+        self.flush()
+        self._release()
@@ -4,27 +4,70 @@ Detects broken links and missing alt-text for e-commerce sites
 """
 
 import scrapy
+from protego import Protego
+from scrapy import signals
+from scrapy.link import Link
 from scrapy.spiders import CrawlSpider, Rule
 from scrapy.linkextractors import LinkExtractor
 from urllib.parse import urljoin, urlparse
 import json
 from datetime import datetime
+from twisted.internet import task
+
+from app.core.config import config
+from app.crawler.checkpoint import CrawlCheckpoint
+from app.crawler.checks import CheckSuite, resolve_check_names
+from app.crawler.frontier import TopK, iter_sitemap, normalize_url, url_fingerprint, url_priority
+from app.crawler.html_analyzer import analyze_response
+from app.crawler.incremental import PageSnapshotStore, PageSnapshotWriter, content_hash
+from app.crawler.link_validator import LinkValidator, get_status_cache
+from app.crawler.seen_set import FingerprintSet
+from app.crawler.sinks import MemorySink, NDJSONFileSink, create_sink, issue_group
+
+
+# File types the crawler never follows
+DENY_EXTENSIONS = ['pdf', 'zip', 'exe', 'dmg', 'mp4', 'avi']
 
 
 class SEOSentinelSpider(CrawlSpider):
     name = 'seo_sentinel'
     
     custom_settings = {
-        'DOWNLOAD_DELAY': 0.5,  # Be polite to the server
-        'CONCURRENT_REQUESTS': 16,
-        'CONCURRENT_REQUESTS_PER_DOMAIN': 8,
-        'ROBOTSTXT_OBEY': True,
-        'USER_AGENT': 'SEO-Sentinel-Bot/1.0 (+https://seositinel.com/bot)',
-        'DEPTH_LIMIT': 3,  # Don't go too deep on first scan
-        'CLOSESPIDER_PAGECOUNT': 500,  # Max pages per scan
+        'DOWNLOAD_DELAY': config.CRAWLER['download_delay'],  # Be polite to the server
+        'CONCURRENT_REQUESTS': config.CRAWLER['concurrent_requests'],
+        'CONCURRENT_REQUESTS_PER_DOMAIN': config.CRAWLER['concurrent_requests_per_domain'],
+        'ROBOTSTXT_OBEY': config.CRAWLER['obey_robots_txt'],
+        'USER_AGENT': config.CRAWLER['user_agent'],
+        'DEPTH_LIMIT': config.CRAWLER['depth_limit'],  # Don't go too deep on first scan
+        'DOWNLOAD_TIMEOUT': config.CRAWLER['timeout'],
+        # Ends one run of the crawl (close reason closespider_timeout); it resumes from the checkpoint
+        'CLOSESPIDER_TIMEOUT': config.CRAWLER['max_crawl_seconds'],
+        # Adaptive per-host throttling starts from the values above
+        'ADAPTIVE_THROTTLE_ENABLED': config.CRAWLER['adaptive_throttle'],
+        'ADAPTIVE_THROTTLE_TARGET_LATENCY': config.CRAWLER['target_latency'],
+        'ADAPTIVE_THROTTLE_MAX_CONCURRENCY': config.CRAWLER['max_concurrency_per_domain'],
+        'ADAPTIVE_THROTTLE_MIN_DELAY': config.CRAWLER['min_download_delay'],
+        'ADAPTIVE_THROTTLE_MAX_DELAY': config.CRAWLER['max_download_delay'],
+        'REQUEST_FINGERPRINTER_IMPLEMENTATION': '2.7',
+        'DUPEFILTER_CLASS': 'app.crawler.frontier.FrontierDupeFilter',
+        # Page budget (max_pages) is enforced by the spider itself so that
+        # link validation responses don't count as crawled pages
+        'DOWNLOADER_MIDDLEWARES': {
+            'app.crawler.middlewares.PageBudgetMiddleware': 50,
+            'app.crawler.middlewares.ConditionalRequestMiddleware': 60,
+            'app.crawler.throttle.AdaptiveThrottleMiddleware': 950,
+        },
+        'SPIDER_MIDDLEWARES': {
+            'scrapy.spidermiddlewares.depth.DepthMiddleware': None,
+            'app.crawler.middlewares.LinkCheckDepthMiddleware': 900,
+        },
     }
     
-    def __init__(self, domain='', max_pages=500, *args, **kwargs):
+    def __init__(self, domain='', max_pages=500, save_json=True, sink=None,
+                 checks=None, validate_links=None, link_cache_file=None,
+                 previous_snapshots=None, snapshots_out=None, use_sitemaps=None,
+                 seen_set_path=None, checkpoint_dir=None, checkpoint_interval=None,
+                 start_url=None, *args, **kwargs):
         super(SEOSentinelSpider, self).__init__(*args, **kwargs)
         
         # Clean domain input
@@ -32,8 +75,33 @@ class SEOSentinelSpider(CrawlSpider):
         
         self.allowed_domains = [domain]
         self.start_urls = [f'https://{domain}']
+        if start_url:
+            # Canonical URL from the pre-flight probe: its scheme and host (www or apex) win
+            host = urlparse(start_url).hostname
+            domain = host[4:] if host.startswith('www.') else host
+            self.allowed_domains = [domain]
+            self.start_urls = [start_url]
         self.domain = domain
-        self.max_pages = int(max_pages)
+        # 'unlimited' (Enterprise) / 0 means no page budget
+        self.max_pages = float('inf') if max_pages in (None, 'unlimited', 0, '0') else int(max_pages)
+        self.save_json = save_json not in (False, 'false', 'False', '0', 0)
+        self.results = None
+        self.page_budget_exhausted = False
+        
+        # Sitemap seeding and coverage tracking
+        if use_sitemaps is None:
+            use_sitemaps = config.CRAWLER['use_sitemaps']
+        self.use_sitemaps = use_sitemaps not in (False, 'false', 'False', '0', 0)
+        self.sitemap_urls = FingerprintSet()  # fingerprints of URLs listed in sitemaps
+        self.sitemaps_requested = set()  # sitemap URLs fetched by this run
+        self.seen_set_path = seen_set_path  # mmap file for the URL-seen set on huge crawls
+        
+        # Checkpointing: an existing checkpoint in checkpoint_dir means resume
+        self.checkpoint = CrawlCheckpoint(checkpoint_dir) if checkpoint_dir else None
+        self.checkpoint_interval = float(checkpoint_interval or config.CRAWLER['checkpoint_interval'])
+        self.resume_state = self.checkpoint.load() if self.checkpoint else None
+        self.frontier = {}  # fingerprint -> [url, priority, depth] of page requests not yet parsed
+        self._checkpoint_loop = None
         
         # Statistics
         self.stats = {
@@ -43,111 +111,510 @@ class SEOSentinelSpider(CrawlSpider):
             'start_time': datetime.now().isoformat()
         }
         
-        # Store issues
-        self.issues = {
-            'broken_links': [],
-            'missing_alt_text': [],
-            'meta_issues': []
-        }
+        # SEO checks enabled for this scan (explicit list, or all)
+        self.check_suite = CheckSuite(resolve_check_names(checks))
+        
+        # Image/outbound link validation feeds the broken-links check
+        if validate_links is None:
+            validate_links = config.CRAWLER['validate_links']
+        self.link_validator = None
+        self.link_cache_file = link_cache_file
+        if validate_links not in (False, 'false', 'False', '0', 0) and 'broken_links' in self.check_suite.timings:
+            cache = get_status_cache(domain)
+            if link_cache_file:
+                cache.load(link_cache_file)
+            self.link_validator = LinkValidator(domain, cache)
+            self.check_suite.fields.update(('images', 'links'))
+        
+        # Incremental mode: conditional requests against the previous scan's
+        # page snapshots, and snapshots of this scan for the next one
+        self.previous_pages = None
+        if previous_snapshots:
+            self.previous_pages = PageSnapshotStore(previous_snapshots, checks=self.check_suite.names)
+        self.page_snapshots = None
+        if snapshots_out:
+            resumed = (self.resume_state or {}).get('page_snapshots') or {}
+            self.page_snapshots = PageSnapshotWriter(snapshots_out, resumed.get('offset'), resumed.get('count', 0))
+        if self.previous_pages is not None:
+            self.stats['incremental'] = {'not_modified': 0, 'unchanged': 0, 'changed': 0, 'refetched': 0,
+                                         'other_checks': self.previous_pages.other_checks}
+        if self.page_snapshots is not None:
+            self.check_suite.fields.add('links')
+        
+        # Issues stream to a sink as they are found; without an explicit
+        # sink, CLI runs append to NDJSON and in-process runs keep them in memory
+        resuming = self.resume_state is not None
+        if sink is not None:
+            self.sink = create_sink(sink, append=resuming)
+        elif self.save_json:
+            self.sink = NDJSONFileSink(f'seo_report_{domain.replace(".", "_")}.ndjson', append=resuming)
+        else:
+            self.sink = MemorySink()
+        
+        if self.resume_state is not None:
+            self._restore_checkpoint(self.resume_state)
+
+    @classmethod
+    def from_crawler(cls, crawler, *args, **kwargs):
+        """Point the dupefilter at its on-disk / checkpointed seen set before settings freeze"""
+        spider = super(SEOSentinelSpider, cls).from_crawler(crawler, *args, **kwargs)
+        if spider.seen_set_path:
+            crawler.settings.set('SEEN_SET_PATH', spider.seen_set_path, priority='spider')
+        if spider.resume_state and 'seen' in spider.resume_state['files']:
+            crawler.settings.set('SEEN_SET_CHECKPOINT', spider.resume_state['files']['seen'], priority='spider')
+        if spider.checkpoint is not None:
+            crawler.signals.connect(spider.track_request, signal=signals.request_scheduled)
+            crawler.signals.connect(spider.start_checkpoints, signal=signals.spider_opened)
+        return spider
+
+    def _restore_checkpoint(self, state):
+        """Continue stats, sinks and seen sets from the last checkpoint"""
+        self.stats = state['stats']
+        self.stats['resumes'] = self.stats.get('resumes', 0) + 1
+        self.page_budget_exhausted = self.stats['pages_crawled'] >= self.max_pages
+        self.sink.restore(state['sink'])
+        
+        files = state['files']
+        if 'sitemap_urls' in files:
+            self.sitemap_urls = FingerprintSet.load(files['sitemap_urls'])
+        
+        # Everything still pending at the checkpoint is pending again
+        for url, priority, depth in state['frontier']:
+            self.frontier[url_fingerprint(url)] = [url, priority, depth]
+        
+        self.resumed_link_checks = []
+        if self.link_validator and 'links_seen' in files:
+            self.resumed_link_checks = self.link_validator.resume(
+                FingerprintSet.load(files['links_seen']),
+                state.get('link_checks', {}),
+                self.parse_link_status,
+                self.link_status_failed
+            )
+        
+        self.logger.info(f'♻️  Resuming crawl from checkpoint: {self.stats["pages_crawled"]} pages done, {len(self.frontier)} queued')
 
     rules = (
         Rule(
             LinkExtractor(
                 allow_domains=None,  # Will be set dynamically
-                deny_extensions=['pdf', 'zip', 'exe', 'dmg', 'mp4', 'avi']
+                deny_extensions=DENY_EXTENSIONS
             ),
             callback='parse_item',
-            follow=True
+            errback='page_failed',
+            follow=True,
+            process_request='prepare_page_request'
         ),
     )
 
-    handle_httpstatus_list = [404, 403, 500, 502, 503, 504]
+    handle_httpstatus_list = [304, 404, 403, 500, 502, 503, 504]
 
-    def parse_item(self, response):
-        self.stats['pages_crawled'] += 1
+    def parse_start_url(self, response, **kwargs):
+        """The start page gets the same checks as every other page"""
+        return self.parse_item(response)
+
+    def start_requests(self):
+        """Homepage first, then robots.txt for sitemap discovery
         
-        # 1. CHECK FOR BROKEN LINKS
-        if response.status >= 400:
-            self.stats['broken_links'] += 1
-            referer = response.request.headers.get('Referer', b'').decode('utf-8')
-            
-            issue = {
-                'type': 'broken_link',
-                'url': response.url,
-                'status': response.status,
-                'referenced_from': referer or 'Direct',
-                'timestamp': datetime.now().isoformat()
-            }
+        A resumed crawl starts from the checkpointed frontier instead; the
+        sitemaps are re-read (bypassing the restored seen set, which already
+        holds them), and the page URLs already seen are dropped as duplicates.
+        """
+        if self.resume_state is not None:
+            yield from self._resumed_requests()
+        else:
+            for request in super(SEOSentinelSpider, self).start_requests():
+                yield request.replace(errback=self.page_failed)
+        
+        if self.use_sitemaps:
+            base = self.start_urls[0].rstrip('/')
+            yield scrapy.Request(
+                f'{base}/robots.txt',
+                callback=self.parse_robots,
+                errback=self.sitemap_failed,
+                priority=1000,
+                dont_filter=self.resume_state is not None,
+                meta={'dont_obey_robotstxt': True, 'handle_httpstatus_all': True}
+            )
+
+    def _resumed_requests(self):
+        for url, priority, depth in list(self.frontier.values()):
+            request = self._build_request(0, Link(url))
+            # Already in the restored seen set, so bypass the dupefilter
+            yield request.replace(priority=priority, dont_filter=True, meta={**request.meta, 'depth': depth})
+        yield from self.resumed_link_checks
+
+    def parse_robots(self, response):
+        """Queue the sitemaps robots.txt declares, or the conventional /sitemap.xml"""
+        sitemaps = []
+        if response.status == 200:
+            sitemaps = list(Protego.parse(response.text).sitemaps)
+        if not sitemaps:
+            sitemaps = [response.urljoin('/sitemap.xml')]
+        
+        for url in sitemaps:
+            request = self._sitemap_request(url)
+            if request is not None:
+                yield request
+
+    def parse_sitemap(self, response):
+        """Stream a sitemap or sitemap index, seeding the best pages within budget"""
+        if response.status != 200:
+            return
+        
+        # Sitemap entries are seeds: they start at depth 1, not below the sitemap
+        response.meta['depth'] = 0
+        
+        # Unlimited crawls schedule entries as they stream in; budgeted
+        # crawls keep only the best entries that can still be crawled
+        remaining = self.max_pages - self.stats['pages_crawled']
+        best = TopK(remaining) if remaining != float('inf') else None
+        
+        for kind, loc, priority, _ in iter_sitemap(response.body):
+            if kind == 'sitemap':
+                request = self._sitemap_request(loc)
+                if request is not None:
+                    yield request
+                continue
             
-            self.issues['broken_links'].append(issue)
-            yield issue
+            if not self._is_internal_url(loc):
+                continue
+            self.sitemap_urls.add(url_fingerprint(loc))
+            score = url_priority(loc, sitemap_priority=priority)
+            if best is None:
+                yield from self._sitemap_page_request(loc, score, response)
+            else:
+                best.push(score, loc)
+        
+        if best is not None:
+            for score, loc in best.drain():
+                yield from self._sitemap_page_request(loc, score, response)
+
+    def _sitemap_page_request(self, loc, score, response):
+        request = self.prepare_page_request(self._build_request(0, Link(loc)), response)
+        if request is not None:
+            request.priority = score
+            yield request
+
+    def sitemap_failed(self, failure):
+        """Missing robots.txt or sitemaps just mean link discovery only"""
+        self.logger.debug(f'Sitemap fetch failed: {failure.value}')
+
+    def _sitemap_request(self, url):
+        """Request for a sitemap, or None when this run already fetched it
+
+        Resumed crawls bypass the dupefilter for sitemaps, so a sitemap
+        index listing itself (or a sitemap twice) is caught here instead.
+        """
+        if url in self.sitemaps_requested:
+            return None
+        self.sitemaps_requested.add(url)
+        return scrapy.Request(
+            url,
+            callback=self.parse_sitemap,
+            errback=self.sitemap_failed,
+            priority=900,
+            dont_filter=self.resume_state is not None,
+            meta={'handle_httpstatus_all': True}
+        )
+
+    def _is_internal_url(self, url):
+        host = urlparse(url).hostname or ''
+        return host == self.domain or host.endswith('.' + self.domain)
+
+    def prepare_page_request(self, request, response):
+        """Budget check, URL canonicalisation and priority for page requests"""
+        if self.page_budget_exhausted:
+            return None
+        
+        url = normalize_url(request.url)
+        if url != request.url:
+            request = request.replace(url=url)
+        request.priority = url_priority(url, depth=response.meta.get('depth', 0) + 1)
+        return request
+
+    def parse_item(self, response):
+        if response.status == 304 and (self.previous_pages is None or response.url not in self.previous_pages):
+            # Nothing to replay (e.g. validators carried across a redirect): fetch
+            # the page itself, once; an empty 304 body is not a page to check
+            if not response.meta.get('unconditional'):
+                yield self._unconditional(response.request)
             return
+        
+        self.frontier.pop(url_fingerprint(response.url), None)
+        if self.stats['pages_crawled'] >= self.max_pages:
+            self.page_budget_exhausted = True
+            return
+        
+        self.stats['pages_crawled'] += 1
+        if self.stats['pages_crawled'] >= self.max_pages:
+            self.page_budget_exhausted = True
+        if self.sitemap_urls and url_fingerprint(response.url) in self.sitemap_urls:
+            self.stats['sitemap_pages_crawled'] = self.stats.get('sitemap_pages_crawled', 0) + 1
+        
+        # Incremental scans reuse the previous results for unchanged pages
+        if self.previous_pages is not None:
+            reused = yield from self._reuse_snapshot(response)
+            if reused:
+                return
+        
+        # Walk the document once, collecting only what the enabled checks read
+        page = analyze_response(response, self.check_suite.fields)
+        
+        issues = [self._record_issue(issue) for issue in self.check_suite.run(page)]
+        yield from issues
+        
+        # Validate images and outbound links (cached URLs resolve immediately)
+        assets = []
+        if self.link_validator and page.status < 400:
+            assets = list(self.link_validator.targets(page))
+            yield from self._validate_links(page.url, assets)
+        
+        if self.page_snapshots is not None and page.status < 300:
+            self._write_snapshot(response, content_hash(response.body), issues, self._internal_links(page), assets)
 
-        # 2. CHECK FOR MISSING ALT TEXT
-        images = response.css('img')
-        for img in images:
-            alt = img.xpath('@alt').get()
-            src = img.xpath('@src').get()
-            
-            if not src:
+    def _validate_links(self, page_url, assets):
+        for result in self.link_validator.process_targets(page_url, assets, self.parse_link_status, self.link_status_failed):
+            yield result if isinstance(result, scrapy.Request) else self._record_issue(result)
+
+    def _unconditional(self, request):
+        """The request again without If-None-Match / If-Modified-Since"""
+        headers = request.headers.copy()
+        headers.pop('If-None-Match', None)
+        headers.pop('If-Modified-Since', None)
+        if self.previous_pages is not None:
+            self.stats['incremental']['refetched'] += 1
+        return request.replace(headers=headers, dont_filter=True, meta={**request.meta, 'unconditional': True})
+    
+    def _reuse_snapshot(self, response):
+        """Replay the previous scan's results for a 304 or byte-identical page
+
+        Generator that yields issues/requests and returns True when the
+        page was handled from the snapshot.
+        """
+        if response.status == 304:
+            snapshot = self.previous_pages.get(response.url)
+            body_hash = snapshot and snapshot['content_hash']
+            outcome = 'not_modified'
+        elif response.status < 300 and response.url in self.previous_pages:
+            snapshot = self.previous_pages.get(response.url)
+            body_hash = content_hash(response.body)
+            if snapshot['content_hash'] != body_hash:
+                self.stats['incremental']['changed'] += 1
+                return False
+            outcome = 'unchanged'
+        else:
+            return False
+        
+        self.stats['incremental'][outcome] += 1
+        
+        # Recorded eagerly so a checkpoint never sees half a page
+        yield from [self._record_issue(issue) for issue in snapshot['issues']]
+        
+        assets = [tuple(asset) for asset in snapshot['assets']]
+        if self.link_validator:
+            yield from self._validate_links(response.url, assets)
+        
+        # A 304 has no body for the rules to extract links from
+        if response.status == 304:
+            for url in snapshot['links']:
+                request = self.prepare_page_request(self._build_request(0, Link(url)), response)
+                if request is not None:
+                    yield request
+        
+        if self.page_snapshots is not None:
+            self._write_snapshot(response, body_hash, snapshot['issues'], snapshot['links'], assets, snapshot)
+        return True
+
+    def _write_snapshot(self, response, body_hash, issues, links, assets, previous=None):
+        previous = previous or {}
+        etag = response.headers.get('ETag')
+        last_modified = response.headers.get('Last-Modified')
+        self.page_snapshots.write(
+            response.url,
+            etag=etag.decode('latin-1') if etag else previous.get('etag'),
+            last_modified=last_modified.decode('latin-1') if last_modified else previous.get('last_modified'),
+            body_hash=body_hash,
+            issues=issues,
+            links=links,
+            assets=assets,
+            checks=self.check_suite.names,
+        )
+
+    def _internal_links(self, page):
+        """Absolute, de-duplicated same-site links a 304 replay should follow"""
+        links = []
+        seen = set()
+        for href in page.links:
+            url = urljoin(page.url, href).split('#', 1)[0]
+            if url in seen or not url.startswith(('http://', 'https://')):
                 continue
-                
-            # Make absolute URL
-            img_url = urljoin(response.url, src)
+            seen.add(url)
             
-            if alt is None or alt.strip() == "":
-                self.stats['missing_alt_text'] += 1
-                
-                issue = {
-                    'type': 'missing_alt_text',
-                    'page_url': response.url,
-                    'page_title': response.css('title::text').get() or 'No Title',
-                    'img_src': img_url,
-                    'img_filename': src.split('/')[-1] if src else 'unknown'
-                }
-                
-                self.issues['missing_alt_text'].append(issue)
-                yield issue
-
-        # 3. CHECK META TAGS (SEO fundamentals)
-        meta_issues = []
-        
-        # Missing title
-        title = response.css('title::text').get()
-        if not title or len(title.strip()) < 10:
-            meta_issues.append('Missing or too short page title')
-        
-        # Missing meta description
-        meta_desc = response.css('meta[name="description"]::attr(content)').get()
-        if not meta_desc:
-            meta_issues.append('Missing meta description')
-        
-        if meta_issues:
-            issue = {
-                'type': 'meta_issues',
-                'page_url': response.url,
-                'issues': meta_issues
-            }
-            self.issues['meta_issues'].append(issue)
-            yield issue
+            parsed = urlparse(url)
+            host = parsed.hostname or ''
+            if host != self.domain and not host.endswith('.' + self.domain):
+                continue
+            if parsed.path.rsplit('.', 1)[-1].lower() in DENY_EXTENSIONS:
+                continue
+            links.append(url)
+        return links
+
+    def page_failed(self, failure):
+        """Errback for page requests (network errors, budget or robots.txt drops)"""
+        request = getattr(failure, 'request', None)
+        if request is not None:
+            self.frontier.pop(url_fingerprint(request.url), None)
+            self.logger.debug(f'Page request failed: {request.url} ({failure.type.__name__})')
+
+    def parse_link_status(self, response):
+        """Callback for link validation requests"""
+        result = self.link_validator.handle_response(response, self.parse_link_status, self.link_status_failed)
+        if isinstance(result, scrapy.Request):
+            yield result
+        elif result:
+            yield self._record_issue(result)
+
+    def link_status_failed(self, failure):
+        """Errback for link validation requests"""
+        issue = self.link_validator.handle_failure(failure)
+        if issue:
+            yield self._record_issue(issue)
+
+    def _record_issue(self, issue):
+        group = issue_group(issue)
+        self.stats[group] = self.stats.get(group, 0) + 1
+        self.sink.write(issue)
+        return issue
+
+    def _dupefilter(self):
+        scheduler = getattr(getattr(self.crawler.engine, 'slot', None), 'scheduler', None)
+        return getattr(scheduler, 'df', None)
+
+    def track_request(self, request, spider):
+        """request_scheduled handler keeping the checkpoint frontier up to date"""
+        if spider is not self or 'link_check' in request.meta:
+            return
+        if 'rule' not in request.meta and request.callback is not None:
+            return  # robots.txt / sitemap fetches are re-done on resume
+        if 'retry_times' in request.meta:
+            return  # Same page, already pending
+        
+        # A redirect hands the page over to its target URL
+        redirects = request.meta.get('redirect_urls')
+        if redirects:
+            self.frontier.pop(url_fingerprint(redirects[-1]), None)
+        
+        fingerprint = url_fingerprint(request.url)
+        dupefilter = self._dupefilter()
+        if not request.dont_filter and dupefilter is not None and fingerprint in dupefilter.fingerprints:
+            return  # Duplicate: the dupefilter is about to drop it
+        self.frontier[fingerprint] = [request.url, request.priority, request.meta.get('depth', 0)]
+
+    def start_checkpoints(self, spider):
+        if spider is not self:
+            return
+        self._checkpoint_loop = task.LoopingCall(self.save_checkpoint)
+        self._checkpoint_loop.start(self.checkpoint_interval, now=False)
+
+    def save_checkpoint(self):
+        """Write the frontier, seen sets, stats and sink offsets to disk"""
+        dupefilter = self._dupefilter()
+        state = {
+            'domain': self.domain,
+            'stats': self.stats,
+            'frontier': list(self.frontier.values()),
+            'sink': self.sink.state(),
+        }
+        fingerprint_sets = {
+            'seen': dupefilter.fingerprints if dupefilter is not None else None,
+            'sitemap_urls': self.sitemap_urls,
+        }
+        if self.link_validator:
+            fingerprint_sets['links_seen'], state['link_checks'] = self.link_validator.checkpoint()
+        if self.page_snapshots is not None:
+            state['page_snapshots'] = {'offset': self.page_snapshots.offset(), 'count': self.page_snapshots.count}
+        
+        try:
+            self.checkpoint.save(state, fingerprint_sets)
+        except OSError as e:
+            self.logger.error(f'❌ Checkpoint failed: {e}')
+            return
+        self.logger.debug(f'💾 Checkpoint saved: {len(self.frontier)} queued pages')
+
+    def _close_checkpoint(self, reason):
+        """Clear the checkpoint after a full crawl, save a final one otherwise"""
+        if self._checkpoint_loop is not None and self._checkpoint_loop.running:
+            self._checkpoint_loop.stop()
+        
+        if reason == 'finished':
+            self.checkpoint.clear()
+        else:
+            self.save_checkpoint()
+            self.stats['checkpoint'] = self.checkpoint.directory
+            self.logger.info(f'💾 Crawl interrupted ({reason}); resume from {self.checkpoint.directory}')
+
+    def _coverage(self):
+        """How much of the site the crawl reached"""
+        dupefilter = self._dupefilter()
+        listed = len(self.sitemap_urls)
+        crawled = self.stats.get('sitemap_pages_crawled', 0)
+        return {
+            'sitemap_urls': listed,
+            'sitemap_urls_crawled': crawled,
+            'sitemap_coverage': round(crawled / listed, 4) if listed else None,
+            'urls_discovered': len(dupefilter) if dupefilter is not None else None,
+            'pages_crawled': self.stats['pages_crawled'],
+        }
 
     def closed(self, reason):
         """Called when spider finishes - save summary"""
+        if self.checkpoint is not None:
+            self._close_checkpoint(reason)
+        dupefilter = self._dupefilter()
+        
         self.stats['end_time'] = datetime.now().isoformat()
         self.stats['status'] = 'completed'
         
-        # Save to JSON file
-        output_data = {
+        self.stats['close_reason'] = reason
+        self.stats['checks'] = self.check_suite.report()
+        self.stats['coverage'] = self._coverage()
+        if dupefilter is not None:
+            dupefilter.fingerprints.close()
+        if getattr(self, 'throttle', None):
+            self.stats['throughput'] = self.throttle.report()
+        if self.link_validator:
+            self.stats['link_validation'] = {
+                **self.link_validator.stats,
+                'cache': self.link_validator.cache.summary()
+            }
+            if self.link_cache_file:
+                self.link_validator.cache.save(self.link_cache_file)
+        self.sink.close()
+        if self.previous_pages is not None:
+            self.previous_pages.close()
+        if self.page_snapshots is not None:
+            self.page_snapshots.close()
+            self.stats['page_snapshots'] = {'file': self.page_snapshots.path, 'pages': self.page_snapshots.count}
+        
+        # Keep results on the spider so in-process runners can read them
+        self.results = {
             'domain': self.domain,
             'stats': self.stats,
-            'issues': self.issues
+            **self.sink.summary()
         }
-        
-        filename = f'seo_report_{self.domain.replace(".", "_")}.json'
-        with open(filename, 'w') as f:
-            json.dump(output_data, f, indent=2)
+        if isinstance(self.sink, MemorySink):
+            self.results['issues'] = self.sink.issues
         
         self.logger.info(f'✅ Crawl completed: {self.stats["pages_crawled"]} pages')
         self.logger.info(f'🔴 Found {self.stats["broken_links"]} broken links')
         self.logger.info(f'🖼️  Found {self.stats["missing_alt_text"]} images without alt text')
+        
+        if not self.save_json:
+            return
+        
+        # Save to JSON file
+        filename = f'seo_report_{self.domain.replace(".", "_")}.json'
+        with open(filename, 'w') as f:
+            json.dump(self.results, f, indent=2)
+        
         self.logger.info(f'📄 Report saved to: {filename}')
\ No newline at end of file
@@ -0,0 +1,207 @@
+"""
+SEO Sentinel Issue Sinks
+Stream issues out of the spider as they are found instead of holding them in memory
+"""
+
+import json
+import os
+
+
+# Issue 'type' -> key used in the grouped report data
+ISSUE_GROUPS = {
+    'broken_link': 'broken_links',
+    'missing_alt_text': 'missing_alt_text',
+    'meta_issues': 'meta_issues',
+}
+
+
+def issue_group(issue):
+    """Return the report group an issue belongs to"""
+    return ISSUE_GROUPS.get(issue.get('type'), issue.get('type'))
+
+
+class IssueSink:
+    """Base class for issue outputs - subclasses implement _write()"""
+
+    def __init__(self):
+        self.counts = {group: 0 for group in ISSUE_GROUPS.values()}
+        self.closed = False
+
+    def write(self, issue):
+        """Accept one issue dict"""
+        group = issue_group(issue)
+        self.counts[group] = self.counts.get(group, 0) + 1
+        self._write(issue)
+
+    def _write(self, issue):
+        raise NotImplementedError
+
+    def flush(self):
+        """Push buffered issues to the backend"""
+
+    def close(self):
+        """Flush and release resources (idempotent)"""
+        if self.closed:
+            return
+        self.flush()
+        self.closed = True
+
+    def summary(self):
+        """Describe where the issues went, for the crawl summary"""
+        return {'sink': type(self).__name__, 'counts': dict(self.counts)}
+
+    def state(self):
+        """Flush and return what a checkpoint needs to resume this sink"""
+        self.flush()
+        return {'counts': dict(self.counts)}
+
+    def restore(self, state):
+        """Continue from a checkpoint taken with state()"""
+        self.counts.update(state.get('counts', {}))
+
+
+class NDJSONFileSink(IssueSink):
+    """Write issues to a newline-delimited JSON file
+
+    Lines are flushed to the OS every `flush_every` issues, so a crawl
+    that dies part way through still leaves a readable file (see
+    read_ndjson_issues). They are only fsynced when a checkpoint records
+    the file's offset and on close, never on the per-issue path.
+    """
+
+    def __init__(self, path, flush_every=100, append=False):
+        super().__init__()
+        self.path = str(path)
+        self.flush_every = flush_every
+        self._pending = 0
+        self._file = open(self.path, 'a' if append else 'w', encoding='utf-8')
+
+    def _write(self, issue):
+        self._file.write(json.dumps(issue, separators=(',', ':')) + '\n')
+        self._pending += 1
+        if self._pending >= self.flush_every:
+            self.flush()
+
+    def flush(self):
+        if self._file.closed:
+            return
+        self._file.flush()
+        self._pending = 0
+
+    def sync(self):
+        """Flush and fsync, so the lines on disk survive a machine crash"""
+        self.flush()
+        os.fsync(self._file.fileno())
+
+    def close(self):
+        if self.closed:
+            return
+        self.sync()
+        super().close()
+        self._file.close()
+
+    def summary(self):
+        return {**super().summary(), 'issues_file': self.path}
+
+    def state(self):
+        """The checkpointed offset is only recorded once the lines before it are on disk"""
+        state = super().state()
+        self.sync()
+        state['offset'] = self._file.tell()
+        return state
+
+    def restore(self, state):
+        """Drop issues written after the checkpoint, then keep appending"""
+        super().restore(state)
+        self._file.truncate(state.get('offset', 0))
+        self._file.seek(0, os.SEEK_END)
+
+
+class BatchSink(IssueSink):
+    """Buffer up to `batch_size` issues and hand them to `handler` as a list"""
+
+    def __init__(self, handler, batch_size=1000):
+        super().__init__()
+        self.handler = handler
+        self.batch_size = batch_size
+        self._buffer = []
+
+    def _write(self, issue):
+        self._buffer.append(issue)
+        if len(self._buffer) >= self.batch_size:
+            self.flush()
+
+    def flush(self):
+        if not self._buffer:
+            return
+        batch, self._buffer = self._buffer, []
+        self.handler(batch)
+
+
+class CallbackSink(IssueSink):
+    """Call `callback(issue)` for every issue as it arrives"""
+
+    def __init__(self, callback):
+        super().__init__()
+        self.callback = callback
+
+    def _write(self, issue):
+        self.callback(issue)
+
+
+class MemorySink(IssueSink):
+    """Keep grouped issue lists in memory - only suitable for small crawls"""
+
+    def __init__(self):
+        super().__init__()
+        self.issues = {group: [] for group in ISSUE_GROUPS.values()}
+
+    def _write(self, issue):
+        self.issues.setdefault(issue_group(issue), []).append(issue)
+
+    def state(self):
+        return {**super().state(), 'issues': self.issues}
+
+    def restore(self, state):
+        super().restore(state)
+        self.issues = state.get('issues', self.issues)
+
+
+def create_sink(spec, append=False):
+    """Build a sink from a spider argument such as 'ndjson:/tmp/out.ndjson' or 'memory'"""
+    if isinstance(spec, IssueSink):
+        return spec
+
+    kind, _, target = str(spec).partition(':')
+    if kind == 'memory':
+        return MemorySink()
+    if kind == 'ndjson' and target:
+        return NDJSONFileSink(target, append=append)
+
+    raise ValueError(f'Unknown issue sink: {spec}')
+
+
+def read_ndjson_issues(path):
+    """Yield issues from an NDJSON file, skipping a torn final line"""
+    with open(path, 'r', encoding='utf-8') as f:
+        for line in f:
+            if not line.endswith('\n'):
+                break  # Partially written line from an interrupted crawl
+            line = line.strip()
+            if line:
+                yield json.loads(line)
+
+
+def read_ndjson_group(path, group):
+    """Yield one report group's issues from an NDJSON file (one streaming pass)"""
+    for issue in read_ndjson_issues(path):
+        if issue_group(issue) == group:
+            yield issue
+
+
+def group_issues(issues):
+    """Group a stream of issues into the {'broken_links': [...], ...} report shape"""
+    grouped = {group: [] for group in ISSUE_GROUPS.values()}
+    for issue in issues:
+        grouped.setdefault(issue_group(issue), []).append(issue)
+    return grouped
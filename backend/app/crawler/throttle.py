@@ -0,0 +1,171 @@
+"""
+SEO Sentinel Adaptive Throttle
+AIMD per-host concurrency/delay control driven by latency and error rate
+"""
+
+import time
+from urllib.parse import urlparse
+
+from protego import Protego
+from scrapy import signals
+from scrapy.exceptions import NotConfigured
+
+
+# Statuses that mean "slow down" rather than "page is broken"
+BACKOFF_STATUSES = {429, 503}
+
+
+class HostState:
+    """Control variables and throughput counters for one download slot"""
+
+    def __init__(self, concurrency, delay, min_delay, max_delay):
+        self.concurrency = concurrency
+        self.delay = delay       # starts at DOWNLOAD_DELAY
+        self.min_delay = min_delay   # ADAPTIVE_THROTTLE_MIN_DELAY, or robots.txt Crawl-delay
+        self.max_delay = max_delay   # ADAPTIVE_THROTTLE_MAX_DELAY, raised to a longer Crawl-delay
+        self.crawl_delay = None
+        self.successes = 0       # successes since the last concurrency step
+        self.responses = 0
+        self.errors = 0
+        self.bytes = 0
+        self.peak_concurrency = concurrency
+        self.first_at = None
+        self.last_at = None
+
+    def report(self):
+        elapsed = (self.last_at - self.first_at) if self.first_at else 0.0
+        return {
+            'responses': self.responses,
+            'errors': self.errors,
+            'requests_per_second': round(self.responses / elapsed, 2) if elapsed else None,
+            'bytes_per_second': round(self.bytes / elapsed) if elapsed else None,
+            'final_concurrency': self.concurrency,
+            'peak_concurrency': self.peak_concurrency,
+            'final_delay': round(self.delay, 3),
+            'crawl_delay': self.crawl_delay,
+        }
+
+
+class AdaptiveThrottleMiddleware:
+    """Downloader middleware adjusting each host's slot like TCP congestion control
+
+    DOWNLOAD_DELAY is only the starting point. Fast, healthy responses
+    first shrink the delay towards the host's floor (ADAPTIVE_THROTTLE_MIN_DELAY,
+    0 by default, or robots.txt Crawl-delay, the only hard floor and never
+    capped by ADAPTIVE_THROTTLE_MAX_DELAY), then add
+    one concurrent request per window of successes. Scrapy sends one
+    request per delay whenever the delay is above 0, so concurrency only
+    takes effect once the delay is gone. Errors,
+    429/503 and very slow responses halve concurrency and, once at one
+    request, double the delay.
+    """
+
+    def __init__(self, crawler):
+        settings = crawler.settings
+        if not settings.getbool('ADAPTIVE_THROTTLE_ENABLED'):
+            raise NotConfigured
+
+        self.crawler = crawler
+        self.start_concurrency = settings.getint('CONCURRENT_REQUESTS_PER_DOMAIN')
+        self.start_delay = settings.getfloat('DOWNLOAD_DELAY')
+        self.min_delay = settings.getfloat('ADAPTIVE_THROTTLE_MIN_DELAY', 0.0)
+        self.max_concurrency = settings.getint('ADAPTIVE_THROTTLE_MAX_CONCURRENCY')
+        self.max_delay = settings.getfloat('ADAPTIVE_THROTTLE_MAX_DELAY')
+        self.target_latency = settings.getfloat('ADAPTIVE_THROTTLE_TARGET_LATENCY')
+        self.delay_step = settings.getfloat('ADAPTIVE_THROTTLE_DELAY_STEP', 0.05)
+        self.user_agent = settings.get('USER_AGENT')
+        self.hosts = {}
+
+        crawler.signals.connect(self.spider_opened, signal=signals.spider_opened)
+
+    @classmethod
+    def from_crawler(cls, crawler):
+        return cls(crawler)
+
+    def spider_opened(self, spider):
+        spider.throttle = self
+
+    def _state(self, request):
+        key = request.meta.get('download_slot') or urlparse(request.url).hostname
+        state = self.hosts.get(key)
+        if state is None:
+            state = self.hosts[key] = HostState(
+                self.start_concurrency, self.start_delay, self.min_delay, self.max_delay)
+        slot = self.crawler.engine.downloader.slots.get(key)
+        return state, slot
+
+    def process_response(self, request, response, spider):
+        state, slot = self._state(request)
+        now = time.monotonic()
+        state.first_at = state.first_at or now
+        state.last_at = now
+        state.responses += 1
+        state.bytes += len(response.body)
+
+        if urlparse(response.url).path == '/robots.txt' and response.status == 200:
+            self._apply_crawl_delay(state, response)
+        elif response.status in BACKOFF_STATUSES:
+            state.errors += 1
+            self._decrease(state)
+        else:
+            latency = request.meta.get('download_latency')
+            if latency is not None:
+                if latency <= self.target_latency:
+                    self._increase(state)
+                elif latency > 2 * self.target_latency:
+                    self._decrease(state)
+
+        self._apply(state, slot)
+        return response
+
+    def process_exception(self, request, exception, spider):
+        state, slot = self._state(request)
+        state.errors += 1
+        self._decrease(state)
+        self._apply(state, slot)
+        return None
+
+    def _apply_crawl_delay(self, state, response):
+        try:
+            robots = Protego.parse(response.text)
+        except (AttributeError, ValueError):
+            return
+        crawl_delay = robots.crawl_delay(self.user_agent)
+        if crawl_delay:
+            state.crawl_delay = float(crawl_delay)
+            state.min_delay = max(self.min_delay, state.crawl_delay)
+            state.max_delay = max(self.max_delay, state.crawl_delay)
+            state.delay = max(state.delay, state.min_delay)
+            state.concurrency = 1  # Crawl-delay means one request per interval
+
+    def _increase(self, state):
+        """Additive increase: shed delay first, then add one slot per window"""
+        if state.delay > state.min_delay:
+            state.delay = max(state.min_delay, state.delay - self.delay_step)
+            return
+        if state.crawl_delay:
+            return  # Crawl-delay hosts stay at one request per interval
+
+        state.successes += 1
+        if state.successes >= state.concurrency and state.concurrency < self.max_concurrency:
+            state.concurrency += 1
+            state.successes = 0
+            state.peak_concurrency = max(state.peak_concurrency, state.concurrency)
+
+    def _decrease(self, state):
+        """Multiplicative decrease: halve concurrency, then double the delay"""
+        state.successes = 0
+        if state.concurrency > 1:
+            state.concurrency = max(1, state.concurrency // 2)
+        else:
+            state.delay = min(state.max_delay, max(state.delay * 2, self.delay_step * 5, state.min_delay))
+
+    @staticmethod
+    def _apply(state, slot):
+        if slot is not None:
+            slot.concurrency = state.concurrency
+            slot.delay = state.delay
+
+    def report(self):
+        """Per-host throughput reached during the crawl"""
+        return {host: state.report() for host, state in self.hosts.items()}
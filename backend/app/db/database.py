@@ -0,0 +1,211 @@
+"""
+SEO Sentinel Database
+Async (API) and sync (workers) engines, sessions and pool metrics built from Config.DATABASE
+"""
+
+import time
+from collections import deque
+from contextlib import contextmanager
+
+from sqlalchemy import create_engine, event
+from sqlalchemy.exc import TimeoutError as PoolTimeout
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+from sqlalchemy.orm import sessionmaker
+
+from app.core.config import config
+
+
+# Async driver used for each dialect when only the sync URL is configured
+ASYNC_DRIVERS = {
+    'postgresql': 'postgresql+asyncpg',
+    'sqlite': 'sqlite+aiosqlite',
+}
+
+_engines = {}
+_session_factories = {}
+_metrics = {}
+
+
+def async_url(url):
+    """Turn a sync URL (postgresql://...) into its async-driver equivalent"""
+    scheme, _, rest = url.partition('://')
+    return f"{ASYNC_DRIVERS.get(scheme.split('+')[0], scheme)}://{rest}"
+
+
+def engine_options(url, is_async=False):
+    """create_engine() keyword arguments for a URL from Config.DATABASE"""
+    settings = config.DATABASE
+    options = {
+        'echo': settings['echo'],
+        'pool_pre_ping': settings['pool_pre_ping'],
+    }
+    if url.startswith('sqlite'):
+        return options  # SQLite has no server-side pool or statement timeout
+
+    options.update(
+        pool_size=settings['pool_size'],
+        max_overflow=settings['max_overflow'],
+        pool_timeout=settings['pool_timeout'],
+        pool_recycle=settings['pool_recycle'],
+    )
+    timeout = settings['statement_timeout_ms']
+    if timeout and url.startswith('postgresql'):
+        if is_async:
+            options['connect_args'] = {'server_settings': {'statement_timeout': str(timeout)}}
+        else:
+            options['connect_args'] = {'options': f'-c statement_timeout={timeout}'}
+    return options
+
+
+class PoolMetrics:
+    """Connection pool usage and checkout wait times for one engine
+
+    Counters come from pool events; wait times are recorded by whoever
+    acquires connections (see app.core.dependencies.get_db) and kept as a
+    rolling window of recent samples.
+    """
+
+    def __init__(self, engine, samples=1000):
+        self.engine = engine
+        self.counters = {'connects': 0, 'checkouts': 0, 'checkins': 0, 'invalidations': 0, 'timeouts': 0}
+        self._waits = deque(maxlen=samples)
+
+        for name, counter in (('connect', 'connects'), ('checkout', 'checkouts'),
+                              ('checkin', 'checkins'), ('invalidate', 'invalidations')):
+            event.listen(engine.pool, name, self._counter(counter))
+
+    def _counter(self, name):
+        def increment(*args):
+            self.counters[name] += 1
+        return increment
+
+    def record_wait(self, seconds):
+        self._waits.append(seconds)
+
+    def record_timeout(self):
+        self.counters['timeouts'] += 1
+
+    def snapshot(self):
+        """Current pool occupancy plus wait-time percentiles in milliseconds"""
+        pool = self.engine.pool
+        usage = {'pool': type(pool).__name__}
+        for name in ('size', 'checkedout', 'overflow', 'checkedin'):
+            method = getattr(pool, name, None)
+            if method is not None:
+                usage[name] = method()
+
+        waits = sorted(self._waits)
+        wait_ms = {'samples': len(waits)}
+        if waits:
+            wait_ms.update(
+                mean=round(sum(waits) / len(waits) * 1000, 3),
+                p50=round(waits[len(waits) // 2] * 1000, 3),
+                p95=round(waits[min(len(waits) - 1, int(len(waits) * 0.95))] * 1000, 3),
+                max=round(waits[-1] * 1000, 3),
+            )
+        return {**usage, **self.counters, 'wait_ms': wait_ms}
+
+
+def get_engine():
+    """Sync engine for Celery workers, the crawler and scripts"""
+    engine = _engines.get('sync')
+    if engine is None:
+        url = config.DATABASE['url']
+        engine = _engines['sync'] = create_engine(url, **engine_options(url))
+        _metrics['sync'] = PoolMetrics(engine)
+    return engine
+
+
+def get_async_engine():
+    """Async engine for the FastAPI app; never blocks the event loop on DB I/O"""
+    engine = _engines.get('async')
+    if engine is None:
+        url = config.DATABASE['async_url'] or async_url(config.DATABASE['url'])
+        engine = _engines['async'] = create_async_engine(url, **engine_options(url, is_async=True))
+        _metrics['async'] = PoolMetrics(engine.sync_engine)
+    return engine
+
+
+def get_session_factory():
+    factory = _session_factories.get('sync')
+    if factory is None:
+        factory = _session_factories['sync'] = sessionmaker(bind=get_engine(), expire_on_commit=False)
+    return factory
+
+
+def get_async_session_factory():
+    factory = _session_factories.get('async')
+    if factory is None:
+        factory = _session_factories['async'] = async_sessionmaker(
+            get_async_engine(), class_=AsyncSession, expire_on_commit=False
+        )
+    return factory
+
+
+def get_pool_metrics(kind):
+    """PoolMetrics for 'sync' or 'async', creating the engine if needed"""
+    (get_async_engine if kind == 'async' else get_engine)()
+    return _metrics[kind]
+
+
+def pool_metrics():
+    """Snapshot of every engine created in this process"""
+    return {kind: metrics.snapshot() for kind, metrics in _metrics.items()}
+
+
+async def acquire_async_session():
+    """Open an AsyncSession with its connection checked out, timing the pool wait"""
+    metrics = get_pool_metrics('async')
+    session = get_async_session_factory()()
+    started = time.perf_counter()
+    try:
+        await session.connection()
+    except PoolTimeout:
+        metrics.record_timeout()
+        await session.close()
+        raise
+    metrics.record_wait(time.perf_counter() - started)
+    return session
+
+
+@contextmanager
+def session_scope():
+    """Sync session for workers: commit on success, roll back on error"""
+    metrics = get_pool_metrics('sync')
+    session = get_session_factory()()
+    started = time.perf_counter()
+    try:
+        session.connection()
+    except PoolTimeout:
+        metrics.record_timeout()
+        session.close()
+        raise
+    metrics.record_wait(time.perf_counter() - started)
+
+    try:
+        yield session
+        session.commit()
+    except Exception:
+        session.rollback()
+        raise
+    finally:
+        session.close()
+
+
+def after_fork():
+    """Forget pooled connections inherited from the parent process (worker pools)"""
+    engine = _engines.get('sync')
+    if engine is not None:
+        engine.dispose(close=False)
+
+
+async def dispose_engines():
+    """Close pooled connections (application shutdown)"""
+    engine = _engines.pop('async', None)
+    if engine is not None:
+        await engine.dispose()
+    engine = _engines.pop('sync', None)
+    if engine is not None:
+        engine.dispose()
+    _session_factories.clear()
+    _metrics.clear()
@@ -3,7 +3,7 @@ SEO Sentinel Database Models
 SQLAlchemy ORM models for user management, scans, and reports
 """
 
-from sqlalchemy import Column, Integer, String, DateTime, Boolean, ForeignKey, Text, Float, Enum
+from sqlalchemy import Column, Integer, BigInteger, String, Date, DateTime, Boolean, ForeignKey, Text, Float, Enum, Index, text
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
@@ -72,6 +72,10 @@ class User(Base):
 class Website(Base):
     """Website model - each user can have multiple websites"""
     __tablename__ = 'websites'
+    __table_args__ = (
+        # Scheduler: due websites in next_scan_at order
+        Index('ix_websites_active_next_scan_at', 'is_active', 'next_scan_at'),
+    )
     
     id = Column(Integer, primary_key=True, index=True)
     user_id = Column(Integer, ForeignKey('users.id', ondelete='CASCADE'), nullable=False)
@@ -108,6 +112,9 @@ class Website(Base):
 class Scan(Base):
     """Scan model - each website has multiple scan records"""
     __tablename__ = 'scans'
+    __table_args__ = (
+        Index('ix_scans_website_id_id', 'website_id', 'id'),
+    )
     
     id = Column(Integer, primary_key=True, index=True)
     user_id = Column(Integer, ForeignKey('users.id', ondelete='CASCADE'), nullable=False)
@@ -123,16 +130,30 @@ class Scan(Base):
     broken_links_count = Column(Integer, default=0)
     missing_alt_text_count = Column(Integer, default=0)
     meta_issues_count = Column(Integer, default=0)
+    new_issues_count = Column(Integer, default=0)  # first seen in this scan
+    resolved_issues_count = Column(Integer, default=0)  # open before, gone in this scan
     
     # Timing
     started_at = Column(DateTime(timezone=True))
+    crawled_at = Column(DateTime(timezone=True))  # crawl finished; issues may not be ingested yet
     completed_at = Column(DateTime(timezone=True))
     duration_seconds = Column(Float)
+    stage_timings = Column(Text)  # JSON: pipeline stage -> queue wait / run seconds, attempts
+    preflight_result = Column(Text)  # JSON: pre-flight probe (canonical URL, robots, sitemap size)
     
     # Results storage
     report_pdf_path = Column(String(500))
+    report_cache_key = Column(String(64), index=True)  # content key of the PDF (see ReportCache)
+    report_cache_hit = Column(Boolean)  # PDF reused from the report cache rather than rendered
+    report_accessed_at = Column(DateTime(timezone=True))  # PDF last rendered or downloaded (hourly resolution)
     report_json_path = Column(String(500))
+    report_model_path = Column(String(500))  # JSON report model the PDF, HTML and JSON views are rendered from
     report_url = Column(String(500))  # Public URL to view report
+    page_snapshots_path = Column(String(500))  # Per-URL validators for the next incremental scan
+    checkpoint_path = Column(String(500))  # Crawl checkpoint directory while the scan can be resumed
+    crawl_lease = Column(String(32))  # token of the crawl running now (see ScanService.take_crawl_lease)
+    crawl_lease_expires_at = Column(DateTime(timezone=True))
+    resume_count = Column(Integer, default=0)
     
     # Error tracking
     error_message = Column(Text)
@@ -144,7 +165,7 @@ class Scan(Base):
     # Relationships
     user = relationship("User", back_populates="scans")
     website = relationship("Website", back_populates="scans")
-    issues = relationship("Issue", back_populates="scan", cascade="all, delete-orphan")
+    issues = relationship("Issue", back_populates="scan", cascade="all, delete-orphan", foreign_keys="Issue.scan_id")
     
     def __repr__(self):
         return f"<Scan(id={self.id}, website_id={self.website_id}, status={self.status})>"
@@ -153,9 +174,27 @@ class Scan(Base):
 class Issue(Base):
     """Issue model - stores individual SEO issues found during scans"""
     __tablename__ = 'issues'
+    __table_args__ = (
+        # Keyset pagination: every listing filters on scan_id and seeks on id
+        Index('ix_issues_scan_id_id', 'scan_id', 'id'),
+        Index('ix_issues_scan_resolved_severity_id', 'scan_id', 'is_resolved', 'severity', 'id'),
+        Index('ix_issues_scan_type_resolved_id', 'scan_id', 'issue_type', 'is_resolved', 'id'),
+        # Cross-scan tracking: open issues of a site by fingerprint / severity
+        Index('ix_issues_website_resolved_fingerprint', 'website_id', 'is_resolved', 'fingerprint'),
+        Index('ix_issues_website_resolved_severity_id', 'website_id', 'is_resolved', 'severity', 'id'),
+        # Issues present in a scan (a site's rows found by that scan or an earlier one), in id order:
+        # open rows are walked on id, rows resolved since come from their resolved_scan_id range
+        Index('ix_issues_website_open_id', 'website_id', 'id',
+              postgresql_where=text('is_resolved IS NOT true'), sqlite_where=text('is_resolved IS NOT 1')),
+        Index('ix_issues_website_resolved_scan_id', 'website_id', 'resolved_scan_id', 'scan_id'),
+        Index('ix_issues_resolved_scan_id_id', 'resolved_scan_id', 'id'),
+    )
     
     id = Column(Integer, primary_key=True, index=True)
+    # The scan that first found the issue; later scans that still see it write nothing
     scan_id = Column(Integer, ForeignKey('scans.id', ondelete='CASCADE'), nullable=False)
+    website_id = Column(Integer, ForeignKey('websites.id', ondelete='CASCADE'))
+    fingerprint = Column(BigInteger)  # type + normalized page URL + target URL, stable across scans
     
     # Issue classification
     issue_type = Column(String(50), nullable=False, index=True)  # broken_link, missing_alt_text, meta_issue
@@ -178,21 +217,63 @@ class Issue(Base):
     # For meta issues
     meta_issue_description = Column(Text)
     
-    # Resolution tracking
+    # Resolution tracking - an open issue was last seen by the site's latest scan
     is_resolved = Column(Boolean, default=False)
     resolved_at = Column(DateTime(timezone=True))
     resolution_note = Column(Text)
+    resolved_scan_id = Column(Integer, ForeignKey('scans.id', ondelete='SET NULL'))  # first scan without it
+    last_seen_scan_id = Column(Integer, ForeignKey('scans.id', ondelete='SET NULL'))  # set on resolution
     
     # Timestamps
     created_at = Column(DateTime(timezone=True), server_default=func.now())
     
     # Relationships
-    scan = relationship("Scan", back_populates="issues")
+    scan = relationship("Scan", back_populates="issues", foreign_keys=[scan_id])
     
     def __repr__(self):
         return f"<Issue(id={self.id}, type={self.issue_type}, severity={self.severity})>"
 
 
+class ScanTrend(Base):
+    """Per-website issue counts rolled up by day and week for trend charts
+
+    One row per (website, period, period_start, issue_type, severity), plus
+    an issue_type/severity of 'all' row with the totals. Rows are folded in
+    incrementally as scans complete, so a chart reads a fixed number of
+    rows however much scan history exists.
+    """
+    __tablename__ = 'scan_trends'
+    __table_args__ = (
+        Index('ix_scan_trends_website_period_type_severity_start',
+              'website_id', 'period', 'issue_type', 'severity', 'period_start', unique=True),
+    )
+    
+    id = Column(Integer, primary_key=True, index=True)
+    website_id = Column(Integer, ForeignKey('websites.id', ondelete='CASCADE'), nullable=False)
+    
+    # Bucket
+    period = Column(String(10), nullable=False)  # day, week (starting Monday)
+    period_start = Column(Date, nullable=False)
+    issue_type = Column(String(50), nullable=False)  # or 'all'
+    severity = Column(String(20), nullable=False)  # or 'all'
+    
+    # Aggregates over the completed scans in the bucket
+    scans = Column(Integer, default=0)
+    open_issues = Column(Integer, default=0)  # as of the bucket's latest scan
+    max_open_issues = Column(Integer, default=0)
+    total_open_issues = Column(Integer, default=0)  # sum over scans; / scans for the average
+    new_issues = Column(Integer, default=0)
+    resolved_issues = Column(Integer, default=0)
+    last_scan_id = Column(Integer, ForeignKey('scans.id', ondelete='SET NULL'))
+    scan_ids = Column(Text)  # JSON: ids of the scans folded into the bucket
+    
+    # Timestamps
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
+    
+    def __repr__(self):
+        return f"<ScanTrend(website_id={self.website_id}, {self.period}={self.period_start}, {self.issue_type}/{self.severity})>"
+
+
 class ApiKey(Base):
     """API Key model for programmatic access"""
     __tablename__ = 'api_keys'
@@ -0,0 +1,387 @@
+"""
+SEO Sentinel Repositories
+Query and bulk-write helpers for the Scan and Issue tables
+"""
+
+import csv
+import io
+import json
+from datetime import datetime, timedelta
+
+from sqlalchemy import and_, delete, func, insert, or_, select, update
+
+from app.db.models import Issue, Scan, ScanTrend
+
+
+# Issue columns written by bulk ingestion, in COPY column order
+ISSUE_COLUMNS = [
+    'scan_id', 'website_id', 'fingerprint', 'issue_type', 'severity', 'page_url', 'page_title',
+    'broken_url', 'status_code', 'referenced_from',
+    'image_url', 'image_filename', 'meta_issue_description', 'is_resolved',
+]
+
+DEFAULT_PAGE_SIZE = 50
+MAX_PAGE_SIZE = 500
+
+TREND_PERIODS = ('day', 'week')
+TREND_TOTAL = 'all'  # issue_type/severity of the per-bucket totals row
+
+
+def _page_size(limit):
+    return max(1, min(int(limit or DEFAULT_PAGE_SIZE), MAX_PAGE_SIZE))
+
+
+def _seek(query, column, after_id, descending, limit):
+    """Apply a keyset cursor: rows strictly after `after_id` in id order"""
+    if after_id is not None:
+        query = query.where(column < after_id if descending else column > after_id)
+    return query.order_by(column.desc() if descending else column.asc()).limit(limit + 1)
+
+
+def period_start(period, moment):
+    """First day of the trend bucket containing `moment` (weeks start on Monday)"""
+    day = moment.date() if isinstance(moment, datetime) else moment
+    return day - timedelta(days=day.weekday()) if period == 'week' else day
+
+
+def _page(rows, limit):
+    """Split the limit+1 probe row off; returns (items, next_cursor)"""
+    items = list(rows[:limit])
+    next_cursor = items[-1].id if len(rows) > limit else None
+    return items, next_cursor
+
+
+class IssueRepository:
+    """Issue table access for one session
+
+    Listings use keyset (seek) pagination on `id`: the cursor is the last
+    id of the previous page, so page 40 costs the same as page 1. Each
+    filter combination is served by one of the composite
+    (scan_id, ..., id) or (website_id, ..., id) indexes on Issue.
+
+    An issue row is stored once, under the scan that first found it, and
+    stays until a later scan resolves it. A scan's issues are therefore
+    the site's rows found by it or an earlier scan and not yet resolved
+    by then; `new_only` narrows that to the rows the scan itself found.
+
+    `bulk_insert` never builds ORM objects: rows are plain dicts written in
+    large batches with COPY on PostgreSQL (psycopg2) and executemany
+    everywhere else. Nothing is committed here, so callers can update
+    the Scan counters in the same transaction.
+    """
+
+    def __init__(self, session):
+        self.session = session
+
+    def _filtered(self, query, condition, issue_type=None, severity=None, is_resolved=None):
+        if condition is not None:
+            query = query.where(condition)
+        if issue_type is not None:
+            query = query.where(Issue.issue_type == issue_type)
+        if is_resolved is not None:
+            query = query.where(Issue.is_resolved == is_resolved)
+        if severity is not None:
+            if isinstance(severity, (list, tuple, set)):
+                query = query.where(Issue.severity.in_(list(severity)))
+            else:
+                query = query.where(Issue.severity == severity)
+        return query
+
+    def _in_scan(self, scan_id, new_only=False):
+        """Condition for the issues present in a scan (or only first found by it)"""
+        if new_only:
+            return Issue.scan_id == scan_id
+        website_id = self.session.scalar(select(Scan.website_id).where(Scan.id == scan_id))
+        return and_(
+            Issue.website_id == website_id,
+            Issue.scan_id <= scan_id,
+            # resolved_scan_id is cleared when retention deletes the resolving scan
+            or_(Issue.is_resolved.isnot(True), Issue.resolved_scan_id > scan_id),
+        )
+
+    def _in_scan_parts(self, scan_id):
+        """_in_scan split on is_resolved, each part one ordered index seek
+
+        Open rows are walked in id order on ix_issues_website_open_id;
+        rows resolved since come from the resolved_scan_id range of
+        ix_issues_website_resolved_scan_id. The OR of the two in one
+        query would read the site's whole history and sort it.
+        """
+        website_id = self.session.scalar(select(Scan.website_id).where(Scan.id == scan_id))
+        latest_scan_id = self.session.scalar(select(func.max(Scan.id)).where(Scan.website_id == website_id))
+        found = and_(Issue.website_id == website_id, Issue.scan_id <= scan_id)
+        return {
+            False: and_(found, Issue.is_resolved.isnot(True)),
+            # Only the site's own scans resolve its issues: a closed range, empty for the latest scan
+            True: and_(found, Issue.is_resolved.is_(True), Issue.resolved_scan_id.between(scan_id + 1, latest_scan_id)),
+        }
+
+    def _seek_in_scan(self, execute, query, scan_id, is_resolved, after_id, descending, limit):
+        """One keyset page of `query` over the issues present in a scan, merged from both _in_scan_parts"""
+        rows = []
+        for resolved, condition in self._in_scan_parts(scan_id).items():
+            if is_resolved is None or is_resolved == resolved:
+                rows += execute(_seek(query.where(condition), Issue.id, after_id, descending, limit)).all()
+        rows.sort(key=lambda row: row.id, reverse=descending)
+        return _page(rows, limit)
+
+    def list_issues(self, scan_id, issue_type=None, severity=None, is_resolved=None,
+                    after_id=None, limit=DEFAULT_PAGE_SIZE, descending=False, new_only=False):
+        """One page of the issues present in a scan; returns (issues, next_cursor)
+
+        Pass the returned cursor as `after_id` for the next page; it is
+        None on the last page. `is_resolved` filters on whether an issue
+        has been fixed since.
+        """
+        limit = _page_size(limit)
+        if not new_only:
+            query = self._filtered(select(Issue), None, issue_type, severity)
+            return self._seek_in_scan(self.session.scalars, query, scan_id, is_resolved, after_id, descending, limit)
+        query = self._filtered(select(Issue), self._in_scan(scan_id, new_only), issue_type, severity, is_resolved)
+        rows = self.session.scalars(_seek(query, Issue.id, after_id, descending, limit)).all()
+        return _page(rows, limit)
+
+    def count_issues(self, scan_id, issue_type=None, severity=None, is_resolved=None, new_only=False):
+        query = self._filtered(
+            select(func.count(Issue.id)), self._in_scan(scan_id, new_only), issue_type, severity, is_resolved
+        )
+        return self.session.scalar(query)
+
+    def list_open_issues(self, website_id, issue_type=None, severity=None,
+                         after_id=None, limit=DEFAULT_PAGE_SIZE, descending=False):
+        """One page of a website's currently open issues, whichever scan found them"""
+        limit = _page_size(limit)
+        query = self._filtered(select(Issue), Issue.website_id == website_id, issue_type, severity, False)
+        rows = self.session.scalars(_seek(query, Issue.id, after_id, descending, limit)).all()
+        return _page(rows, limit)
+
+    def iter_issues(self, scan_id, issue_type=None, batch_size=1000):
+        """Yield the issues present in a scan as plain rows, one keyset batch in memory at a time"""
+        query = self._filtered(select(Issue.__table__), None, issue_type)
+        after_id = None
+        while True:
+            rows, after_id = self._seek_in_scan(self.session.execute, query, scan_id, None, after_id, False, batch_size)
+            yield from rows
+            if after_id is None:
+                return
+
+    def list_resolved_in_scan(self, scan_id, after_id=None, limit=DEFAULT_PAGE_SIZE):
+        """Issues a scan no longer found ("fixed since last scan")"""
+        limit = _page_size(limit)
+        query = select(Issue).where(Issue.resolved_scan_id == scan_id)
+        rows = self.session.scalars(_seek(query, Issue.id, after_id, False, limit)).all()
+        return _page(rows, limit)
+
+    def open_fingerprints(self, website_id):
+        """{fingerprint: issue id} for a website's open issues"""
+        query = self._filtered(select(Issue.fingerprint, Issue.id), Issue.website_id == website_id, is_resolved=False)
+        return dict(self.session.execute(query.where(Issue.fingerprint.isnot(None))).all())
+
+    def resolve(self, issue_ids, scan_id, last_seen_scan_id, resolved_at, batch_size=1000):
+        """Mark issues resolved by `scan_id` in id chunks (short statements, small locks)"""
+        issue_ids = sorted(issue_ids)
+        for start in range(0, len(issue_ids), batch_size):
+            self.session.execute(
+                update(Issue)
+                .where(Issue.id.in_(issue_ids[start:start + batch_size]))
+                .values(is_resolved=True, resolved_at=resolved_at,
+                        resolved_scan_id=scan_id, last_seen_scan_id=last_seen_scan_id)
+                .execution_options(synchronize_session=False)
+            )
+        return len(issue_ids)
+
+    def undo_scan(self, scan_id):
+        """Reverse a scan's ingestion: drop the issues it found, reopen the ones it resolved"""
+        self.session.execute(
+            update(Issue)
+            .where(Issue.resolved_scan_id == scan_id)
+            .values(is_resolved=False, resolved_at=None, resolved_scan_id=None, last_seen_scan_id=None)
+            .execution_options(synchronize_session=False)
+        )
+        return self.delete_for_scan(scan_id)
+
+    def summary(self, scan_id, is_resolved=None, new_only=False):
+        """{(issue_type, severity): count} of the issues present in a scan, read from the composite indexes"""
+        query = self._filtered(
+            select(Issue.issue_type, Issue.severity, func.count(Issue.id)), self._in_scan(scan_id, new_only),
+            is_resolved=is_resolved,
+        ).group_by(Issue.issue_type, Issue.severity)
+        return {(issue_type, severity): count for issue_type, severity, count in self.session.execute(query)}
+
+    def resolved_summary(self, scan_id):
+        """{(issue_type, severity): count} of the issues a scan resolved"""
+        query = (
+            select(Issue.issue_type, Issue.severity, func.count(Issue.id))
+            .where(Issue.resolved_scan_id == scan_id)
+            .group_by(Issue.issue_type, Issue.severity)
+        )
+        return {(issue_type, severity): count for issue_type, severity, count in self.session.execute(query)}
+
+    def _uses_copy(self):
+        bind = self.session.get_bind()
+        return bind.dialect.name == 'postgresql' and bind.dialect.driver == 'psycopg2'
+
+    def bulk_insert(self, rows, batch_size=5000):
+        """Insert an iterable of row dicts; returns the number of rows written"""
+        write_batch = self._copy_batch if self._uses_copy() else self._executemany_batch
+
+        written = 0
+        batch = []
+        for row in rows:
+            batch.append(row)
+            if len(batch) >= batch_size:
+                write_batch(batch)
+                written += len(batch)
+                batch = []
+        if batch:
+            write_batch(batch)
+            written += len(batch)
+        return written
+
+    def _executemany_batch(self, batch):
+        self.session.execute(insert(Issue.__table__), batch)
+
+    def _copy_batch(self, batch):
+        buffer = io.StringIO()
+        writer = csv.writer(buffer)
+        for row in batch:
+            # \N is COPY's NULL marker; empty strings stay empty strings
+            writer.writerow(['\\N' if row.get(column) is None else row[column] for column in ISSUE_COLUMNS])
+        buffer.seek(0)
+
+        cursor = self.session.connection().connection.cursor()
+        try:
+            cursor.copy_expert(
+                f"COPY {Issue.__tablename__} ({', '.join(ISSUE_COLUMNS)}) "
+                "FROM STDIN WITH (FORMAT csv, NULL '\\N')",
+                buffer
+            )
+        finally:
+            cursor.close()
+
+    def delete_for_scan(self, scan_id):
+        """Remove the issues a scan first found"""
+        return self.session.execute(delete(Issue).where(Issue.scan_id == scan_id)).rowcount
+
+
+class ScanRepository:
+    """Scan table access for one session (keyset pagination, newest first)"""
+
+    def __init__(self, session):
+        self.session = session
+
+    def list_for_website(self, website_id, before_id=None, limit=DEFAULT_PAGE_SIZE, status=None):
+        """One page of a website's scans; returns (scans, next_cursor)"""
+        limit = _page_size(limit)
+        query = select(Scan).where(Scan.website_id == website_id)
+        if status is not None:
+            query = query.where(Scan.status == status)
+        rows = self.session.scalars(_seek(query, Scan.id, before_id, True, limit)).all()
+        return _page(rows, limit)
+
+    def latest_for_website(self, website_id, status=None):
+        scans, _ = self.list_for_website(website_id, limit=1, status=status)
+        return scans[0] if scans else None
+
+
+def _applied_scans(row):
+    """Ids of the scans a trend row includes (rows from before scan_ids only know their last)"""
+    if row.scan_ids:
+        return json.loads(row.scan_ids)
+    return [row.last_scan_id] if row.last_scan_id else []
+
+
+class TrendRepository:
+    """ScanTrend rollups for one session
+
+    `record_scan` folds a completed scan into its day and week buckets by
+    updating at most a dozen rows per bucket; `series` reads a chart
+    straight from the unique (website, period, type, severity, start)
+    index. Neither touches the scans or issues tables.
+    """
+
+    def __init__(self, session):
+        self.session = session
+
+    def record_scan(self, scan, breakdown, completed_at=None):
+        """Fold a completed scan into its website's rollups
+
+        `breakdown` maps (issue_type, severity) to {'open', 'new', 'resolved'}
+        counts for this scan. Buckets remember which scans they include, so
+        a retried completion is a no-op, while a scan completing after a
+        later one still counts (only the latest scan sets `open_issues`).
+        """
+        completed_at = completed_at or scan.completed_at or datetime.now()
+        entries = dict(breakdown)
+        entries[(TREND_TOTAL, TREND_TOTAL)] = {
+            name: sum(counts.get(name, 0) for counts in breakdown.values())
+            for name in ('open', 'new', 'resolved')
+        }
+
+        for period in TREND_PERIODS:
+            start = period_start(period, completed_at)
+            rows = {
+                (row.issue_type, row.severity): row
+                for row in self.session.scalars(
+                    select(ScanTrend).where(
+                        ScanTrend.website_id == scan.website_id,
+                        ScanTrend.period == period,
+                        ScanTrend.period_start == start,
+                    )
+                )
+            }
+            applied = set()
+            for row in rows.values():
+                applied.update(_applied_scans(row))
+            if scan.id in applied:
+                continue
+            scans = max((row.scans or 0 for row in rows.values()), default=0)
+            latest = max((row.last_scan_id or 0 for row in rows.values()), default=0)
+            scan_ids = json.dumps(sorted(applied | {scan.id}))
+
+            for issue_type, severity in set(rows) | set(entries):
+                row = rows.get((issue_type, severity))
+                if row is None:
+                    # First time this type/severity shows up in the bucket
+                    row = ScanTrend(
+                        website_id=scan.website_id, period=period, period_start=start,
+                        issue_type=issue_type, severity=severity, scans=scans,
+                        open_issues=0, max_open_issues=0, total_open_issues=0,
+                        new_issues=0, resolved_issues=0, last_scan_id=latest or None,
+                    )
+                    self.session.add(row)
+                counts = entries.get((issue_type, severity), {})
+                row.scans = scans + 1
+                if scan.id > latest:
+                    row.open_issues = counts.get('open', 0)
+                    row.last_scan_id = scan.id
+                row.max_open_issues = max(row.max_open_issues, counts.get('open', 0))
+                row.total_open_issues += counts.get('open', 0)
+                row.new_issues += counts.get('new', 0)
+                row.resolved_issues += counts.get('resolved', 0)
+                row.scan_ids = scan_ids
+
+    def series(self, website_id, period='day', since=None, issue_type=TREND_TOTAL, severity=TREND_TOTAL):
+        """A website's trend rows for one type/severity (default: totals), oldest first"""
+        query = select(ScanTrend).where(
+            ScanTrend.website_id == website_id,
+            ScanTrend.period == period,
+            ScanTrend.issue_type == issue_type,
+            ScanTrend.severity == severity,
+        )
+        if since is not None:
+            query = query.where(ScanTrend.period_start >= period_start(period, since))
+        return self.session.scalars(query.order_by(ScanTrend.period_start)).all()
+
+    def breakdown(self, website_id, period='day', since=None):
+        """Every type/severity row of a website's trend (totals rows excluded), oldest first"""
+        query = select(ScanTrend).where(
+            ScanTrend.website_id == website_id,
+            ScanTrend.period == period,
+            ScanTrend.issue_type != TREND_TOTAL,
+        )
+        if since is not None:
+            query = query.where(ScanTrend.period_start >= period_start(period, since))
+        return self.session.scalars(
+            query.order_by(ScanTrend.period_start, ScanTrend.issue_type, ScanTrend.severity)
+        ).all()
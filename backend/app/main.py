@@ -2,14 +2,27 @@
 SEO Sentinel - FastAPI Application Entry Point
 """
 
-from fastapi import FastAPI
+from contextlib import asynccontextmanager
+
+from fastapi import Depends, FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 from app.core.config import config
+from app.core.dependencies import metrics_token
+from app.db.database import dispose_engines, pool_metrics
+
+
+@asynccontextmanager
+async def lifespan(app):
+    yield
+    # Return pooled DB connections on shutdown
+    await dispose_engines()
+
 
 app = FastAPI(
     title="SEO Sentinel API",
     description="B2B SaaS for Website Health Monitoring",
-    version="1.0.0"
+    version="1.0.0",
+    lifespan=lifespan
 )
 
 # CORS configuration
@@ -33,12 +46,18 @@ async def root():
 async def health_check():
     return {"status": "healthy"}
 
+@app.get("/metrics/db", dependencies=[Depends(metrics_token)])
+async def db_metrics():
+    """Connection pool usage and checkout wait times (Authorization: Bearer <METRICS_TOKEN>)"""
+    return pool_metrics()
+
 # Import routers (uncomment as you build them)
-# from app.api import auth, scans, websites, reports
+from app.api import reports, websites
+# from app.api import auth, scans
 # app.include_router(auth.router, prefix="/api/auth", tags=["auth"])
 # app.include_router(scans.router, prefix="/api/scans", tags=["scans"])
-# app.include_router(websites.router, prefix="/api/websites", tags=["websites"])
-# app.include_router(reports.router, prefix="/api/reports", tags=["reports"])
+app.include_router(websites.router, prefix="/api/websites", tags=["websites"])
+app.include_router(reports.router, prefix="/api/reports", tags=["reports"])
 
 if __name__ == "__main__":
     import uvicorn
@@ -0,0 +1,127 @@
+"""
+SEO Sentinel Report Cache
+Content-addressed PDF reports, so a rescan with unchanged findings reuses the last render
+"""
+
+import json
+import os
+import shutil
+import time
+from functools import lru_cache
+from pathlib import Path
+
+from app.core.config import config
+
+
+def _link(source, target):
+    """Hard-link source to target atomically; copies across filesystems"""
+    partial = f'{target}.{os.getpid()}.part'
+    try:
+        os.link(source, partial)
+    except FileNotFoundError:
+        raise
+    except OSError:  # another filesystem, or one without hard links (a missing source raises above)
+        shutil.copyfile(source, partial)
+    os.replace(partial, target)
+
+
+class ReportCache:
+    """Rendered PDFs keyed by `SEOReportGenerator.content_key()`
+
+    Each entry is <key>.pdf plus a <key>.json sidecar holding its page
+    count; the sidecar's mtime is the entry's last use. A hit hard-links
+    the entry to the scan's report path, so the scan and the cache own
+    separate names for one file and either can be deleted on its own.
+    Entries unused for max_age_days are evicted, then the least recently
+    used ones while the cache is over max_bytes.
+    """
+
+    def __init__(self, directory=None, max_bytes=None, max_age_days=None):
+        settings = config.REPORT_CACHE
+        self.directory = Path(directory or settings['dir'])
+        self.max_bytes = settings['max_bytes'] if max_bytes is None else max_bytes
+        self.max_age_days = settings['max_age_days'] if max_age_days is None else max_age_days
+        self.hits = 0
+        self.misses = 0
+
+    def _entry(self, key):
+        return self.directory / f'{key}.pdf'
+
+    def fetch(self, key, path):
+        """Link the cached report for key to path; returns its page count, or None on a miss"""
+        entry = self._entry(key)
+        sidecar = entry.with_suffix('.json')
+        try:
+            pages = json.loads(sidecar.read_text())['pages']
+            _link(entry, path)
+            os.utime(sidecar)  # last use, for eviction (the PDF's inode is shared with scan reports)
+        except (FileNotFoundError, ValueError, KeyError):  # not cached, or evicted meanwhile
+            self.misses += 1
+            return None
+        self.hits += 1
+        return pages
+
+    def store(self, key, path, pages):
+        """Add the report rendered at path under key"""
+        self.directory.mkdir(parents=True, exist_ok=True)
+        entry = self._entry(key)
+        _link(path, entry)
+        sidecar = entry.with_suffix('.json')
+        partial = f'{sidecar}.{os.getpid()}.part'
+        with open(partial, 'w') as f:
+            json.dump({'pages': pages, 'bytes': entry.stat().st_size, 'stored_at': time.time()}, f)
+        os.replace(partial, sidecar)
+
+    def evict(self, now=None):
+        """Drop entries unused for max_age_days, then LRU entries while over max_bytes; returns stats"""
+        now = now or time.time()
+        entries = []
+        for entry in self.directory.glob('*.pdf'):
+            try:
+                size = entry.stat().st_size
+            except FileNotFoundError:
+                continue
+            try:
+                used = entry.with_suffix('.json').stat().st_mtime
+            except FileNotFoundError:  # half-stored or half-evicted: goes first
+                used = 0
+            entries.append((used, size, entry))
+        entries.sort(key=lambda item: item[0])
+
+        total = sum(size for _, size, _ in entries)
+        cutoff = now - self.max_age_days * 86400
+        removed = freed = 0
+        for used, size, entry in entries:
+            if used >= cutoff and total <= self.max_bytes:
+                break
+            # Sidecar first: a lookup racing this sees a miss, never a sidecar without its PDF
+            entry.with_suffix('.json').unlink(missing_ok=True)
+            entry.unlink(missing_ok=True)
+            total -= size
+            removed += 1
+            freed += size
+
+        # Leftovers of workers that died mid-store
+        for partial in self.directory.glob('*.part'):
+            try:
+                if partial.stat().st_mtime < now - 3600:
+                    partial.unlink()
+            except FileNotFoundError:
+                pass
+
+        return {'entries': len(entries) - removed, 'bytes': total, 'removed': removed, 'freed_bytes': freed}
+
+    def stats(self):
+        """This process's lookups"""
+        lookups = self.hits + self.misses
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_rate': round(self.hits / lookups, 3) if lookups else None,
+        }
+
+
+@lru_cache(maxsize=1)
+def report_cache():
+    """The process-wide ReportCache, or None when the cache is disabled"""
+    return ReportCache() if config.REPORT_CACHE['enabled'] else None
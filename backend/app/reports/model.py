@@ -0,0 +1,192 @@
+"""
+SEO Sentinel Report Model
+What a report says, whatever its format: built once per scan, laid out as PDF, HTML or JSON
+"""
+
+import json
+import os
+import threading
+from itertools import islice
+
+from app.core.config import config
+from app.crawler.sinks import read_ndjson_group
+
+# Bump when the model's shape changes; cached models of an older version are rebuilt
+MODEL_VERSION = 1
+
+OK = 'ok'
+WARNING = 'warning'
+
+
+def _clip(text, length):
+    text = '' if text is None else str(text)
+    return text[:length] + '...' if len(text) > length else text
+
+
+def broken_link_row(issue):
+    return [_clip(issue['url'], 50), str(issue['status']), _clip(issue['referenced_from'], 40)]
+
+
+def alt_text_row(issue):
+    return [_clip(issue['page_url'], 45), _clip(issue['img_filename'], 30), _clip(issue['page_title'], 40)]
+
+
+def meta_issue_row(issue):
+    details = issue.get('issues')
+    return [_clip(issue.get('page_url'), 50), _clip('; '.join(details) if isinstance(details, list) else details, 60)]
+
+
+# Issue tables in report order. `text` and recommendation texts follow their
+# bold `lead` directly, so they carry their own leading space or punctuation.
+SECTIONS = {
+    'broken_links': {
+        'title': '🔴 Broken Links Found',
+        'lead': '{count} broken links',
+        'text': ' are hurting your SEO. Search engines penalize sites with dead pages.',
+        'columns': ['URL', 'Status', 'Found On'],
+        'row': broken_link_row,
+        'limit': 'max_broken_links_display',
+        'more': '+ {hidden} more broken links not shown...',
+    },
+    'missing_alt_text': {
+        'title': '🖼️ Missing Image Alt Text',
+        'lead': '{count} images',
+        'text': ' lack alt text. This hurts accessibility and prevents Google from indexing your images.',
+        'columns': ['Page', 'Image File', 'Page Title'],
+        'row': alt_text_row,
+        'limit': 'max_alt_text_issues_display',
+        'more': '+ {hidden} more images missing alt text...',
+    },
+    'meta_issues': {
+        'title': '📝 Meta Tag Issues',
+        'lead': '{count} pages',
+        'text': ' are missing a page title or meta description.',
+        'columns': ['Page', 'Issues'],
+        'row': meta_issue_row,
+        'limit': None,  # only in full-detail reports
+        'more': None,
+    },
+}
+
+SUMMARY = (('pages_crawled', 'Pages Crawled'), ('broken_links', 'Broken Links'), ('missing_alt_text', 'Missing Alt Text'))
+
+CTA = {
+    'title': 'Ready to Fix These Issues?',
+    'text': 'Get automated weekly monitoring + AI-powered fix suggestions',
+    'url': 'www.seositinel.com/signup',
+}
+
+
+def issue_reader(data, issue_source=None):
+    """group -> issue iterator: data['issues'] lists, issue_source, or the crawl's NDJSON file"""
+    if 'issues' in data:
+        return lambda group: iter(data['issues'].get(group, []))
+    issues_file = data.get('issues_file')
+    if issue_source is None and issues_file and os.path.exists(issues_file):
+        issue_source = lambda group: read_ndjson_group(issues_file, group)
+    return lambda group: iter(issue_source(group)) if issue_source else iter(())
+
+
+def issue_count(data, group):
+    if 'issues' in data:
+        return len(data['issues'].get(group, []))
+    return data['stats'].get(group) or 0
+
+
+def report_groups(full_detail):
+    """Issue groups the report lists, in order"""
+    groups = ['broken_links', 'missing_alt_text']
+    if full_detail and config.REPORT['include_meta_issues']:
+        groups.append('meta_issues')
+    return groups
+
+
+def _section(group, count, issues, full_detail):
+    spec = SECTIONS[group]
+    limit = None if full_detail or spec['limit'] is None else config.REPORT[spec['limit']]
+    # Full-detail sections keep model_rows rows; the PDF streams the rest from the issue source
+    cap = limit if limit is not None else config.REPORT['model_rows']
+    rows = list(islice(map(spec['row'], issues), cap + 1))
+    complete = limit is not None or len(rows) <= cap
+    rows = rows[:cap]
+    return {
+        'group': group,
+        'title': spec['title'],
+        'lead': spec['lead'].format(count=count),
+        'text': spec['text'],
+        'columns': spec['columns'],
+        'total': count,
+        'rows': rows,
+        'complete': complete,
+        'more': spec['more'].format(hidden=count - limit) if limit is not None and count > limit else None,
+    }
+
+
+def _recommendations(stats):
+    recommendations = []
+    if stats['broken_links'] > 0:
+        recommendations.append({
+            'number': 1,
+            'lead': f"Fix {stats['broken_links']} broken links",
+            'text': ' immediately. Use 301 redirects for moved content or remove dead links.',
+        })
+    if stats['missing_alt_text'] > 0:
+        recommendations.append({
+            'number': 2,
+            'lead': f"Add alt text to {stats['missing_alt_text']} images",
+            'text': '. Use descriptive text that helps visually impaired users and search engines.',
+        })
+    recommendations.append({
+        'number': 3,
+        'lead': 'Schedule weekly monitoring',
+        'text': '. SEO issues compound over time. Upgrade to our automated monitoring plan for $29/month.',
+    })
+    return recommendations
+
+
+def build_report_model(data, full_detail=False, issue_source=None):
+    """The report as a JSON-serialisable dict; reads at most model_rows issues per group
+
+    A section is `complete` when its rows are all the report lists
+    (always, outside full detail); otherwise renderers that need every
+    row stream them from the issue source.
+    """
+    stats = data['stats']
+    issues = issue_reader(data, issue_source)
+    sections = []
+    for group in report_groups(full_detail):
+        count = issue_count(data, group)
+        if count:
+            sections.append(_section(group, count, issues(group), full_detail))
+    return {
+        'version': MODEL_VERSION,
+        'scan_id': data.get('scan_id'),
+        'domain': data['domain'],
+        'full_detail': full_detail,
+        'summary': [
+            {'metric': metric, 'label': label, 'count': stats[metric],
+             'status': WARNING if metric != 'pages_crawled' and stats[metric] > 0 else OK}
+            for metric, label in SUMMARY
+        ],
+        'sections': sections,
+        'recommendations': _recommendations(stats),
+        'cta': CTA,
+    }
+
+
+def load_report_model(path):
+    """A cached model, or None when missing or of an older version"""
+    try:
+        with open(path, encoding='utf-8') as f:
+            model = json.load(f)
+    except (FileNotFoundError, ValueError):
+        return None
+    return model if model.get('version') == MODEL_VERSION else None
+
+
+def save_report_model(path, model):
+    # Unlocked callers (the HTML/JSON views) may save one scan's model at once, so each writes its own .part
+    partial = f'{path}.{os.getpid()}-{threading.get_ident()}.part'
+    with open(partial, 'w', encoding='utf-8') as f:
+        json.dump(model, f, ensure_ascii=False, separators=(',', ':'))
+    os.replace(partial, path)
@@ -11,27 +11,224 @@ from reportlab.platypus import SimpleDocTemplate, Table, TableStyle, Paragraph,
 from reportlab.platypus import Image as RLImage
 from reportlab.lib.enums import TA_CENTER, TA_LEFT, TA_RIGHT
 from datetime import datetime
+from functools import lru_cache
+from itertools import islice
+import hashlib
 import json
 
+from app.core.config import config
+from app.reports.model import OK, SECTIONS, build_report_model, issue_reader, report_groups
+
+
+# Bump whenever the report's layout or wording changes, so cached renders aren't reused
+TEMPLATE_VERSION = 1
+
+# What goes into a report's content key besides its issue rows
+KEY_STATS = ('pages_crawled', 'broken_links', 'missing_alt_text', 'meta_issues')
+KEY_SETTINGS = ('max_broken_links_display', 'max_alt_text_issues_display', 'include_meta_issues',
+                'include_recommendations', 'table_chunk_rows')
+
+
+class FlowableStream:
+    """List-like view of a flowable generator for doc.build()
+
+    build() only works at the front of the story (len, [0], del [0],
+    insert(0, ...), [0:0] = ...), so flowables are produced as layout
+    reaches them and dropped once drawn; a 100k-row report holds a few
+    table chunks at a time instead of the whole story.
+    """
+
+    def __init__(self, flowables, lookahead=8):
+        self._source = iter(flowables)
+        self._buffer = []
+        self.lookahead = lookahead  # covers keepWithNext chains
+
+    def _fill(self, count):
+        while self._source is not None and len(self._buffer) < count:
+            try:
+                self._buffer.append(next(self._source))
+            except StopIteration:
+                self._source = None
+
+    def _fill_for(self, index):
+        if isinstance(index, slice):
+            self._fill(index.stop if index.stop is not None else self.lookahead)
+        else:
+            self._fill(index + 1)
+
+    def __len__(self):
+        self._fill(self.lookahead)
+        return len(self._buffer)
+
+    def __getitem__(self, index):
+        self._fill_for(index)
+        return self._buffer[index]
+
+    def __delitem__(self, index):
+        self._fill_for(index)
+        del self._buffer[index]
+
+    def __setitem__(self, index, value):
+        self._buffer[index] = value
+
+    def insert(self, index, value):
+        self._buffer.insert(index, value)
+
+
+def _issue_table_style(header_color):
+    return TableStyle([
+        ('BACKGROUND', (0, 0), (-1, 0), header_color),
+        ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
+        ('ALIGN', (0, 0), (-1, -1), 'LEFT'),
+        ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
+        ('FONTSIZE', (0, 0), (-1, 0), 10),
+        ('BOTTOMPADDING', (0, 0), (-1, 0), 10),
+        ('BACKGROUND', (0, 1), (-1, -1), colors.white),
+        ('GRID', (0, 0), (-1, -1), 0.5, colors.grey),
+        ('FONTSIZE', (0, 1), (-1, -1), 8),
+        ('VALIGN', (0, 0), (-1, -1), 'TOP'),
+        ('ROWBACKGROUNDS', (0, 1), (-1, -1), [colors.white, colors.lightgrey])
+    ])
+
+
+class ReportStyles:
+    """Colors, stylesheet, paragraph and table styles for every report a process renders
+    
+    Styles are only read while a document is built, so one instance per
+    process (see `report_styles()`) is shared by all generators.
+    """
+    
+    def __init__(self, branding=None):
+        branding = branding or config.BRANDING
+        
+        #color scheme (professional blue theme)
+        self.primary_color = colors.HexColor(branding['primary_color'])
+        self.secondary_color = colors.HexColor(branding['secondary_color'])
+        self.danger_color = colors.HexColor(branding['danger_color'])
+        self.warning_color = colors.HexColor(branding['warning_color'])
+        self.success_color = colors.HexColor(branding['success_color'])
+        
+        self.sheet = getSampleStyleSheet()
+        
+        #Custom styles
+        self.title = ParagraphStyle(
+            'CustomTitle',
+            parent=self.sheet['Heading1'],
+            fontSize=24,
+            textColor=self.primary_color,
+            spaceAfter=30,
+            alignment=TA_CENTER
+        )
+        
+        self.heading = ParagraphStyle(
+            'CustomHeading',
+            parent=self.sheet['Heading2'],
+            fontSize=16,
+            textColor=self.primary_color,
+            spaceAfter=12,
+            spaceBefore=20
+        )
+        
+        self.summary_table = TableStyle([
+            ('BACKGROUND', (0, 0), (-1, 0), self.primary_color),
+            ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
+            ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
+            ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
+            ('FONTSIZE', (0, 0), (-1, 0), 12),
+            ('BOTTOMPADDING', (0, 0), (-1, 0), 12),
+            ('BACKGROUND', (0, 1), (-1, -1), colors.beige),
+            ('GRID', (0, 0), (-1, -1), 1, colors.grey),
+            ('FONTSIZE', (0, 1), (-1, -1), 11),
+            ('ROWBACKGROUNDS', (0, 1), (-1, -1), [colors.white, colors.lightgrey])
+        ])
+        
+        self.issue_tables = {
+            'broken_links': _issue_table_style(self.danger_color),
+            'missing_alt_text': _issue_table_style(self.warning_color),
+            'meta_issues': _issue_table_style(self.secondary_color),
+        }
+
+
+@lru_cache(maxsize=1)
+def report_styles():
+    """The process-wide ReportStyles, built on first use"""
+    return ReportStyles()
+
+
 class SEOReportGenerator:
-    """Generate professional PDF reports from SEO audit data"""
+    """Generate professional PDF reports from SEO audit data
     
-    def __init__(self, data_file, output_pdf='seo_report.pdf'):
+    Lays out the report model (see app.reports.model), built here unless
+    passed in. Issues come from data['issues'] lists, or are streamed per
+    group from `issue_source(group)` (the crawl's NDJSON file by default,
+    or the DB). With full_detail every issue is listed, in page-sized
+    table chunks.
+    """
+    
+    def __init__(self, data_file, output_pdf='seo_report.pdf', data=None, full_detail=False, issue_source=None,
+                 model=None):
         self.data_file = data_file
         self.output_pdf = output_pdf
-        self.data = self._load_data()
+        self.data = data if data is not None else self._load_data()
+        self.full_detail = full_detail
+        self.chunk_rows = config.REPORT['table_chunk_rows']
+        self.issue_source = issue_source
+        self._issues = issue_reader(self.data, issue_source)
+        self.model = model
         
-        #color scheme (professional blue theme)
-        self.primary_color = colors.HexColor('#1e40af')
-        self.secondary_color = colors.HexColor('#3b82f6')
-        self.danger_color = colors.HexColor('#dc2626')
-        self.warning_color = colors.HexColor('#f59e0b')
-        self.success_color = colors.HexColor('#16a34a')
+        self.styles = report_styles()
+        self.primary_color = self.styles.primary_color
         
     def _load_data(self):
         """Load JSON data from crawler"""
         with open(self.data_file, 'r') as f:
             return json.load(f)
+    
+    def content_key(self):
+        """sha256 of everything the report shows but its generation time
+        
+        Covers the template version, branding, layout settings, counters
+        and every issue row as rendered. Rows are summed as a multiset, so
+        the same findings crawled in a different order give the same key.
+        """
+        digest = hashlib.sha256(json.dumps({
+            'template': TEMPLATE_VERSION,
+            'branding': config.BRANDING,
+            'settings': {key: config.REPORT[key] for key in KEY_SETTINGS},
+            'domain': self.data['domain'],
+            'stats': {key: self.data['stats'].get(key) for key in KEY_STATS},
+            'full_detail': self.full_detail,
+        }, sort_keys=True).encode('utf-8'))
+        for group in report_groups(self.full_detail):
+            row = SECTIONS[group]['row']
+            total = count = 0
+            for issue in self._issues(group):
+                row_hash = hashlib.blake2b(json.dumps(row(issue)).encode('utf-8'), digest_size=32).digest()
+                total = (total + int.from_bytes(row_hash, 'big')) % 2 ** 256
+                count += 1
+            digest.update(f'{group}:{count}:{total:064x}'.encode('utf-8'))
+        return digest.hexdigest()
+    
+    def _issue_tables(self, header, col_widths, rows, style):
+        """Yield rows as tables of chunk_rows, so no table ever spans many pages"""
+        rows = iter(rows)
+        while True:
+            chunk = list(islice(rows, self.chunk_rows))
+            if not chunk:
+                return
+            table = Table([header] + chunk, colWidths=col_widths, repeatRows=1)
+            table.setStyle(style)
+            yield table
+    
+    def _section(self, section, col_widths):
+        """Heading, intro and issue tables of one model section"""
+        group = section['group']
+        yield Paragraph(section['title'], self.styles.heading)
+        yield Paragraph(f"<b>{section['lead']}</b>{section['text']}", self.styles.sheet['Normal'])
+        yield Spacer(1, 0.2 * inch)
+        # Past the model's rows, a full-detail section streams the rest from the issue source
+        rows = section['rows'] if section['complete'] else map(SECTIONS[group]['row'], self._issues(group))
+        yield from self._issue_tables(section['columns'], col_widths, rows, self.styles.issue_tables[group])
         
     def _create_header(self, canvas, doc):
         """Add header to each page"""
@@ -70,190 +267,75 @@ class SEOReportGenerator:
             bottomMargin=inch * 0.8
         )
         
-        styles = getSampleStyleSheet()
-        story = []
+        if self.model is None:
+            self.model = build_report_model(self.data, self.full_detail, self.issue_source)
         
-        #Custom styles
-        title_style = ParagraphStyle(
-            'CustomTitle',
-            parent=Styles['Heading1'],
-            fontSize=24,
-            textColor=self.primary_color,
-            spaceAfter=30,
-            alignment=TA_CENTER
-        )
+        #Build PDF: flowables are generated while pages are laid out
+        doc.build(FlowableStream(self._story()), onFirstPage=self._add_page_elements, onLaterPages=self._add_page_elements)
+        self.pages = doc.page
+        print(f"✅ PDF Report generated: {self.output_pdf}")
         
-        heading_style = ParagraphStyle(
-            'CustomHeading',
-            parent=styles['Heading2'],
-            fontSize=16,
-            textColor=self.primary_color,
-            spaceAfter=12,
-            spaceBefore=20
-        )
+    def _story(self):
+        """Yield the report's flowables in order"""
+        model = self.model
+        styles = self.styles.sheet
+        sections = {section['group']: section for section in model['sections']}
         
         #1. Title Page
-        story.append(Spacer(1, 2 * inch))
-        story.append(Paragraph(f"SEO Health Report", title_style))
-        story.append(Spacer(1, 0.3 * inch))
-        story.append(Paragraph(f"<b>{self.data['domain']}</b>", styles['Title']))
-        story.append(Spacer(1, 0.5 * inch))
+        yield Spacer(1, 2 * inch)
+        yield Paragraph(f"SEO Health Report", self.styles.title)
+        yield Spacer(1, 0.3 * inch)
+        yield Paragraph(f"<b>{model['domain']}</b>", styles['Title'])
+        yield Spacer(1, 0.5 * inch)
         
         #Executive Summary Box
-        summary_data = [
-            ['Metric', 'Count', 'Status'],
-            ['Pages Crawled', str(self.data['stats']['pages_crawled']), '✓'],
-            ['Broken Links', str(self.data['stats']['broken_links']), 
-             '⚠️' if self.data['stats']['broken_links'] > 0 else '✓'],
-            ['Missing Alt Text', str(self.data['stats']['missing_alt_text']),
-             '⚠️' if self.data['stats']['missing_alt_text'] > 0 else '✓']
+        summary_data = [['Metric', 'Count', 'Status']] + [
+            [metric['label'], str(metric['count']), '✓' if metric['status'] == OK else '⚠️']
+            for metric in model['summary']
         ]
         
         summary_table = Table(summary_data, colWidths=[2.5*inch, 1.5*inch, 1*inch])
-        summary_table.setStyle(TableStyle([
-            ('BACKGROUND', (0, 0), (-1, 0), self.primary_color),
-            ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
-            ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
-            ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
-            ('FONTSIZE', (0, 0), (-1, 0), 12),
-            ('BOTTOMPADDING', (0, 0), (-1, 0), 12),
-            ('BACKGROUND', (0, 1), (-1, -1), colors.beige),
-            ('GRID', (0, 0), (-1, -1), 1, colors.grey),
-            ('FONTSIZE', (0, 1), (-1, -1), 11),
-            ('ROWBACKGROUNDS', (0, 1), (-1, -1), [colors.white, colors.lightgrey])
-        ]))
-        
-        story.append(summary_table)
-        story.append(PageBreak())
-        
-        #2. Broken Links Section
-        if self.date['issues']['broken_links']:
-            story.append(Paragraph("🔴 Broken Links Found", heading_style))
-            story.append(Paragraph(
-                f"<b>{len(self.data['issues']['broken_links'])} broken links</b> are hurting your SEO. "
-                "Search engines penalize sites with dead pages.",
-                styles['Normal']
-            ))
-            story.append(Spacer(1, 0.2 * inch))
-            
-            #Create Table
-            broken_data = [['URL', 'Status', 'Found On']]
-            for issue in self.data['issues']['broken_links'][:20]:
-                url = issue['url'][:50] + '...' if len(issue['url']) > 50 else issue['url']
-                ref = issue['referenced_from'][:40] + '...' if len(issue['referenced_from']) > 40 else issue['referenced_from']
-                broken_data.append([url, str(issue['status']), ref])
-                
-            broken_table = Table(broken_data, colWidths=[3*inch, 0.8*inch, 2.2*inch])
-            broken_table.setStyle(Table([
-                ('BACKGROUND', (0, 0), (-1, 0), self.danger_color),
-                ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
-                ('ALIGN', (0, 0), (-1, -1), 'LEFT'),
-                ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
-                ('FONTSIZE', (0, 0), (-1, 0), 10),
-                ('BOTTOMPADDING', (0, 0), (-1, 0), 10),
-                ('BACKGROUND', (0, 1), (-1, -1), colors.white),
-                ('GRID', (0, 0), (-1, -1), 0.5, colors.grey),
-                ('FONTSIZE', (0, 1), (-1, -1), 8),
-                ('VALIGN', (0, 0), (-1, -1), 'TOP'),
-                ('ROWBACKGROUNDS', (0, 1), (-1, -1), [colors.white, colors.lightgrey])
-            ]))
-            
-            story.append(broken_table)
-            story.append(Spacer(1, 0.3 * inch))
-            
-            if len(self.data['issues']['broken_links']) > 20:
-                story.append(Paragraph(
-                    f"<i>+ {len(self.data['issues']['broken_links']) - 20} more broken links not shown...</i>",
-                    styles['Italic']
-                ))
-                
-        story.append(PageBreak())
-        
-        #3. Missing ALT Text Section
-        if self.data['issues']['missing_alt_text']:
-            story.append(Paragraph("🖼️ Missing Image Alt Text", heading_style))
-            story.append(Paragraph(
-                f"<b>{len(self.data['issues']['missing_alt_text'])} images</b> lack alt text. "
-                "This hurts accessibility and prevents Google from indexing your images.",
-                styles['Normal']
-            ))
-            story.append(Spacer(1, 0.2 * inch))
-            
-            #Create Table
-            alt_data = [['Page', 'Image File', 'Page Title']]
-            for issue in self.data['issues']['missing_alt_text'][:25]:
-                page = issue['page_url'][:45] + '...' if len(issue['page_url']) > 45 else issue['page_url']
-                img = issue['img_filename'][:30] + '...' if len(issue['img_filename']) > 30 else issue['img_filename']
-                title = issue['page_title'][:40] + '...' if len(issue['page_title']) > 40 else issue['page_title']
-                alt_data.append([page, img, title])
-            
-            alt_table = Table(alt_data, colWidths=[2.5*inch, 2*inch, 1.5*inch])
-            alt_table.setStyle(TableStyle([
-                ('BACKGROUND', (0, 0), (-1, 0), self.warning_color),
-                ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
-                ('ALIGN', (0, 0), (-1, -1), 'LEFT'),
-                ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
-                ('FONTSIZE', (0, 0), (-1, 0), 10),
-                ('BOTTOMPADDING', (0, 0), (-1, 0), 10),
-                ('BACKGROUND', (0, 1), (-1, -1), colors.white),
-                ('GRID', (0, 0), (-1, -1), 0.5, colors.grey),
-                ('FONTSIZE', (0, 1), (-1, -1), 8),
-                ('VALIGN', (0, 0), (-1, -1), 'TOP'),
-                ('ROWBACKGROUNDS', (0, 1), (-1, -1), [colors.white, colors.lightgrey])
-            ]))
-            
-            story.append(alt_table)
-            story.append(Spacer(1, 0.3 * inch))
-            
-            if len(self.data['issues']['missing_alt_text']) > 25:
-                story.append(Paragraph(
-                    f"<i>+ {len(self.data['issues']['missing_alt_text']) - 25} more images missing alt text...</i>",
-                    styles['Italic']
-                ))
-        
-        story.append(PageBreak())
+        summary_table.setStyle(self.styles.summary_table)
         
-        #4. Recommendations
-        story.append(Paragraph("💡 Recommended Actions", heading_style))
+        yield summary_table
+        yield PageBreak()
         
-        recommendations = []
-        if self.data['stats']['broken_links'] > 0:
-            recommendations.append(
-                f"1. <b>Fix {self.data['stats']['broken_links']} broken links</b> immediately. "
-                "Use 301 redirects for moved content or remove dead links."
-            )
+        #2. Broken Links and 3. Missing ALT Text, a page each
+        for group, col_widths in (('broken_links', [3*inch, 0.8*inch, 2.2*inch]),
+                                  ('missing_alt_text', [2.5*inch, 2*inch, 1.5*inch])):
+            section = sections.get(group)
+            if section:
+                yield from self._section(section, col_widths)
+                yield Spacer(1, 0.3 * inch)
+                if section['more']:
+                    yield Paragraph(f"<i>{section['more']}</i>", styles['Italic'])
+            yield PageBreak()
         
-        if self.data['stats']['missing_alt_text'] > 0:
-            recommendations.append(
-                f"2. <b>Add alt text to {self.data['stats']['missing_alt_text']} images</b>. "
-                "Use descriptive text that helps visually impaired users and search engines."
-            )
+        #4. Meta Tag Issues (full-detail reports list every page)
+        if 'meta_issues' in sections:
+            yield from self._section(sections['meta_issues'], [2.8*inch, 3.2*inch])
+            yield PageBreak()
         
-        recommendations.append(
-            "3. <b>Schedule weekly monitoring</b>. SEO issues compound over time. "
-            "Upgrade to our automated monitoring plan for $29/month."
-        )
+        #5. Recommendations
+        yield Paragraph("💡 Recommended Actions", self.styles.heading)
         
-        for rec in recommendations:
-            story.append(Paragraph(rec, styles['Normal']))
-            story.append(Spacer(1, 0.15 * inch))
+        for rec in model['recommendations']:
+            yield Paragraph(f"{rec['number']}. <b>{rec['lead']}</b>{rec['text']}", styles['Normal'])
+            yield Spacer(1, 0.15 * inch)
             
-        story.append(Spacer(1, 0.5 * inch))
+        yield Spacer(1, 0.5 * inch)
         
         #CTA Box
-        cta_text = """
+        cta = model['cta']
+        cta_text = f"""
         <para align=center>
-        <b><font size=14 color='#1e40af'>Ready to Fix These Issues?</font></b><br/>
-        <font size=11>Get automated weekly monitoring + AI-powered fix suggestions</font><br/>
-        <font size=10>Visit: <b>www.seositinel.com/signup</b></font>
+        <b><font size=14 color='{config.BRANDING['primary_color']}'>{cta['title']}</font></b><br/>
+        <font size=11>{cta['text']}</font><br/>
+        <font size=10>Visit: <b>{cta['url']}</b></font>
         </para>
         """
         
-        story.append(Paragraph(cta_text, styles['Normal']))
-        
-        #Build PDF
-        doc.build(story, onFirstPage=self._add_page_elements, onLaterPages=self._add_page_elements)
-        print(f"✅ PDF Report generated: {self.output_pdf}")
+        yield Paragraph(cta_text, styles['Normal'])
 
 #CLI Usage
 if __name__ == '__main__':
@@ -264,7 +346,7 @@ if __name__ == '__main__':
         sys.exit(1)
         
     json_file = sys.argv[1]
-    output_files = sys.argv[2] if len(sysd.argv) > 2 else 'seo-report.pdf'
+    output_file = sys.argv[2] if len(sys.argv) > 2 else 'seo-report.pdf'
     
     generator = SEOReportGenerator(json_file, output_file)
     generator.generate()
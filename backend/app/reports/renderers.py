@@ -0,0 +1,99 @@
+"""
+SEO Sentinel Report Renderers
+HTML and compact JSON views of a report model, for the API and dashboard (the PDF is pdf_generator's)
+"""
+
+import json
+from html import escape
+
+from app.core.config import config
+from app.reports.model import OK
+
+STATUS_MARKS = {OK: '✓', 'warning': '⚠️'}
+
+
+def report_json(model):
+    """Compact JSON: counts, rows as arrays, recommendations as plain sentences"""
+    return json.dumps({
+        'scan_id': model['scan_id'],
+        'domain': model['domain'],
+        'full_detail': model['full_detail'],
+        'summary': {metric['metric']: metric['count'] for metric in model['summary']},
+        'sections': {
+            section['group']: {
+                'columns': section['columns'],
+                'total': section['total'],
+                'complete': section['complete'],
+                'rows': section['rows'],
+            }
+            for section in model['sections']
+        },
+        'recommendations': [rec['lead'] + rec['text'] for rec in model['recommendations']],
+    }, ensure_ascii=False, separators=(',', ':'))
+
+
+def _table(columns, rows, css_class=''):
+    head = ''.join(f'<th>{escape(column)}</th>' for column in columns)
+    body = ''.join('<tr>' + ''.join(f'<td>{escape(str(cell))}</td>' for cell in row) + '</tr>' for row in rows)
+    return f'<table class="{css_class}"><thead><tr>{head}</tr></thead><tbody>{body}</tbody></table>'
+
+
+def _section(section, pdf_url):
+    html = [
+        f'<section id="{section["group"]}" class="{section["group"]}">',
+        f'<h2>{escape(section["title"])}</h2>',
+        f'<p><b>{escape(section["lead"])}</b>{escape(section["text"])}</p>',
+        _table(section['columns'], section['rows']),
+    ]
+    if section['more']:
+        html.append(f'<p class="more">{escape(section["more"])}</p>')
+    if not section['complete']:
+        hidden = section['total'] - len(section['rows'])
+        link = f' <a href="{escape(pdf_url)}">Download the full PDF report</a>' if pdf_url else ''
+        html.append(f'<p class="more">+ {hidden} more not shown here.{link}</p>')
+    html.append('</section>')
+    return ''.join(html)
+
+
+def report_html(model, pdf_url=None, branding=None):
+    """The report as one standalone HTML page (inline CSS, branding colors)"""
+    branding = branding or config.BRANDING
+    summary = _table(
+        ['Metric', 'Count', 'Status'],
+        [[metric['label'], metric['count'], STATUS_MARKS[metric['status']]] for metric in model['summary']],
+        'summary',
+    )
+    recommendations = ''.join(
+        f'<li value="{rec["number"]}"><b>{escape(rec["lead"])}</b>{escape(rec["text"])}</li>'
+        for rec in model['recommendations']
+    )
+    cta = model['cta']
+    domain = escape(model['domain'])
+    return f'''<!DOCTYPE html>
+<html lang="en"><head><meta charset="utf-8"><title>SEO Health Report - {domain}</title>
+<meta name="viewport" content="width=device-width, initial-scale=1">
+<style>
+body{{font-family:Helvetica,Arial,sans-serif;max-width:60rem;margin:2rem auto;padding:0 1rem;color:#111}}
+h1,h2{{color:{branding['primary_color']}}}
+table{{border-collapse:collapse;width:100%;margin:1rem 0;font-size:.85rem}}
+th,td{{border:1px solid #999;padding:.3rem .5rem;text-align:left;vertical-align:top;word-break:break-all}}
+th{{color:#fff;background:{branding['secondary_color']}}}
+tbody tr:nth-child(even){{background:#eee}}
+.summary th{{background:{branding['primary_color']}}}
+.broken_links th{{background:{branding['danger_color']}}}
+.missing_alt_text th{{background:{branding['warning_color']}}}
+.more{{font-style:italic}}
+.cta{{text-align:center;margin:2rem 0}}
+footer{{color:#777;font-size:.8rem;margin-top:2rem}}
+</style></head>
+<body>
+<h1>SEO Health Report</h1>
+<p><b>{domain}</b></p>
+{summary}
+{''.join(_section(section, pdf_url) for section in model['sections'])}
+<h2>💡 Recommended Actions</h2>
+<ol>{recommendations}</ol>
+<div class="cta"><b>{escape(cta['title'])}</b><br>{escape(cta['text'])}<br>Visit: <b>{escape(cta['url'])}</b></div>
+<footer>{escape(branding['company_name'])} - Automated Website Health Monitoring</footer>
+</body></html>
+'''
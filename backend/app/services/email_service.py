@@ -0,0 +1,100 @@
+"""
+SEO Sentinel Email Service
+Sends scan report emails through the configured provider and logs every attempt
+"""
+
+import base64
+import os
+
+from sqlalchemy import select
+
+from app.core.config import config
+from app.db.models import EmailLog
+
+
+class EmailService:
+    """Report emails for completed scans
+
+    `send_report` is idempotent: a scan whose report email was already
+    sent (or skipped because no provider is configured) is not emailed
+    again when its task is retried.
+    """
+
+    def __init__(self, session):
+        self.session = session
+        self.settings = config.EMAIL
+
+    def recipient(self, scan):
+        return scan.website.notification_email or scan.user.email
+
+    def send_report(self, scan):
+        """Email the scan's PDF report; returns the EmailLog row"""
+        sent = self.session.scalars(
+            select(EmailLog).where(
+                EmailLog.scan_id == scan.id,
+                EmailLog.email_type == 'report',
+                EmailLog.status.in_(['sent', 'skipped']),
+            )
+        ).first()
+        if sent is not None:
+            return sent
+
+        total = (scan.broken_links_count or 0) + (scan.missing_alt_text_count or 0) + (scan.meta_issues_count or 0)
+        subject = f"SEO report for {scan.website.domain}: {total} issues found"
+        html = (
+            f"<p>Your {self.settings['from_name']} scan of <b>{scan.website.domain}</b> is complete.</p>"
+            f"<ul><li>Pages crawled: {scan.pages_crawled or 0}</li>"
+            f"<li>Broken links: {scan.broken_links_count or 0}</li>"
+            f"<li>Images missing alt text: {scan.missing_alt_text_count or 0}</li>"
+            f"<li>New since last scan: {scan.new_issues_count or 0}, fixed: {scan.resolved_issues_count or 0}</li></ul>"
+        )
+        # With lazy PDFs the report is a link; a PDF is only attached when one was already rendered
+        attachment = scan.report_pdf_path if scan.report_pdf_path and os.path.exists(scan.report_pdf_path) else None
+        if scan.report_url:
+            html += f'<p><a href="{scan.report_url}">View the full report</a></p>'
+        if attachment:
+            html += "<p>The full report is attached.</p>"
+
+        log = EmailLog(
+            user_id=scan.user_id, scan_id=scan.id, recipient=self.recipient(scan),
+            subject=subject, email_type='report',
+        )
+        self.session.add(log)
+        try:
+            log.provider_message_id, log.status = self.deliver(log.recipient, subject, html, attachment)
+        except Exception as e:
+            log.status = 'failed'
+            log.error_message = str(e)
+            self.session.commit()
+            raise
+        self.session.commit()
+        return log
+
+    def deliver(self, recipient, subject, html, attachment_path=None):
+        """Hand one email to the provider; returns (message_id, status)"""
+        if not self.settings['api_key']:
+            return None, 'skipped'  # Development: no provider configured
+        if self.settings['provider'] != 'sendgrid':
+            raise ValueError(f"Unsupported email provider: {self.settings['provider']}")
+
+        from sendgrid import SendGridAPIClient
+        from sendgrid.helpers.mail import Attachment, Email, Mail
+
+        message = Mail(
+            from_email=Email(self.settings['from_email'], self.settings['from_name']),
+            to_emails=recipient,
+            subject=subject,
+            html_content=html,
+        )
+        message.reply_to = self.settings['reply_to']
+        if attachment_path and os.path.exists(attachment_path):
+            with open(attachment_path, 'rb') as f:
+                encoded = base64.b64encode(f.read()).decode('ascii')
+            message.attachment = Attachment(
+                encoded, os.path.basename(attachment_path), 'application/pdf', 'attachment'
+            )
+
+        response = SendGridAPIClient(self.settings['api_key']).send(message)
+        if response.status_code >= 400:
+            raise RuntimeError(f'SendGrid returned {response.status_code}')
+        return response.headers.get('X-Message-Id'), 'sent'
@@ -0,0 +1,216 @@
+"""
+SEO Sentinel Report Service
+Renders many scans' PDF reports side by side on a pool of worker processes
+"""
+
+import os
+import time
+from datetime import datetime, timedelta
+
+# billiard is Celery's multiprocessing fork: unlike multiprocessing, its
+# pools can be started from inside a (daemonic) prefork worker process
+from billiard import Pool
+from sqlalchemy import func, select, update
+
+from app.core.config import config
+from app.db.database import after_fork, session_scope
+from app.db.models import Scan
+from app.reports.model import build_report_model, load_report_model, save_report_model
+from app.reports.pdf_generator import report_styles
+from app.services.scan_service import (
+    db_issue_source, full_detail_report, render_lock, report_data, report_model_path, report_path, write_report,
+)
+
+
+def _init_worker():
+    """Pool initializer: fresh DB connections, styles built once per worker"""
+    after_fork()
+    report_styles()
+
+
+def _write(job, issue_source=None):
+    """Model (kept when the job names a model_path) and PDF of one job
+
+    Runs under the scan's render lock, like `ScanService.render_report`;
+    returns None when the PDF is already there (rendered for a download,
+    or by another batch, since the job was planned).
+    """
+    with render_lock(job['scan_id']):
+        if os.path.exists(job['path']):
+            return None
+        model_path = job.get('model_path')
+        model = load_report_model(model_path) if model_path else None
+        if model is None:
+            model = build_report_model(job['data'], job['full_detail'], issue_source)
+            if model_path:
+                save_report_model(model_path, model)
+        written = write_report(job['path'], job['data'], job['full_detail'], issue_source, model=model)
+    return {**written, 'model_path': model_path}
+
+
+def render_job(job):
+    """Render one job dict; returns its outcome instead of raising, so one bad scan can't sink a batch"""
+    started = time.perf_counter()
+    outcome = {'scan_id': job['scan_id'], 'path': job['path'], 'model_path': None, 'pages': 0, 'cache_key': None,
+               'cache_hit': False, 'existing': False, 'error': None}
+    try:
+        issues_file = job['data'].get('issues_file')
+        if issues_file and os.path.exists(issues_file):
+            written = _write(job)
+        else:
+            with session_scope() as session:
+                written = _write(job, db_issue_source(session, job['scan_id']))
+        if written is None:
+            outcome['existing'] = True
+        else:
+            outcome.update(written)
+    except Exception as e:
+        outcome['error'] = f'{type(e).__name__}: {e}'
+    outcome['seconds'] = time.perf_counter() - started
+    return outcome
+
+
+def render_jobs(jobs, processes=None):
+    """Render job dicts across `processes` workers (in this process when 1); returns outcomes"""
+    processes = min(processes or config.REPORT['render_processes'] or os.cpu_count() or 1, len(jobs))
+    if processes <= 1:
+        report_styles()
+        return [render_job(job) for job in jobs]
+    pool = Pool(processes, initializer=_init_worker)
+    try:
+        # Biggest reports first, so a long one doesn't start last and hold up the batch.
+        # apply_async rather than imap: billiard's pool takes ~30s to shut down after a map/imap
+        ordered = sorted(jobs, key=lambda job: -job.get('weight', 0))
+        results = [pool.apply_async(render_job, (job,)) for job in ordered]
+        outcomes = [result.get() for result in results]
+        pool.close()
+    except BaseException:
+        pool.terminate()
+        raise
+    pool.join()
+    return outcomes
+
+
+def cache_hit_rate(session, since):
+    """Share of the reports of scans completed since `since` that came from the report cache"""
+    hits, reports = session.execute(
+        select(func.count().filter(Scan.report_cache_hit.is_(True)), func.count(Scan.report_cache_hit))
+        .where(Scan.completed_at >= since)
+    ).one()
+    return {'reports': reports, 'cache_hits': hits, 'hit_rate': round(hits / reports, 3) if reports else None}
+
+
+def evict_idle_pdfs(session, idle_days=None, now=None, batch_size=1000):
+    """Delete PDFs not rendered or downloaded for idle_days; returns counts
+
+    The scan keeps its report model and link, so the next download
+    renders the PDF again (often straight from the report cache). Each
+    PDF goes under its render lock, after checking it is still idle: a
+    download marks it used under the same lock before serving it.
+    """
+    idle_days = config.REPORT['pdf_idle_days'] if idle_days is None else idle_days
+    cutoff = (now or datetime.now()) - timedelta(days=idle_days)
+    idle = (
+        Scan.report_pdf_path.is_not(None),
+        func.coalesce(Scan.report_accessed_at, Scan.completed_at) < cutoff,
+    )
+    evicted = freed = 0
+    last_id = 0
+    while True:
+        scan_ids = session.scalars(
+            select(Scan.id).where(Scan.id > last_id, *idle).order_by(Scan.id).limit(batch_size)
+        ).all()
+        session.commit()
+        if not scan_ids:
+            break
+        last_id = scan_ids[-1]
+        for scan_id in scan_ids:
+            with render_lock(scan_id):
+                path = session.scalar(select(Scan.report_pdf_path).where(Scan.id == scan_id, *idle))
+                if path is None:
+                    continue  # downloaded since the batch was read
+                try:
+                    freed += os.path.getsize(path)
+                    os.remove(path)
+                except FileNotFoundError:
+                    pass
+                session.execute(
+                    update(Scan).where(Scan.id == scan_id).values(report_pdf_path=None)
+                    .execution_options(synchronize_session=False)
+                )
+                session.commit()
+            evicted += 1
+    return {'evicted': evicted, 'freed_bytes': freed}
+
+
+class ReportRenderService:
+    """Batch rendering of scan reports (weekly report runs, backfills)
+
+    Jobs carry only the scan's counters and its issue file path; each
+    worker streams issues itself (NDJSON, or the DB when the file is
+    gone) and writes through a .part file under the scan's render lock,
+    like `ScanService.render_report`. Scans that already have a report on
+    disk are skipped.
+    """
+
+    def __init__(self, session, processes=None):
+        self.session = session
+        self.processes = processes
+
+    def jobs(self, scan_ids):
+        scans = self.session.scalars(select(Scan).where(Scan.id.in_(list(scan_ids)))).all()
+        jobs = []
+        for scan in scans:
+            if scan.report_pdf_path and os.path.exists(scan.report_pdf_path):
+                continue
+            data = report_data(scan)
+            jobs.append({
+                'scan_id': scan.id,
+                'path': report_path(scan),
+                'model_path': scan.report_model_path or report_model_path(scan),
+                'data': data,
+                'full_detail': full_detail_report(scan),
+                'weight': sum(value for key, value in data['stats'].items() if key != 'pages_crawled'),
+            })
+        return jobs
+
+    def render(self, scan_ids):
+        """Render the scans' missing reports; returns batch throughput stats"""
+        started = time.perf_counter()
+        scan_ids = list(scan_ids)
+        jobs = self.jobs(scan_ids)
+        outcomes = render_jobs(jobs, self.processes) if jobs else []
+
+        failed = {}
+        existing = 0
+        for outcome in outcomes:
+            if outcome['error']:
+                failed[outcome['scan_id']] = outcome['error']
+                continue
+            scan = self.session.get(Scan, outcome['scan_id'])
+            if outcome['existing']:
+                # Whoever rendered it records it; only fill in a path they didn't get to commit
+                existing += 1
+                self.session.refresh(scan)
+                scan.report_pdf_path = scan.report_pdf_path or outcome['path']
+                continue
+            scan.report_pdf_path = outcome['path']
+            if outcome['model_path']:
+                scan.report_model_path = outcome['model_path']
+            scan.report_cache_key = outcome['cache_key']
+            scan.report_cache_hit = outcome['cache_hit']
+        self.session.commit()
+
+        seconds = time.perf_counter() - started
+        rendered = len(outcomes) - len(failed) - existing
+        pages = sum(outcome['pages'] for outcome in outcomes)
+        return {
+            'rendered': rendered,  # including reports linked from the report cache
+            'skipped': len(scan_ids) - len(jobs) + existing,
+            'failed': failed,
+            'cache_hits': sum(1 for outcome in outcomes if outcome['cache_hit']),
+            'pages': pages,
+            'seconds': round(seconds, 3),
+            'reports_per_second': round(rendered / seconds, 2) if seconds else None,
+            'pages_per_second': round(pages / seconds, 2) if seconds else None,
+        }
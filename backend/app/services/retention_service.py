@@ -0,0 +1,248 @@
+"""
+SEO Sentinel Retention Service
+Archives expired scans, issues and email logs to compressed NDJSON, then deletes them in small batches
+"""
+
+import enum
+import gzip
+import json
+import os
+import time
+from datetime import date, datetime, timedelta
+from pathlib import Path
+
+try:
+    import zstandard
+except ImportError:  # optional: archives fall back to gzip
+    zstandard = None
+
+from sqlalchemy import delete, func, or_, select
+
+from app.core.config import config
+from app.db.models import EmailLog, Issue, Scan, ScanStatus, SubscriptionTier, User
+
+# Scan files removed together with the scan row
+SCAN_ARTIFACTS = ('report_json_path', 'report_model_path', 'report_pdf_path', 'page_snapshots_path')
+
+
+def _json_value(value):
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    if isinstance(value, enum.Enum):
+        return value.value
+    return value
+
+
+def _record(kind, row):
+    return {'record': kind, **{key: _json_value(value) for key, value in row.items()}}
+
+
+class ArchiveWriter:
+    """Compressed NDJSON archive file (zstd when available, otherwise gzip)
+
+    Written to a .part file and renamed on close, so an archive on disk is
+    always complete. Each retention run writes new files; if a run dies
+    between archiving and deleting, the next run archives the surviving
+    rows again, so parts may overlap - row ids are unique.
+    """
+
+    def __init__(self, path, compression=None):
+        compression = compression or config.RETENTION['compression']
+        self.compression = 'zstd' if compression == 'zstd' and zstandard is not None else 'gzip'
+        self.path = f"{path}.ndjson.{'zst' if self.compression == 'zstd' else 'gz'}"
+        self.rows = 0
+
+        Path(self.path).parent.mkdir(parents=True, exist_ok=True)
+        self._raw = open(self.path + '.part', 'wb')
+        if self.compression == 'zstd':
+            self._file = zstandard.ZstdCompressor(level=10).stream_writer(self._raw, closefd=False)
+        else:
+            self._file = gzip.GzipFile(fileobj=self._raw, mode='wb', compresslevel=6)
+
+    def write(self, kind, row):
+        self._file.write((json.dumps(_record(kind, row), separators=(',', ':')) + '\n').encode('utf-8'))
+        self.rows += 1
+
+    def close(self):
+        """Finish the stream, fsync and publish the archive; returns its path"""
+        self._file.close()
+        self._raw.flush()
+        os.fsync(self._raw.fileno())
+        self._raw.close()
+        os.replace(self.path + '.part', self.path)
+        return self.path
+
+    def abort(self):
+        try:
+            self._file.close()
+        finally:
+            self._raw.close()
+            os.remove(self.path + '.part')
+
+
+def read_archive(path):
+    """Yield the records of an archive file"""
+    if str(path).endswith('.zst'):
+        with open(path, 'rb') as raw:
+            stream = zstandard.ZstdDecompressor().stream_reader(raw)
+            for line in stream.read().splitlines():
+                yield json.loads(line)
+    else:
+        with gzip.open(path, 'rt', encoding='utf-8') as f:
+            for line in f:
+                yield json.loads(line)
+
+
+class RetentionService:
+    """Expire scan history past each subscription tier's retention period
+
+    A scan expires once it finished more than Config.RETENTION['scan_days']
+    days (for its owner's tier) ago; a website's latest completed scan never
+    expires. Issues are stored under the scan that first found them, so an
+    expired scan can still own issues that are open today: only its issues
+    resolved before the cutoff are archived and deleted, and the scan row
+    itself goes once nothing references it. Every delete touches at most
+    `batch_size` rows in its own short transaction, instead of one
+    ON DELETE CASCADE sweep over a scan's entire issue set.
+    """
+
+    def __init__(self, session, archive_dir=None, batch_size=None, batch_pause=None):
+        settings = config.RETENTION
+        self.session = session
+        self.archive_dir = Path(archive_dir or settings['archive_dir'])
+        self.batch_size = batch_size or settings['batch_size']
+        self.batch_pause = settings['batch_pause'] if batch_pause is None else batch_pause
+        self.stats = {}
+
+    def run(self, now=None, max_scans=None):
+        """One retention pass over every tier plus email logs; returns stats"""
+        now = now or datetime.now()
+        self.stats = {
+            'scans_deleted': 0, 'scans_trimmed': 0, 'issues_deleted': 0,
+            'email_logs_deleted': 0, 'archives': [], 'batches': 0, 'max_batch_ms': 0.0,
+        }
+        for scan in self.expired_scans(now, max_scans):
+            self.expire_scan(scan, now - timedelta(days=config.get_retention_days(scan['subscription_tier'])))
+        self.expire_email_logs(now - timedelta(days=config.RETENTION['email_log_days']))
+        return self.stats
+
+    def expired_scans(self, now, limit=None):
+        """Finished scans past their tier's cutoff, oldest first, as row mappings"""
+        latest = (
+            select(func.max(Scan.id))
+            .where(Scan.status == ScanStatus.COMPLETED)
+            .group_by(Scan.website_id)
+        )
+        expired = []
+        for tier in SubscriptionTier:
+            cutoff = now - timedelta(days=config.get_retention_days(tier))
+            tier_match = User.subscription_tier == tier
+            if tier == SubscriptionTier.FREE:
+                tier_match = or_(tier_match, User.subscription_tier.is_(None))
+            query = (
+                select(Scan.__table__, User.subscription_tier)
+                .join(User, User.id == Scan.user_id)
+                .where(
+                    tier_match,
+                    Scan.status.in_([ScanStatus.COMPLETED, ScanStatus.FAILED]),
+                    func.coalesce(Scan.completed_at, Scan.created_at) < cutoff,
+                    Scan.id.notin_(latest),
+                )
+                .order_by(Scan.id)
+            )
+            if limit:
+                query = query.limit(limit)
+            expired.extend(dict(row) for row in self.session.execute(query).mappings())
+        expired.sort(key=lambda scan: scan['id'])
+        return expired[:limit] if limit else expired
+
+    def _expired_issues(self, scan_id, cutoff):
+        return (
+            select(Issue.__table__)
+            .where(
+                Issue.scan_id == scan_id,
+                Issue.is_resolved.is_(True),
+                or_(Issue.resolved_at.is_(None), Issue.resolved_at < cutoff),
+            )
+            .order_by(Issue.id)
+        )
+
+    def expire_scan(self, scan, cutoff):
+        """Archive and delete one expired scan's closed issues, then the scan if it is empty"""
+        issues = self._expired_issues(scan['id'], cutoff)
+        first = self.session.execute(issues.with_only_columns(Issue.id).limit(1)).first()
+        owned = select(Issue.id).where(Issue.scan_id == scan['id']).limit(1)
+        if first is None and self.session.execute(owned).first() is not None:
+            return  # Only open or recently resolved issues left; nothing to archive yet
+
+        archive = ArchiveWriter(
+            self.archive_dir / f"website_{scan['website_id']}" / f"scan_{scan['id']}-{datetime.now():%Y%m%d%H%M%S}"
+        )
+        issue_ids = []
+        try:
+            archive.write('scan', {key: value for key, value in scan.items() if key != 'subscription_tier'})
+            for row in self.session.execute(issues.execution_options(yield_per=self.batch_size)).mappings():
+                archive.write('issue', row)
+                issue_ids.append(row['id'])
+        except Exception:
+            archive.abort()
+            raise
+        self.stats['archives'].append(archive.close())
+        # The read above holds no locks past this point
+        self.session.commit()
+
+        self.stats['issues_deleted'] += self._delete_batches(Issue, issue_ids)
+        # Issues resolved after the cutoff are kept, and deleting the scan would cascade them away unarchived
+        if self.session.execute(owned).first() is None:
+            self._batch(lambda: self.session.execute(delete(Scan).where(Scan.id == scan['id'])))
+            self.stats['scans_deleted'] += 1
+            for column in SCAN_ARTIFACTS:
+                path = scan.get(column)
+                if path and os.path.isfile(path):
+                    os.remove(path)
+        else:
+            self.stats['scans_trimmed'] += 1
+
+    def expire_email_logs(self, cutoff):
+        """Archive and delete email logs sent before the cutoff"""
+        query = select(EmailLog.__table__).where(EmailLog.sent_at < cutoff).order_by(EmailLog.id)
+        if self.session.execute(query.with_only_columns(EmailLog.id).limit(1)).first() is None:
+            return
+
+        archive = ArchiveWriter(self.archive_dir / 'email_logs' / f"email_logs-{datetime.now():%Y%m%d%H%M%S}")
+        ids = []
+        try:
+            for row in self.session.execute(query.execution_options(yield_per=self.batch_size)).mappings():
+                archive.write('email_log', row)
+                ids.append(row['id'])
+        except Exception:
+            archive.abort()
+            raise
+        self.stats['archives'].append(archive.close())
+        self.session.commit()
+        self.stats['email_logs_deleted'] += self._delete_batches(EmailLog, ids)
+
+    def _delete_batches(self, model, ids):
+        deleted = 0
+        for start in range(0, len(ids), self.batch_size):
+            chunk = ids[start:start + self.batch_size]
+            self._batch(lambda: self.session.execute(
+                delete(model).where(model.id.in_(chunk)).execution_options(synchronize_session=False)
+            ))
+            deleted += len(chunk)
+        return deleted
+
+    def _batch(self, statement):
+        """Run one delete in its own transaction, timing how long it held locks"""
+        started = time.perf_counter()
+        try:
+            statement()
+            self.session.commit()
+        except Exception:
+            self.session.rollback()
+            raise
+        elapsed = (time.perf_counter() - started) * 1000
+        self.stats['batches'] += 1
+        self.stats['max_batch_ms'] = max(self.stats['max_batch_ms'], round(elapsed, 2))
+        if self.batch_pause:
+            time.sleep(self.batch_pause)
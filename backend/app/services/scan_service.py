@@ -0,0 +1,509 @@
+"""
+SEO Sentinel Scan Service
+The work behind each pipeline stage: pre-flight, crawl, ingest, render the report
+"""
+
+import asyncio
+import json
+import os
+import threading
+import uuid
+from contextlib import contextmanager
+from datetime import datetime, timedelta
+from urllib.parse import urlencode
+
+try:
+    import fcntl
+except ImportError:  # not on Windows: renders then only exclude each other within one process
+    fcntl = None
+
+from sqlalchemy import or_, select, update
+
+from app.core.config import config
+from app.core.security import report_link_params
+from app.crawler.crawler_with_db import ISSUE_TYPES, ScanCrawler, issue_from_row
+from app.crawler.preflight import bare_host, crawl_kwargs, expected_pages, preflight_many, run_preflight
+from app.crawler.sinks import ISSUE_GROUPS
+from app.db.models import Scan, ScanStatus
+from app.db.repositories import IssueRepository
+from app.reports.cache import report_cache
+from app.reports.model import build_report_model, load_report_model, save_report_model
+from app.reports.pdf_generator import SEOReportGenerator
+from app.services.scheduler_service import tier_key
+
+
+class CrawlInterrupted(Exception):
+    """The crawl stopped before finishing (shutdown, timeout); it resumes on retry"""
+
+
+class CrawlLeaseHeld(Exception):
+    """Another worker is crawling the scan (a redelivered task); not retried"""
+
+
+class PreflightFailed(Exception):
+    """The pre-flight probe says a crawl would fail (DNS, redirect, robots.txt); not retried"""
+
+
+def preflight_target(scan):
+    return scan.website.url or scan.website.domain
+
+
+def preflight_error(result):
+    return f"Pre-flight failed for {result['target']}: {result['reason']}"
+
+
+def report_path(scan):
+    return str(config.REPORTS_DIR / f'scan_{scan.id}_report.pdf')
+
+
+def report_url(scan):
+    """Signed link to the scan's report page (HTML view; the PDF is a click away)"""
+    return f"{config.API['public_url']}/api/reports/{scan.id}/html?{urlencode(report_link_params(scan.id))}"
+
+
+# Render locks are striped, so the lock directory never grows; two scans on one stripe render in turn
+RENDER_LOCK_STRIPES = 64
+_render_locks = [threading.Lock() for _ in range(RENDER_LOCK_STRIPES)]
+
+
+@contextmanager
+def render_lock(scan_id):
+    """Held while a scan's PDF is rendered: across threads, and across processes via flock"""
+    stripe = scan_id % RENDER_LOCK_STRIPES
+    with _render_locks[stripe]:
+        if fcntl is None:
+            yield
+            return
+        lock_dir = config.REPORTS_DIR / 'locks'
+        lock_dir.mkdir(parents=True, exist_ok=True)
+        with open(lock_dir / f'{stripe}.lock', 'a') as f:
+            fcntl.flock(f, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(f, fcntl.LOCK_UN)
+
+
+def report_model_path(scan):
+    return str(config.REPORTS_DIR / f'scan_{scan.id}_model.json')
+
+
+def report_data(scan):
+    """The generator's data dict: scan counters plus the issue file the generator streams"""
+    return {
+        'domain': scan.website.domain,
+        'scan_id': scan.id,
+        'stats': {
+            'pages_crawled': scan.pages_crawled or 0,
+            'broken_links': scan.broken_links_count or 0,
+            'missing_alt_text': scan.missing_alt_text_count or 0,
+            'meta_issues': scan.meta_issues_count or 0,
+        },
+        'issues_file': scan.report_json_path,
+    }
+
+
+def db_issue_source(session, scan_id):
+    """issue_source for the generator reading the issues present in a scan from the DB
+
+    These are the scan's own findings even after later scans resolved
+    some of them or found new ones, so the report matches its counters.
+    """
+    group_types = {group: ISSUE_TYPES[kind] for kind, group in ISSUE_GROUPS.items()}
+    repository = IssueRepository(session)
+    return lambda group: map(issue_from_row, repository.iter_issues(scan_id, group_types[group]))
+
+
+def write_report(path, data, full_detail=False, issue_source=None, cache=None, model=None):
+    """Write one PDF report to path; returns its page count, content key and whether it was cached
+
+    A report whose content key is in the report cache is linked from
+    there instead of rendered; a fresh render is added to the cache.
+    """
+    partial = path + '.part'
+    generator = SEOReportGenerator(
+        None, partial, data=data, full_detail=full_detail, issue_source=issue_source, model=model
+    )
+    cache = cache or report_cache()
+    key = generator.content_key() if cache else None
+    if key:
+        pages = cache.fetch(key, path)
+        if pages is not None:
+            return {'pages': pages, 'cache_key': key, 'cache_hit': True}
+
+    try:
+        generator.generate()
+        os.replace(partial, path)  # A half-written PDF is never visible
+    finally:
+        if os.path.exists(partial):
+            os.remove(partial)
+    if key:
+        cache.store(key, path, generator.pages)
+    return {'pages': generator.pages, 'cache_key': key, 'cache_hit': False}
+
+
+def full_detail_report(scan):
+    tier = getattr(scan.user, 'subscription_tier', None)
+    return tier_key(tier) in config.REPORT['full_detail_tiers']
+
+
+class ScanService:
+    """Pipeline stages for one scan, each safe to run again after a failure
+
+    Stages take a scan id and leave their output on disk or in the scan
+    row, so the task queue only ever carries ids and file paths.
+    """
+
+    def __init__(self, session, runner=None):
+        self.session = session
+        self.runner = runner
+
+    def get(self, scan_id):
+        scan = self.session.get(Scan, scan_id)
+        if scan is None:
+            raise LookupError(f'Scan not found: {scan_id}')
+        return scan
+
+    def preflight(self, scan_id):
+        """Probe the site before it takes a crawl slot; returns the probe result
+
+        The result is kept on the scan, so a redelivered task doesn't probe
+        again. Raises PreflightFailed (and marks the scan FAILED) when the
+        crawl could only fail.
+        """
+        scan = self.get(scan_id)
+        if scan.preflight_result:
+            result = json.loads(scan.preflight_result)
+        elif not self._needs_preflight(scan):
+            return None
+        else:
+            result = run_preflight(preflight_target(scan))
+            scan.preflight_result = json.dumps(result)
+            self.session.commit()
+
+        if not result['ok']:
+            self.mark_failed(scan_id, preflight_error(result))
+            raise PreflightFailed(preflight_error(result))
+        return result
+
+    def preflight_batch(self, scan_ids):
+        """Probe a batch of scans concurrently; returns the ids still worth crawling"""
+        scans = [self.get(scan_id) for scan_id in scan_ids]
+        probe = [scan for scan in scans if not scan.preflight_result and self._needs_preflight(scan)]
+        if probe:
+            results = asyncio.run(preflight_many([preflight_target(scan) for scan in probe]))
+            for scan, result in zip(probe, results):
+                scan.preflight_result = json.dumps(result)
+            self.session.commit()
+
+        passed = []
+        for scan in scans:
+            result = json.loads(scan.preflight_result) if scan.preflight_result else None
+            if result is not None and not result['ok']:
+                self.mark_failed(scan.id, preflight_error(result))
+            elif scan.status != ScanStatus.FAILED:
+                passed.append(scan.id)
+        return passed
+
+    def _needs_preflight(self, scan):
+        return config.PREFLIGHT['enabled'] and scan.crawled_at is None and scan.status != ScanStatus.COMPLETED
+
+    def crawl(self, scan_id, task_id=None, **spider_kwargs):
+        """Crawl a scan, resuming from its checkpoint; a no-op once the crawl has finished
+
+        Raises CrawlLeaseHeld while another worker's crawl holds the scan's lease.
+        """
+        scan = self.get(scan_id)
+        if scan.crawled_at is not None or scan.status == ScanStatus.COMPLETED:
+            return scan
+        lease = uuid.uuid4().hex
+        if not self.take_crawl_lease(scan_id, lease):
+            raise CrawlLeaseHeld(f'Scan {scan_id} is being crawled elsewhere (lease until {scan.crawl_lease_expires_at})')
+        try:
+            if task_id is not None:
+                scan.celery_task_id = task_id
+            if scan.preflight_result:
+                preflight = json.loads(scan.preflight_result)
+                if preflight['ok']:
+                    spider_kwargs = {**crawl_kwargs(preflight), **spider_kwargs}
+
+            ScanCrawler(self.session, self.runner, defer_ingest=True).run(
+                scan, heartbeat=lambda: self.renew_crawl_lease([scan_id], lease), **spider_kwargs)
+        finally:
+            self.release_crawl_lease([scan_id], lease)
+        if scan.crawled_at is None:
+            raise CrawlInterrupted(f'Crawl of scan {scan_id} stopped early; checkpoint at {scan.checkpoint_path}')
+        return scan
+
+    def crawl_batch(self, scan_ids):
+        """Crawl small sites side by side in this process; returns (crawled ids, ids left over)
+
+        Left-over scans (interrupted or failed crawls) keep their
+        checkpoints and are meant to continue on their own pipeline.
+        Scans an earlier attempt already handed off, and scans another
+        worker's crawl holds the lease of, are left out.
+        """
+        lease = uuid.uuid4().hex
+        scans = [
+            self.get(scan_id) for scan_id in scan_ids
+            if not self.handed_off(scan_id) and self.take_crawl_lease(scan_id, lease)
+        ]
+        leased = [scan.id for scan in scans]
+        per_scan_kwargs = {}
+        for scan in scans:
+            preflight = json.loads(scan.preflight_result) if scan.preflight_result else None
+            if preflight and preflight['ok']:
+                per_scan_kwargs[scan.id] = crawl_kwargs(preflight)
+
+        try:
+            ScanCrawler(self.session, self.runner, defer_ingest=True).run_many(
+                scans, per_scan_kwargs, heartbeat=lambda: self.renew_crawl_lease(leased, lease))
+        finally:
+            self.release_crawl_lease(leased, lease)
+        crawled = [scan.id for scan in scans if scan.crawled_at is not None and scan.status != ScanStatus.COMPLETED]
+        left_over = [
+            scan.id for scan in scans
+            if scan.crawled_at is None and scan.status not in (ScanStatus.COMPLETED, ScanStatus.FAILED)
+        ]
+        return crawled, left_over
+
+    def take_crawl_lease(self, scan_id, lease, now=None):
+        """Claim a scan's crawl for CRAWLER['lease_seconds']; False while another crawl's lease is live"""
+        now = now or datetime.now()
+        taken = self.session.execute(
+            update(Scan)
+            .where(Scan.id == scan_id, or_(Scan.crawl_lease.is_(None), Scan.crawl_lease_expires_at < now))
+            .values(crawl_lease=lease, crawl_lease_expires_at=now + timedelta(seconds=config.CRAWLER['lease_seconds']))
+            .execution_options(synchronize_session='fetch')
+        ).rowcount
+        self.session.commit()
+        return taken == 1
+
+    def renew_crawl_lease(self, scan_ids, lease):
+        """Heartbeat of a running crawl: push its leases' expiry forward"""
+        self.session.execute(
+            update(Scan)
+            .where(Scan.id.in_(scan_ids), Scan.crawl_lease == lease)
+            .values(crawl_lease_expires_at=datetime.now() + timedelta(seconds=config.CRAWLER['lease_seconds']))
+            .execution_options(synchronize_session='fetch')
+        )
+        self.session.commit()
+
+    def release_crawl_lease(self, scan_ids, lease):
+        self.session.rollback()  # whatever a failed crawl left pending
+        self.session.execute(
+            update(Scan)
+            .where(Scan.id.in_(scan_ids), Scan.crawl_lease == lease)
+            .values(crawl_lease=None, crawl_lease_expires_at=None)
+            .execution_options(synchronize_session='fetch')
+        )
+        self.session.commit()
+
+    def handed_off(self, scan_id):
+        """Whether a batch crawl already passed the scan on to its own pipeline"""
+        scan = self.session.get(Scan, scan_id)
+        return scan is not None and 'handoff' in json.loads(scan.stage_timings or '{}')
+
+    def hand_off(self, scan_id, first_stage):
+        """Record that a batch crawl passes the scan on to its own pipeline; False if it already did"""
+        if self.handed_off(scan_id):
+            return False
+        self.record_stage(scan_id, 'handoff', first_stage=first_stage, at=datetime.now().isoformat())
+        return True
+
+    def undo_hand_off(self, scan_id):
+        """Forget a hand-off whose pipeline could not be queued, so the batch can retry it"""
+        scan = self.get(scan_id)
+        timings = json.loads(scan.stage_timings or '{}')
+        timings.pop('handoff', None)
+        scan.stage_timings = json.dumps(timings)
+        self.session.commit()
+
+    def plan_batches(self, dispatched):
+        """Split (scan_id, tier) pairs into multi-domain crawl batches and single scans
+
+        Small sites of the configured tiers are packed into batches of up
+        to batch_size with at most one scan per site (www or not), so no
+        host is crawled twice at once by the same worker. A site is small
+        when its page budget, capped by the size its last pre-flight probe
+        estimated, is within MULTI_CRAWL['max_pages'].
+        """
+        settings = config.MULTI_CRAWL
+        if not settings['enabled'] or not dispatched:
+            return [], list(dispatched)
+
+        scans = self.session.scalars(select(Scan).where(Scan.id.in_([scan_id for scan_id, _ in dispatched])))
+        websites = {scan.id: scan.website for scan in scans}
+        batches, singles = [], []
+        for scan_id, tier in dispatched:
+            website = websites[scan_id]
+            pages = expected_pages(website.max_pages, self.estimated_pages(website.id))
+            if tier_key(tier) not in settings['tiers'] or pages > settings['max_pages']:
+                singles.append((scan_id, tier))
+                continue
+            domain = bare_host(website.domain.lower())
+            for batch in batches:
+                if len(batch['scans']) < settings['batch_size'] and domain not in batch['domains']:
+                    break
+            else:
+                batch = {'scans': [], 'domains': set()}
+                batches.append(batch)
+            batch['scans'].append((scan_id, tier))
+            batch['domains'].add(domain)
+
+        singles += [batch['scans'][0] for batch in batches if len(batch['scans']) == 1]
+        return [batch['scans'] for batch in batches if len(batch['scans']) > 1], singles
+
+    def estimated_pages(self, website_id):
+        """Site size from the website's latest pre-flight probe, or None"""
+        result = self.session.scalars(
+            select(Scan.preflight_result)
+            .where(Scan.website_id == website_id, Scan.preflight_result.isnot(None))
+            .order_by(Scan.id.desc())
+            .limit(1)
+        ).first()
+        result = json.loads(result) if result else None
+        if result is None or not result['ok']:
+            return None
+        return crawl_kwargs(result).get('estimated_pages')
+
+    def ingest(self, scan_id):
+        """Load the crawl's issues and mark the scan COMPLETED (idempotent)"""
+        scan = self.get(scan_id)
+        if scan.crawled_at is None and scan.status != ScanStatus.COMPLETED:
+            raise ValueError(f'Scan {scan_id} has not finished crawling')
+        return ScanCrawler(self.session, self.runner).complete(scan)
+
+    def _issue_source(self, scan, data):
+        """Issues stream from the crawl's NDJSON file; once that is gone, from the scan's issues in the DB"""
+        if data['issues_file'] and os.path.exists(data['issues_file']):
+            return None
+        return db_issue_source(self.session, scan.id)
+
+    def report_model(self, scan_id):
+        """The scan's report model (see app.reports.model), built once and kept next to its PDF"""
+        scan = self.get(scan_id)
+        if scan.status != ScanStatus.COMPLETED:
+            raise ValueError(f'Scan {scan_id} is not completed')
+        model = load_report_model(scan.report_model_path) if scan.report_model_path else None
+        if model is None:
+            data = report_data(scan)
+            model = build_report_model(data, full_detail_report(scan), self._issue_source(scan, data))
+            path = report_model_path(scan)
+            save_report_model(path, model)
+            scan.report_model_path = path
+            self.session.commit()
+        return model
+
+    def publish_report(self, scan_id):
+        """Report stage: the model and report link, plus the PDF unless PDFs are rendered lazily"""
+        self.report_model(scan_id)
+        scan = self.get(scan_id)
+        scan.report_url = report_url(scan)
+        self.session.commit()
+        if not config.REPORT['lazy_pdf']:
+            self.render_report(scan_id)
+        return scan.report_url
+
+    def render_report(self, scan_id):
+        """Write the scan's PDF report once; returns its path
+
+        Concurrent calls for one scan (API requests, workers, batch
+        renders) render it once: the others wait on the render lock, then
+        find the file.
+        """
+        scan = self.get(scan_id)
+        if scan.report_pdf_path and os.path.exists(scan.report_pdf_path):
+            return scan.report_pdf_path
+
+        with render_lock(scan_id):
+            return self._render_locked(scan)
+
+    def _render_locked(self, scan):
+        """render_report's work, with the scan's render lock held"""
+        self.session.refresh(scan)
+        if scan.report_pdf_path and os.path.exists(scan.report_pdf_path):
+            return scan.report_pdf_path
+
+        model = self.report_model(scan.id)
+        path = report_path(scan)
+        data = report_data(scan)
+        written = write_report(path, data, full_detail_report(scan), self._issue_source(scan, data), model=model)
+
+        scan.report_pdf_path = path
+        scan.report_cache_key = written['cache_key']
+        scan.report_cache_hit = written['cache_hit']
+        scan.report_accessed_at = datetime.now()
+        self.session.commit()
+        return path
+
+    def report_pdf(self, scan_id):
+        """The PDF for a download, rendered on first request; returns (path, content key)
+
+        Downloads keep the PDF from idle eviction; the access time is
+        written at most hourly, as PDF viewers fetch in many ranges. It is
+        written under the render lock, which eviction takes too, so the
+        file can't be evicted between here and the response.
+        """
+        scan = self.get(scan_id)
+        recent = datetime.now() - timedelta(hours=1)
+        fresh = self.session.scalar(
+            select(Scan.id).where(Scan.id == scan_id, Scan.report_accessed_at >= recent)
+        )
+        if fresh is None or not (scan.report_pdf_path and os.path.exists(scan.report_pdf_path)):
+            with render_lock(scan_id):
+                self._render_locked(scan)
+                self.session.execute(
+                    update(Scan)
+                    .where(Scan.id == scan_id, or_(Scan.report_accessed_at.is_(None), Scan.report_accessed_at < recent))
+                    .values(report_accessed_at=datetime.now())
+                    .execution_options(synchronize_session=False)
+                )
+                self.session.commit()
+        return scan.report_pdf_path, scan.report_cache_key
+
+    def mark_failed(self, scan_id, error):
+        scan = self.session.get(Scan, scan_id)
+        if scan is not None and scan.status != ScanStatus.COMPLETED:
+            scan.status = ScanStatus.FAILED
+            scan.error_message = str(error)[:2000]
+            self.session.commit()
+
+    def interrupted(self, now=None):
+        """(scan_id, tier) of RUNNING scans whose crawl died along with its task
+
+        A crawl checkpoints every checkpoint_interval seconds, so one silent
+        for resume_stale_after seconds is not running anywhere. Scans this
+        returned within that window are left out, so a resume still waiting
+        for a crawl worker is not queued twice.
+        """
+        stale_after = config.CRAWLER['resume_stale_after']
+        now = now or datetime.now()
+        stale = []
+        for scan in ScanCrawler(self.session, self.runner).interrupted_scans(stale_after):
+            if scan.crawl_lease_expires_at is not None and scan.crawl_lease_expires_at > now:
+                continue  # Still crawling somewhere, just not checkpointing yet
+            requeued = json.loads(scan.stage_timings or '{}').get('requeued')
+            if requeued and now - datetime.fromisoformat(requeued['at']) < timedelta(seconds=stale_after):
+                continue
+            stale.append((scan.id, tier_key(getattr(scan.user, 'subscription_tier', None))))
+        return stale
+
+    def mark_queued(self, scan_ids):
+        """Record that the scans' pipelines reached the broker (see ScanScheduler.unqueued)"""
+        queued_at = datetime.now().isoformat()
+        for scan in self.session.scalars(select(Scan).where(Scan.id.in_(list(scan_ids)))):
+            timings = json.loads(scan.stage_timings or '{}')
+            timings['queued'] = {'at': queued_at}
+            scan.stage_timings = json.dumps(timings)
+        self.session.commit()
+
+    def record_stage(self, scan_id, stage, **timing):
+        """Merge one stage's timing into Scan.stage_timings"""
+        scan = self.session.get(Scan, scan_id)
+        if scan is None:
+            return
+        timings = json.loads(scan.stage_timings or '{}')
+        timings[stage] = timing
+        scan.stage_timings = json.dumps(timings)
+        self.session.commit()
@@ -0,0 +1,214 @@
+"""
+SEO Sentinel Scan Scheduler
+Turns due websites into PENDING scans, spread with jitter and shared fairly between tiers
+"""
+
+import json
+import math
+import random
+from datetime import timedelta
+
+from sqlalchemy import select
+
+from app.core.config import config
+from app.db.models import Scan, ScanStatus, SubscriptionTier, User, Website
+
+# Website.scan_frequency / plan scan_frequency -> interval between scans
+FREQUENCIES = {
+    'daily': timedelta(days=1),
+    'weekly': timedelta(weeks=1),
+    'monthly': timedelta(days=30),
+}
+
+IN_FLIGHT = (ScanStatus.PENDING, ScanStatus.RUNNING)
+
+
+def tier_key(tier):
+    return getattr(tier, 'value', tier) or SubscriptionTier.FREE.value
+
+
+def scan_interval(frequency, tier):
+    """Interval for a website's frequency, never shorter than its tier allows"""
+    interval = FREQUENCIES.get(frequency)
+    if interval is None:
+        return None  # manual
+    floor = FREQUENCIES.get(config.get_tier_frequency(tier))  # None for 'custom'
+    return max(interval, floor) if floor else interval
+
+
+def concurrency_limit(tier, max_websites):
+    cap = config.SCHEDULER['max_concurrent_scans']
+    return max(1, min(max_websites or 1, cap.get(tier_key(tier), 1)))
+
+
+class ScanScheduler:
+    """Dispatch scans for websites whose next_scan_at has passed
+
+    Each `tick()`:
+      1. gives never-scheduled websites a first next_scan_at spread
+         uniformly over one interval (new signups don't all start at once);
+      2. splits the free crawl capacity (max_in_flight minus PENDING/RUNNING
+         scans) between tiers by weight, oldest due first within a tier, with
+         any unused share flowing to the tiers that still have work, so
+         higher tiers are served first but lower tiers never starve;
+      3. skips users already running their concurrency limit and websites
+         whose previous scan is still in flight;
+      4. moves each dispatched website's next_scan_at one interval on, plus
+         +/- jitter, so sites added together drift apart instead of
+         hitting the same minute forever.
+
+    A scan is committed PENDING before its pipeline is sent to the broker;
+    `unqueued()` finds those whose send never succeeded, so they can be
+    sent again instead of holding their website and user slot forever.
+
+    Due websites come from the (is_active, next_scan_at) index; nothing
+    walks the whole websites table. `enqueue(scan_id, tier)` is called for
+    every new scan after the tick commits.
+    """
+
+    def __init__(self, session, enqueue=None, rng=None):
+        self.session = session
+        self.enqueue = enqueue
+        self.rng = rng or random.Random()
+        self.settings = config.SCHEDULER
+
+    def next_scan_at(self, due_at, interval, now):
+        """Next run one interval after the slot just served, with jitter"""
+        jitter = interval.total_seconds() * self.settings['jitter']
+        base = due_at + interval
+        if base <= now:
+            base = now + interval  # Fell a whole interval behind: don't pile up
+        return base + timedelta(seconds=self.rng.uniform(-jitter, jitter))
+
+    def schedule_new(self, now, limit=1000):
+        """First next_scan_at for active websites that have none"""
+        rows = self.session.execute(
+            select(Website, User.subscription_tier)
+            .join(User, User.id == Website.user_id)
+            .where(Website.is_active.is_(True), Website.next_scan_at.is_(None),
+                   Website.scan_frequency.in_(list(FREQUENCIES)))
+            .limit(limit)
+        ).all()
+        for website, tier in rows:
+            interval = scan_interval(website.scan_frequency, tier)
+            website.next_scan_at = now + timedelta(seconds=self.rng.uniform(0, interval.total_seconds()))
+        return len(rows)
+
+    def _in_flight(self):
+        """({user_id: in-flight scans}, {website_id of in-flight scans}, saturated user ids, total)"""
+        rows = self.session.execute(
+            select(Scan.user_id, Scan.website_id, User.subscription_tier, User.max_websites)
+            .join(User, User.id == Scan.user_id)
+            .where(Scan.status.in_(IN_FLIGHT))
+        ).all()
+        per_user, limits = {}, {}
+        for user_id, _, tier, max_websites in rows:
+            per_user[user_id] = per_user.get(user_id, 0) + 1
+            limits[user_id] = concurrency_limit(tier, max_websites)
+        saturated = {user_id for user_id, running in per_user.items() if running >= limits[user_id]}
+        return per_user, {row.website_id for row in rows}, saturated, len(rows)
+
+    def _due(self, tier, now, limit, saturated, busy_websites):
+        tier_match = User.subscription_tier == tier
+        if tier == SubscriptionTier.FREE:
+            tier_match = tier_match | User.subscription_tier.is_(None)
+        query = (
+            select(Website, User.subscription_tier, User.max_websites)
+            .join(User, User.id == Website.user_id)
+            .where(Website.is_active.is_(True), Website.next_scan_at <= now, tier_match)
+        )
+        if saturated:
+            query = query.where(Website.user_id.notin_(list(saturated)))
+        if busy_websites:
+            query = query.where(Website.id.notin_(list(busy_websites)))
+        # Ordered by the index alone so LIMIT stops early even with a huge backlog
+        return self.session.execute(query.order_by(Website.next_scan_at).limit(limit)).all()
+
+    def _dispatch_tier(self, tier, limit, now, state):
+        """Create up to `limit` scans for one tier's due websites; returns the count
+
+        Re-querying needs no cursor: dispatched websites move past `now` and
+        users who hit their limit join the excluded set.
+        """
+        dispatched = 0
+        while dispatched < limit:
+            page = max(limit - dispatched, 50)
+            rows = self._due(tier, now, page, state['saturated'], state['busy'])
+            if not rows:
+                break
+            for website, user_tier, max_websites in rows:
+                if website.user_id in state['saturated'] or dispatched >= limit:
+                    continue
+                interval = scan_interval(website.scan_frequency, user_tier)
+                if interval is None:
+                    website.next_scan_at = None  # Switched to manual since it was scheduled
+                    continue
+
+                scan = Scan(user_id=website.user_id, website_id=website.id, status=ScanStatus.PENDING, created_at=now)
+                self.session.add(scan)
+                state['new'].append((scan, tier_key(user_tier), website.next_scan_at))
+                state['busy'].add(website.id)
+                website.next_scan_at = self.next_scan_at(website.next_scan_at, interval, now)
+                dispatched += 1
+
+                running = state['per_user'][website.user_id] = state['per_user'].get(website.user_id, 0) + 1
+                if running >= concurrency_limit(user_tier, max_websites):
+                    state['saturated'].add(website.user_id)
+            if len(rows) < page:
+                break
+        return dispatched
+
+    def unqueued(self, now):
+        """(scan_id, tier) of PENDING scans older than requeue_after whose pipeline was never queued"""
+        cutoff = now - timedelta(seconds=self.settings['requeue_after'])
+        rows = self.session.execute(
+            select(Scan.id, Scan.stage_timings, User.subscription_tier)
+            .join(User, User.id == Scan.user_id)
+            .where(Scan.status == ScanStatus.PENDING, Scan.created_at <= cutoff)
+            .order_by(Scan.id)
+        ).all()
+        return [
+            (scan_id, tier_key(tier)) for scan_id, timings, tier in rows
+            if 'queued' not in json.loads(timings or '{}')
+        ]
+
+    def tick(self, now):
+        """One scheduling pass; returns stats with the dispatched scans' queue latency"""
+        scheduled = self.schedule_new(now)
+        per_user, busy, saturated, in_flight = self._in_flight()
+        capacity = min(self.settings['max_in_flight'] - in_flight, self.settings['max_dispatch_per_tick'])
+        state = {'per_user': per_user, 'busy': busy, 'saturated': saturated, 'new': []}
+
+        weights = self.settings['tier_weights']
+        tiers = sorted(SubscriptionTier, key=lambda tier: -weights.get(tier.value, 1))
+        total_weight = sum(weights.get(tier.value, 1) for tier in tiers)
+        remaining = max(capacity, 0)
+        # Weighted shares first, then leftover capacity in priority order. Shares
+        # round down but are at least one, so they don't add up past capacity
+        # before the lowest tier gets its turn.
+        for tier in tiers:
+            if remaining <= 0:
+                break
+            share = max(1, math.floor(capacity * weights.get(tier.value, 1) / total_weight))
+            remaining -= self._dispatch_tier(tier, min(share, remaining), now, state)
+        for tier in tiers:
+            if remaining <= 0:
+                break
+            remaining -= self._dispatch_tier(tier, remaining, now, state)
+
+        self.session.flush()
+        dispatched = [(scan.id, tier, due_at) for scan, tier, due_at in state['new']]
+        self.session.commit()
+
+        latencies = {}
+        for scan_id, tier, due_at in dispatched:
+            latencies.setdefault(tier, []).append((now - due_at).total_seconds())
+            if self.enqueue is not None:
+                self.enqueue(scan_id, tier)
+        return {
+            'scheduled_new': scheduled,
+            'dispatched': len(dispatched),
+            'in_flight': in_flight + len(dispatched),
+            'scan_ids': [scan_id for scan_id, _, _ in dispatched],
+            'latency_seconds': latencies,
+        }
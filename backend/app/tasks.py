@@ -0,0 +1,330 @@
+"""
+SEO Sentinel Tasks
+Celery app and the preflight -> crawl -> ingest -> report -> email pipeline
+
+Small sites of the lower tiers are crawled in batches (see MULTI_CRAWL):
+one crawl worker process runs a spider per site side by side, then each
+scan continues on its own ingest -> report -> email chain.
+
+Workers scale per queue (see docker-compose.yml):
+    celery -A app.tasks.celery_app worker -Q preflight --concurrency 16
+    celery -A app.tasks.celery_app worker -Q crawls
+    celery -A app.tasks.celery_app worker -Q ingest,reports,emails
+    celery -A app.tasks.celery_app beat
+"""
+
+import logging
+import time
+from contextlib import contextmanager
+from datetime import datetime, timedelta
+
+from celery import Celery, chain
+from celery.exceptions import Ignore
+from celery.schedules import crontab
+
+from app.core.config import config
+from app.db.database import session_scope
+from app.services.email_service import EmailService
+from app.reports.cache import ReportCache
+from app.services.report_service import ReportRenderService, cache_hit_rate, evict_idle_pdfs
+from app.services.retention_service import RetentionService
+from app.services.scan_service import CrawlLeaseHeld, PreflightFailed, ScanService
+from app.services.scheduler_service import ScanScheduler
+
+logger = logging.getLogger(__name__)
+
+celery_app = Celery('seo_sentinel')
+celery_app.conf.update(
+    broker_url=config.CELERY['broker_url'],
+    result_backend=config.CELERY['result_backend'],
+    task_serializer=config.CELERY['task_serializer'],
+    result_serializer=config.CELERY['task_serializer'],
+    accept_content=config.CELERY['accept_content'],
+    timezone=config.CELERY['timezone'],
+    task_routes=config.CELERY['task_routes'],
+    task_acks_late=config.CELERY['task_acks_late'],
+    task_reject_on_worker_lost=config.CELERY['task_reject_on_worker_lost'],
+    worker_prefetch_multiplier=config.CELERY['worker_prefetch_multiplier'],
+    broker_transport_options=config.CELERY['broker_transport_options'],
+    beat_schedule={
+        'schedule-scans': {'task': 'tasks.schedule_scans', 'schedule': float(config.SCHEDULER['tick_seconds'])},
+        'resume-interrupted-scans': {'task': 'tasks.resume_interrupted_scans', 'schedule': crontab(minute='*/5')},
+        'apply-retention': {'task': 'tasks.apply_retention', 'schedule': crontab(hour=3, minute=30)},
+        'evict-report-cache': {'task': 'tasks.evict_report_cache', 'schedule': crontab(minute=15)},
+        'evict-idle-reports': {'task': 'tasks.evict_idle_reports', 'schedule': crontab(hour=4, minute=0)},
+    },
+)
+
+
+def stage_payload(scan_id, **refs):
+    """What travels between stages: the scan id, artifact paths and the enqueue time"""
+    return {'scan_id': scan_id, **refs, 'enqueued_at': time.time()}
+
+
+def batch_payload(scans):
+    """Payload of a multi-domain crawl: [scan_id, tier] pairs instead of one scan id"""
+    return {'scans': [[scan_id, getattr(tier, 'value', tier)] for scan_id, tier in scans], 'enqueued_at': time.time()}
+
+
+def payload_scan_ids(payload):
+    if 'scans' in payload:
+        return [scan_id for scan_id, _ in payload['scans']]
+    return [payload['scan_id']] if payload.get('scan_id') is not None else []
+
+
+def tier_priority(tier):
+    return config.CELERY['tier_priority'].get(getattr(tier, 'value', tier) or 'free', 9)
+
+
+class PipelineTask(celery_app.Task):
+    """Base for pipeline stages: late acks, retries with backoff, FAILED scan on give-up
+
+    Every stage is idempotent (it checks the scan row / files for its own
+    output first), so redelivery after a worker crash or a retry is safe.
+    """
+
+    autoretry_for = (Exception,)
+    dont_autoretry_for = (PreflightFailed,)
+    max_retries = config.CELERY['max_retries']
+    retry_backoff = config.CELERY['retry_backoff']
+    retry_jitter = True
+    marks_scan_failed = True
+
+    def on_failure(self, exc, task_id, args, kwargs, einfo):
+        payload = args[0] if args else kwargs.get('payload') or {}
+        scan_ids = payload_scan_ids(payload)
+        logger.error(f"❌ {self.name} gave up on scan(s) {scan_ids}: {exc}")
+        if self.marks_scan_failed and scan_ids:
+            with session_scope() as session:
+                service = ScanService(session)
+                for scan_id in scan_ids:
+                    if 'scans' in payload and service.handed_off(scan_id):
+                        continue  # A batch scan already on its own pipeline is that pipeline's to fail
+                    service.mark_failed(scan_id, exc)
+
+
+@contextmanager
+def timed_stage(task, stage, payload):
+    """Record queue wait and run time of one stage on the scan row(s)"""
+    started = time.time()
+    waited = started - payload.get('enqueued_at', started)
+    yield
+    ran = time.time() - started
+    scan_ids = payload_scan_ids(payload)
+    batch = {'batch_size': len(scan_ids)} if 'scans' in payload else {}
+    with session_scope() as session:
+        for scan_id in scan_ids:
+            ScanService(session).record_stage(
+                scan_id, stage,
+                wait_seconds=round(waited, 3), run_seconds=round(ran, 3),
+                attempts=task.request.retries + 1, finished_at=datetime.now().isoformat(), **batch
+            )
+    logger.info(f"⏱️  {stage} scan(s) {scan_ids}: queued {waited:.1f}s, ran {ran:.1f}s")
+
+
+@celery_app.task(bind=True, base=PipelineTask, name='tasks.preflight_website')
+def preflight_website(self, payload):
+    """Probe the site on a cheap worker; a doomed crawl stops the chain here"""
+    with timed_stage(self, 'preflight', payload):
+        with session_scope() as session:
+            result = ScanService(session).preflight(payload['scan_id'])
+    return stage_payload(payload['scan_id'], start_url=result and result['start_url'])
+
+
+@celery_app.task(bind=True, base=PipelineTask, name='tasks.crawl_website')
+def crawl_website(self, payload):
+    """Crawl (or resume crawling) a scan; leaves the issues NDJSON on disk
+
+    A copy of the task redelivered while the crawl still runs elsewhere
+    stops its chain here; the running crawl carries the pipeline on.
+    """
+    try:
+        with timed_stage(self, 'crawl', payload):
+            with session_scope() as session:
+                scan = ScanService(session).crawl(payload['scan_id'], task_id=self.request.id)
+                issues_file = scan.report_json_path
+    except CrawlLeaseHeld as e:
+        logger.warning(f"🔒 {e}; dropping this delivery")
+        raise Ignore()
+    return stage_payload(payload['scan_id'], issues_file=issues_file)
+
+
+@celery_app.task(bind=True, base=PipelineTask, name='tasks.ingest_issues')
+def ingest_issues(self, payload):
+    """Bulk-load the crawl's issues and mark the scan COMPLETED"""
+    with timed_stage(self, 'ingest', payload):
+        with session_scope() as session:
+            ScanService(session).ingest(payload['scan_id'])
+    return stage_payload(payload['scan_id'], issues_file=payload.get('issues_file'))
+
+
+@celery_app.task(bind=True, base=PipelineTask, name='tasks.generate_report', marks_scan_failed=False)
+def generate_report(self, payload):
+    """Build the report model and link on a reports worker (the PDF too, unless rendered lazily)"""
+    with timed_stage(self, 'report', payload):
+        with session_scope() as session:
+            report_url = ScanService(session).publish_report(payload['scan_id'])
+    return stage_payload(payload['scan_id'], report_url=report_url)
+
+
+@celery_app.task(bind=True, base=PipelineTask, name='tasks.send_email', marks_scan_failed=False)
+def send_email(self, payload):
+    """Email the report; the EmailLog row makes a retry a no-op once sent"""
+    with timed_stage(self, 'email', payload):
+        with session_scope() as session:
+            service = ScanService(session)
+            log = EmailService(session).send_report(service.get(payload['scan_id']))
+            status = log.status
+    return {'scan_id': payload['scan_id'], 'email_status': status}
+
+
+@celery_app.task(bind=True, base=PipelineTask, name='tasks.preflight_batch')
+def preflight_batch(self, payload):
+    """Probe a batch of small sites concurrently; failed sites drop out of the batch"""
+    with timed_stage(self, 'preflight', payload):
+        with session_scope() as session:
+            passed = set(ScanService(session).preflight_batch(payload_scan_ids(payload)))
+    return batch_payload([(scan_id, tier) for scan_id, tier in payload['scans'] if scan_id in passed])
+
+
+@celery_app.task(bind=True, base=PipelineTask, name='tasks.crawl_batch')
+def crawl_batch(self, payload):
+    """Crawl many small sites in one worker process, then fan out per scan
+
+    Finished crawls continue with their own ingest -> report -> email
+    chain; a crawl that was interrupted or failed continues alone on the
+    single-scan pipeline, resuming from its checkpoint. Each hand-off is
+    recorded on the scan before its chain is queued, so a retry of this
+    task neither crawls nor queues a scan that was already passed on.
+    """
+    if not payload['scans']:
+        return {'crawled': [], 'left_over': []}
+    with timed_stage(self, 'crawl', payload):
+        with session_scope() as session:
+            crawled, left_over = ScanService(session).crawl_batch(payload_scan_ids(payload))
+    tiers = {scan_id: tier for scan_id, tier in payload['scans']}
+    next_stages = [(scan_id, ingest_issues) for scan_id in crawled] + [(scan_id, crawl_website) for scan_id in left_over]
+    with session_scope() as session:
+        service = ScanService(session)
+        for scan_id, first_stage in next_stages:
+            if not service.hand_off(scan_id, first_stage.name):
+                continue
+            try:
+                start_pipeline(scan_id, tiers[scan_id], first_stage=first_stage)
+            except Exception:
+                service.undo_hand_off(scan_id)
+                raise
+    return {'crawled': crawled, 'left_over': left_over}
+
+
+PIPELINE = (preflight_website, crawl_website, ingest_issues, generate_report, send_email)
+
+
+def start_pipeline(scan_id, tier=None, first_stage=preflight_website):
+    """Queue a scan's stages from first_stage on; higher tiers get a higher broker priority"""
+    priority = tier_priority(tier)
+    stages = PIPELINE[PIPELINE.index(first_stage):]
+    return chain(
+        stages[0].s(stage_payload(scan_id)).set(priority=priority),
+        *(stage.s().set(priority=priority) for stage in stages[1:]),
+    ).apply_async()
+
+
+def start_batch(scans):
+    """Queue a multi-domain crawl of (scan_id, tier) pairs at the batch's best tier priority"""
+    priority = min(tier_priority(tier) for _, tier in scans)
+    return chain(
+        preflight_batch.s(batch_payload(scans)).set(priority=priority),
+        crawl_batch.s().set(priority=priority),
+    ).apply_async()
+
+
+def dispatch_scans(dispatched):
+    """Start pipelines for (scan_id, tier) pairs; small sites share multi-domain crawls
+
+    Scans whose pipeline reached the broker are marked queued, even when a
+    later send fails; the others are sent again by a later schedule_scans.
+    """
+    with session_scope() as session:
+        batches, singles = ScanService(session).plan_batches(dispatched)
+    queued = []
+    try:
+        for scan_id, tier in singles:
+            start_pipeline(scan_id, tier)
+            queued.append(scan_id)
+        for scans in batches:
+            start_batch(scans)
+            queued.extend(scan_id for scan_id, _ in scans)
+    finally:
+        if queued:
+            with session_scope() as session:
+                ScanService(session).mark_queued(queued)
+    return {'batches': len(batches), 'singles': len(singles)}
+
+
+@celery_app.task(name='tasks.render_reports')
+def render_reports(scan_ids, processes=None):
+    """Render many scans' missing reports on a process pool (weekly runs, backfills)"""
+    with session_scope() as session:
+        return ReportRenderService(session, processes).render(scan_ids)
+
+
+@celery_app.task(name='tasks.schedule_scans')
+def schedule_scans():
+    """Beat: dispatch due websites (see ScanScheduler), and resend scans a broker outage left PENDING"""
+    dispatched = []
+    now = datetime.now()
+    with session_scope() as session:
+        scheduler = ScanScheduler(session, enqueue=lambda scan_id, tier: dispatched.append((scan_id, tier)))
+        requeued = scheduler.unqueued(now)
+        result = scheduler.tick(now)
+    if requeued:
+        logger.warning(f"🔁 Re-queuing {len(requeued)} PENDING scan(s) whose pipeline never reached the broker")
+    return {
+        'dispatched': result['dispatched'], 'requeued': len(requeued), 'in_flight': result['in_flight'],
+        **dispatch_scans(requeued + dispatched),
+    }
+
+
+@celery_app.task(name='tasks.resume_interrupted_scans')
+def resume_interrupted_scans():
+    """Beat: re-queue crawls whose worker died and whose task was lost; they resume from their checkpoint"""
+    requeued = []
+    with session_scope() as session:
+        service = ScanService(session)
+        for scan_id, tier in service.interrupted():
+            start_pipeline(scan_id, tier, first_stage=crawl_website)
+            service.record_stage(scan_id, 'requeued', at=datetime.now().isoformat())
+            requeued.append(scan_id)
+    if requeued:
+        logger.warning(f"♻️  Re-queued interrupted scan(s) {requeued} to resume from their checkpoints")
+    return {'requeued': requeued}
+
+
+@celery_app.task(name='tasks.apply_retention')
+def apply_retention():
+    """Beat: archive and delete expired scan history"""
+    with session_scope() as session:
+        stats = RetentionService(session).run()
+    stats['archives'] = len(stats['archives'])
+    return stats
+
+
+@celery_app.task(name='tasks.evict_report_cache')
+def evict_report_cache():
+    """Beat: trim the report cache to its age and size limits; reports the last day's hit rate"""
+    stats = ReportCache().evict()
+    with session_scope() as session:
+        stats.update(cache_hit_rate(session, datetime.now() - timedelta(days=1)))
+    logger.info(f"♻️  Report cache: {stats['entries']} entries, {stats['bytes'] / 1024 ** 2:.0f} MB, "
+                f"evicted {stats['removed']}, hit rate {stats['hit_rate']}")
+    return stats
+
+
+@celery_app.task(name='tasks.evict_idle_reports')
+def evict_idle_reports():
+    """Beat: delete PDFs nobody downloaded lately; a later request renders them again"""
+    with session_scope() as session:
+        stats = evict_idle_pdfs(session)
+    logger.info(f"🗑️  Evicted {stats['evicted']} idle PDF reports ({stats['freed_bytes'] / 1024 ** 2:.0f} MB)")
+    return stats
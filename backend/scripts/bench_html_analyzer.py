@@ -0,0 +1,93 @@
+"""
+SEO Sentinel - HTML Analyzer Micro-Benchmark
+Compares the single-pass page analyzer with the old per-check selector queries
+
+Run from backend/:  python -m scripts.bench_html_analyzer [iterations]
+"""
+
+import sys
+import time
+from pathlib import Path
+from urllib.parse import urljoin
+
+from scrapy.http import HtmlResponse, Request
+
+from app.crawler.html_analyzer import analyze_response
+
+
+FIXTURES_DIR = Path(__file__).parent / 'fixtures'
+
+
+def legacy_checks(response):
+    """The selector-per-check logic parse_item used before the analyzer"""
+    issues = []
+    for img in response.css('img'):
+        alt = img.xpath('@alt').get()
+        src = img.xpath('@src').get()
+        if not src:
+            continue
+        if alt is None or alt.strip() == "":
+            issues.append({
+                'page_title': response.css('title::text').get() or 'No Title',
+                'img_src': urljoin(response.url, src),
+            })
+
+    title = response.css('title::text').get()
+    if not title or len(title.strip()) < 10:
+        issues.append('title')
+    if not response.css('meta[name="description"]::attr(content)').get():
+        issues.append('description')
+    return issues
+
+
+def analyzer_checks(response):
+    """The same checks driven from one PageRecord"""
+    page = analyze_response(response)
+    issues = []
+    for src, alt in page.images:
+        if not src:
+            continue
+        if alt is None or alt.strip() == "":
+            issues.append({
+                'page_title': page.title or 'No Title',
+                'img_src': urljoin(page.url, src),
+            })
+
+    if not page.title or len(page.title.strip()) < 10:
+        issues.append('title')
+    if not page.meta_description:
+        issues.append('description')
+    return issues
+
+
+def make_response(path):
+    url = f'https://demo-store.com/{path.stem}'
+    return HtmlResponse(url, body=path.read_bytes(), encoding='utf-8', request=Request(url))
+
+
+def bench(func, path, iterations):
+    """Time `func` on fresh responses so both sides pay for parsing"""
+    responses = [make_response(path) for _ in range(iterations)]
+    started = time.perf_counter()
+    for response in responses:
+        func(response)
+    return (time.perf_counter() - started) / iterations
+
+
+def main():
+    iterations = int(sys.argv[1]) if len(sys.argv) > 1 else 200
+
+    print(f"{'Fixture':<24}{'Legacy ms':>12}{'Analyzer ms':>14}{'Speedup':>10}")
+    print("-" * 60)
+
+    for path in sorted(FIXTURES_DIR.glob('*.html')):
+        # Both paths must report the same issues
+        assert len(legacy_checks(make_response(path))) == len(analyzer_checks(make_response(path)))
+
+        legacy = bench(legacy_checks, path, iterations)
+        analyzer = bench(analyzer_checks, path, iterations)
+        print(f"{path.name:<24}{legacy * 1000:>12.3f}{analyzer * 1000:>14.3f}{legacy / analyzer:>9.1f}x")
+
+
+if __name__ == '__main__':
+    main()
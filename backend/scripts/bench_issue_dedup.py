@@ -0,0 +1,100 @@
+"""
+SEO Sentinel - Issue Dedup Benchmark
+Rows written and stored by fingerprinted ingestion vs a full copy per scan
+
+Run from backend/:  python -m scripts.bench_issue_dedup [issues] [scans] [--churn FRACTION]
+
+Simulates a site rescanned daily where most issues persist between scans
+and a small fraction are fixed or newly introduced each time.
+"""
+
+import random
+import sys
+import time
+
+from sqlalchemy import create_engine, func, select
+from sqlalchemy.orm import Session
+
+from app.crawler.crawler_with_db import ScanCrawler
+from app.db.models import Base, Issue, Scan, ScanStatus, User, Website
+from app.db.repositories import IssueRepository
+
+
+def site_issues(ids):
+    for i in ids:
+        page = f'https://shop.example.com/product-{i // 3}'
+        yield {
+            'type': 'missing_alt_text',
+            'page_url': page,
+            'page_title': f'Product {i // 3}',
+            'img_src': f'{page}/images/photo-{i}.jpg',
+            'img_filename': f'photo-{i}.jpg',
+        }
+
+
+def main():
+    args = sys.argv[1:]
+    churn = 0.01
+    if '--churn' in args:
+        churn = float(args[args.index('--churn') + 1])
+        del args[args.index('--churn'):args.index('--churn') + 2]
+    issue_count = int(args[0]) if args else 3000
+    scan_count = int(args[1]) if len(args) > 1 else 365
+
+    engine = create_engine('sqlite://')
+    Base.metadata.create_all(engine)
+    rng = random.Random(42)
+
+    with Session(engine) as session:
+        user = User(email='bench@example.com', hashed_password='x')
+        session.add(user)
+        session.flush()
+        website = Website(user_id=user.id, domain='shop.example.com', url='https://shop.example.com')
+        session.add(website)
+        session.commit()
+
+        crawler = ScanCrawler(session)
+        current = set(range(issue_count))
+        next_id = issue_count
+        written = 0
+        full_copy = 0
+        started = time.perf_counter()
+
+        for _ in range(scan_count):
+            scan = Scan(user_id=user.id, website_id=website.id)
+            session.add(scan)
+            session.flush()
+
+            result = crawler.ingest_issues(scan, site_issues(sorted(current)))
+            scan.status = ScanStatus.COMPLETED
+            session.commit()
+            written += result['new'] + result['resolved']
+            full_copy += len(current)
+
+            # Between scans: some issues get fixed, some new ones appear
+            changes = max(1, int(len(current) * churn))
+            for fixed in rng.sample(sorted(current), changes):
+                current.discard(fixed)
+            current.update(range(next_id, next_id + changes))
+            next_id += changes
+
+        elapsed = time.perf_counter() - started
+        stored = session.scalar(select(func.count()).select_from(Issue))
+        repository = IssueRepository(session)
+
+        query_started = time.perf_counter()
+        new_since_last, _ = repository.list_issues(scan.id, limit=500, new_only=True)
+        query_ms = (time.perf_counter() - query_started) * 1000
+
+    print(f"{scan_count} scans of ~{issue_count:,} issues, {churn:.1%} churn between scans\n")
+    print(f"{'':<28}{'Full copy':>14}{'Fingerprinted':>16}")
+    print("-" * 58)
+    print(f"{'Rows written':<28}{full_copy:>14,}{written:>16,}")
+    print(f"{'Rows stored':<28}{full_copy:>14,}{stored:>16,}")
+    print(f"\nWrite reduction: {full_copy / max(written, 1):,.0f}x   "
+          f"ingest: {elapsed / scan_count * 1000:.1f} ms/scan   "
+          f"'new since last scan' ({len(new_since_last)} rows): {query_ms:.2f} ms")
+
+
+if __name__ == '__main__':
+    main()
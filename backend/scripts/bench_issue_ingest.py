@@ -0,0 +1,131 @@
+"""
+SEO Sentinel - Issue Ingestion Benchmark
+Rows per second for per-object ORM inserts vs the bulk ingestion path
+
+Run from backend/:  python -m scripts.bench_issue_ingest [issues] [--url DATABASE_URL]
+
+Without --url a temporary SQLite file is used; point --url at a local
+PostgreSQL (e.g. postgresql://postgres@localhost/seo_bench) to measure
+the COPY path.
+"""
+
+import os
+import sys
+import tempfile
+import time
+
+from sqlalchemy import create_engine, func, select
+from sqlalchemy.orm import Session
+
+from app.crawler.crawler_with_db import ScanCrawler, issue_to_row
+from app.db.models import Base, Issue, Scan, User, Website
+
+
+# The per-object baseline is slow; cap it so the benchmark stays quick
+ORM_BASELINE_MAX = 20000
+
+
+def synthetic_issues(count):
+    """Spider-shaped issues in the proportions a large shop scan produces"""
+    for i in range(count):
+        page = f'https://shop.example.com/category-{i % 97}/product-{i}'
+        kind = i % 10
+        if kind < 6:
+            yield {
+                'type': 'missing_alt_text',
+                'page_url': page,
+                'page_title': f'Product {i}',
+                'img_src': f'{page}/images/photo-{i}.jpg',
+                'img_filename': f'photo-{i}.jpg',
+            }
+        elif kind < 9:
+            yield {
+                'type': 'meta_issues',
+                'page_url': page,
+                'issues': ['Missing meta description'],
+            }
+        else:
+            yield {
+                'type': 'broken_link',
+                'url': f'https://shop.example.com/old/product-{i}',
+                'status': 404,
+                'referenced_from': page,
+                'timestamp': '2026-01-01T00:00:00',
+            }
+
+
+def create_scan(session):
+    user = User(email=f'bench-{time.time_ns()}@example.com', hashed_password='x')
+    session.add(user)
+    session.flush()
+    website = Website(user_id=user.id, domain='shop.example.com', url='https://shop.example.com')
+    session.add(website)
+    session.flush()
+    scan = Scan(user_id=user.id, website_id=website.id)
+    session.add(scan)
+    session.commit()
+    return scan
+
+
+def bench_orm(engine, count):
+    """Baseline: one Issue object per issue, one flush/commit at the end"""
+    with Session(engine) as session:
+        scan = create_scan(session)
+        started = time.perf_counter()
+        for issue in synthetic_issues(count):
+            session.add(Issue(**issue_to_row(scan.id, issue)))
+        session.commit()
+        return time.perf_counter() - started
+
+
+def bench_bulk(engine, count, batch_size):
+    with Session(engine) as session:
+        scan = create_scan(session)
+        started = time.perf_counter()
+        ScanCrawler(session).ingest_issues(scan, synthetic_issues(count), batch_size)
+        session.commit()
+        elapsed = time.perf_counter() - started
+
+        stored = session.scalar(select(func.count()).select_from(Issue).where(Issue.scan_id == scan.id))
+        assert stored == count, f'expected {count} rows, found {stored}'
+        assert scan.missing_alt_text_count + scan.meta_issues_count + scan.broken_links_count == count
+        return elapsed
+
+
+def main():
+    args = sys.argv[1:]
+    url = None
+    if '--url' in args:
+        url = args[args.index('--url') + 1]
+        del args[args.index('--url'):args.index('--url') + 2]
+    count = int(args[0]) if args else 200000
+
+    tmp_path = None
+    if url is None:
+        fd, tmp_path = tempfile.mkstemp(suffix='.sqlite3')
+        os.close(fd)
+        url = f'sqlite:///{tmp_path}'
+
+    engine = create_engine(url)
+    Base.metadata.create_all(engine)
+    path = 'COPY' if engine.dialect.name == 'postgresql' and engine.dialect.driver == 'psycopg2' else 'executemany'
+
+    print(f"Ingesting {count:,} issues into {engine.dialect.name} ({path} bulk path)")
+    print(f"\n{'Method':<32}{'Rows':>10}{'Seconds':>10}{'Rows/s':>12}")
+    print("-" * 64)
+
+    orm_count = min(count, ORM_BASELINE_MAX)
+    orm_seconds = bench_orm(engine, orm_count)
+    print(f"{'ORM session.add per issue':<32}{orm_count:>10,}{orm_seconds:>10.2f}{orm_count / orm_seconds:>12,.0f}")
+
+    for batch_size in (1000, 5000, 20000):
+        seconds = bench_bulk(engine, count, batch_size)
+        print(f"{f'bulk ({batch_size:,} per batch)':<32}{count:>10,}{seconds:>10.2f}{count / seconds:>12,.0f}")
+
+    engine.dispose()
+    if tmp_path:
+        os.remove(tmp_path)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,171 @@
+"""
+SEO Sentinel - Issue Query Benchmark
+Dashboard issue queries with/without the composite indexes, OFFSET vs keyset pages
+
+Run from backend/:  python -m scripts.bench_issue_queries [rows] [--url DATABASE_URL]
+
+Defaults to 10M synthetic rows in a temporary SQLite file (a few minutes
+to load); pass a smaller row count for a quick run.
+"""
+
+import os
+import statistics
+import sys
+import tempfile
+import time
+
+from sqlalchemy import create_engine, select
+from sqlalchemy.orm import Session
+
+from app.db.models import Base, Issue, Scan, User, Website
+from app.db.repositories import IssueRepository
+
+
+ISSUES_PER_SCAN = 20000
+WEBSITES = 5  # scans take turns: scan n is of website n % WEBSITES
+PAGE = 40
+PAGE_SIZE = 50
+TYPES = ['missing_alt_text'] * 6 + ['meta_issue'] * 3 + ['broken_link']
+SEVERITIES = ['low', 'low', 'medium', 'medium', 'high', 'critical']
+
+COMPOSITE_INDEXES = [index for index in Issue.__table__.indexes if len(index.columns) > 1]
+
+
+def load_rows(engine, count):
+    """Insert `count` issues, ISSUES_PER_SCAN per scan, scan by scan like real ingestion
+
+    Every fifth issue was resolved by the website's next scan.
+    """
+    scans = -(-count // ISSUES_PER_SCAN) + WEBSITES
+    with Session(engine) as session:
+        user = User(email='bench@example.com', hashed_password='x')
+        session.add(user)
+        session.flush()
+        websites = [
+            Website(user_id=user.id, domain=f'shop{n}.example.com', url=f'https://shop{n}.example.com')
+            for n in range(WEBSITES)
+        ]
+        session.add_all(websites)
+        session.flush()
+        website_ids = [website.id for website in websites]
+        session.add_all(Scan(user_id=user.id, website_id=website_ids[n % WEBSITES]) for n in range(1, scans + 1))
+        session.commit()
+
+    sql = (
+        'INSERT INTO issues (scan_id, website_id, issue_type, severity, page_url, is_resolved, resolved_scan_id) '
+        'VALUES (?, ?, ?, ?, ?, ?, ?)'
+    )
+    if engine.dialect.paramstyle != 'qmark':
+        sql = sql.replace('?', '%s')
+
+    batch = []
+    with engine.begin() as conn:
+        for i in range(count):
+            scan_id = i // ISSUES_PER_SCAN + 1
+            batch.append((
+                scan_id,
+                website_ids[scan_id % WEBSITES],
+                TYPES[i % len(TYPES)],
+                SEVERITIES[(i * 7) % len(SEVERITIES)],
+                f'https://shop.example.com/product-{i % 50000}',
+                i % 5 == 0,
+                scan_id + WEBSITES if i % 5 == 0 else None,
+            ))
+            if len(batch) >= 50000:
+                conn.exec_driver_sql(sql, batch)
+                batch = []
+        if batch:
+            conn.exec_driver_sql(sql, batch)
+
+
+def analyze(engine):
+    """Refresh planner statistics, as autovacuum would on a live database"""
+    with engine.begin() as conn:
+        conn.exec_driver_sql('ANALYZE')
+
+
+def timed(fn, repeat=5):
+    samples = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        fn()
+        samples.append(time.perf_counter() - started)
+    return statistics.median(samples) * 1000
+
+
+def offset_page(session, scan_id, **filters):
+    repository = IssueRepository(session)
+    query = repository._filtered(select(Issue), repository._in_scan(scan_id), **filters)
+    query = query.order_by(Issue.id).offset((PAGE - 1) * PAGE_SIZE).limit(PAGE_SIZE)
+    return session.scalars(query).all()
+
+
+def keyset_cursor(repository, scan_id, **filters):
+    """Walk to the cursor a client would hold when asking for page 40"""
+    cursor = None
+    for _ in range(PAGE - 1):
+        _, cursor = repository.list_issues(scan_id, after_id=cursor, limit=PAGE_SIZE, **filters)
+    return cursor
+
+
+def run_queries(engine, scan_id, label):
+    queries = {
+        'unresolved critical, page 40': {'is_resolved': False, 'severity': 'critical'},
+        'missing alt text, page 40': {'issue_type': 'missing_alt_text'},
+        'unresolved broken links, page 40': {'issue_type': 'broken_link', 'is_resolved': False},
+    }
+    with Session(engine) as session:
+        repository = IssueRepository(session)
+        for name, filters in queries.items():
+            offset_ms = timed(lambda: offset_page(session, scan_id, **filters))
+            cursor = keyset_cursor(repository, scan_id, **filters)
+            keyset_ms = timed(lambda: repository.list_issues(scan_id, after_id=cursor, limit=PAGE_SIZE, **filters))
+            print(f"{label:<18}{name:<36}{offset_ms:>12.2f}{keyset_ms:>12.2f}")
+        summary_ms = timed(lambda: repository.summary(scan_id))
+        print(f"{label:<18}{'type x severity summary':<36}{summary_ms:>12.2f}{'':>12}")
+
+
+def main():
+    args = sys.argv[1:]
+    url = None
+    if '--url' in args:
+        url = args[args.index('--url') + 1]
+        del args[args.index('--url'):args.index('--url') + 2]
+    count = int(args[0]) if args else 10_000_000
+
+    tmp_path = None
+    if url is None:
+        fd, tmp_path = tempfile.mkstemp(suffix='.sqlite3')
+        os.close(fd)
+        url = f'sqlite:///{tmp_path}'
+
+    engine = create_engine(url)
+    Base.metadata.create_all(engine)
+    for index in COMPOSITE_INDEXES:
+        index.drop(engine)
+
+    started = time.perf_counter()
+    load_rows(engine, count)
+    analyze(engine)
+    print(f"Loaded {count:,} issues in {time.perf_counter() - started:.1f}s "
+          f"({count // ISSUES_PER_SCAN:,} scans of {ISSUES_PER_SCAN:,})")
+
+    scan_id = max(1, count // ISSUES_PER_SCAN // 2)
+    print(f"\n{'Indexes':<18}{'Query (scan ' + str(scan_id) + ')':<36}{'OFFSET ms':>12}{'Keyset ms':>12}")
+    print("-" * 78)
+    run_queries(engine, scan_id, 'single-column')
+
+    started = time.perf_counter()
+    for index in COMPOSITE_INDEXES:
+        index.create(engine)
+    analyze(engine)
+    print(f"{'(composite indexes built in ' + format(time.perf_counter() - started, '.1f') + 's)':<78}")
+    run_queries(engine, scan_id, 'composite')
+
+    engine.dispose()
+    if tmp_path:
+        os.remove(tmp_path)
+
+
+if __name__ == '__main__':
+    main()
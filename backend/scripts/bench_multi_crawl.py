@@ -0,0 +1,116 @@
+"""
+SEO Sentinel - Multi-Domain Crawl Benchmark
+Pages per second of one worker process crawling small sites one by one vs side by side
+
+Run from backend/:  python -m scripts.bench_multi_crawl [sites] [pages] [--latency SECONDS]
+
+Serves `sites` synthetic sites of `pages` pages from a local HTTP server,
+one per loopback address (127.0.0.2, 127.0.0.3, ...) so every site is its
+own host and download slot. Each page answers after --latency seconds.
+The per-host peak of concurrent requests shows that running sites side by
+side is no less polite to any single host.
+"""
+
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from app.core.config import config
+from app.crawler.runner import CrawlRunner
+
+
+class SiteHandler(BaseHTTPRequestHandler):
+    """Synthetic small site: /p<n> links to five other pages of the same host"""
+
+    pages = 30
+    latency = 0.05
+    lock = threading.Lock()
+    in_flight = {}
+    peak = {}
+    requests = {}
+
+    def do_GET(self):
+        host = self.headers.get('Host', '').split(':')[0]
+        with self.lock:
+            self.in_flight[host] = self.in_flight.get(host, 0) + 1
+            self.peak[host] = max(self.peak.get(host, 0), self.in_flight[host])
+            self.requests[host] = self.requests.get(host, 0) + 1
+        try:
+            time.sleep(self.latency)
+            if self.path == '/':
+                page = 0
+            elif self.path.startswith('/p') and self.path[2:].isdigit():
+                page = int(self.path[2:])
+            else:
+                self.send_error(404)
+                return
+            links = ''.join(f'<a href="/p{(page * 7 + k) % self.pages}">Page {k}</a>' for k in range(1, 6))
+            body = (f'<html><head><title>Page {page} of {host}</title>'
+                    f'<meta name="description" content="Synthetic page {page} for the crawl benchmark."></head>'
+                    f'<body><h1>Page {page}</h1>{links}</body></html>').encode()
+            self.send_response(200)
+            self.send_header('Content-Type', 'text/html')
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+        finally:
+            with self.lock:
+                self.in_flight[host] -= 1
+
+    def log_message(self, *args):
+        pass
+
+
+def crawl_kwargs(host, port):
+    return {'start_url': f'http://{host}:{port}/', 'use_sitemaps': False, 'validate_links': False}
+
+
+def run(label, runner, hosts, port, pages, side_by_side):
+    SiteHandler.peak.clear()
+    SiteHandler.requests.clear()
+    started = time.perf_counter()
+    if side_by_side:
+        futures = [runner.submit(host, pages, **crawl_kwargs(host, port)) for host in hosts]
+        results = [future.result() for future in futures]
+    else:
+        results = [runner.crawl(host, pages, **crawl_kwargs(host, port)) for host in hosts]
+    elapsed = time.perf_counter() - started
+
+    crawled = sum(result['stats']['pages_crawled'] for result in results)
+    requests = sum(SiteHandler.requests.values())
+    print(f"{label:<16}{len(hosts):>7}{crawled:>9,}{elapsed:>10.1f}{crawled / elapsed:>10.1f}"
+          f"{requests / elapsed:>10.1f}{max(SiteHandler.peak.values()):>14}")
+    return crawled / elapsed
+
+
+def main():
+    args = sys.argv[1:]
+    if '--latency' in args:
+        SiteHandler.latency = float(args[args.index('--latency') + 1])
+        del args[args.index('--latency'):args.index('--latency') + 2]
+    sites = int(args[0]) if args else config.MULTI_CRAWL['batch_size']
+    SiteHandler.pages = int(args[1]) if len(args) > 1 else 30
+
+    server = ThreadingHTTPServer(('0.0.0.0', 0), SiteHandler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    port = server.server_address[1]
+    hosts = [f'127.0.0.{i + 2}' for i in range(sites)]
+
+    print(f"{sites} sites x {SiteHandler.pages} pages, {SiteHandler.latency * 1000:.0f} ms per response, "
+          f"download delay {config.CRAWLER['download_delay']}s")
+    print(f"{'Mode':<16}{'Sites':>7}{'Pages':>9}{'Seconds':>10}{'Pages/s':>10}{'Req/s':>10}{'Peak per host':>14}")
+    print("-" * 76)
+    runner = CrawlRunner()
+    try:
+        one_by_one = run('one by one', runner, hosts, port, SiteHandler.pages, side_by_side=False)
+        multi = run('side by side', runner, hosts, port, SiteHandler.pages, side_by_side=True)
+    finally:
+        runner.stop()
+        server.shutdown()
+    print(f"Side by side: {multi / one_by_one:.1f}x the pages per second of one worker process")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,107 @@
+"""
+SEO Sentinel - Full-Detail PDF Benchmark
+Pages per second and peak RSS of full-detail reports: streamed chunks vs one in-memory table
+
+Run from backend/:  python -m scripts.bench_pdf_report [sizes...] [--one-table-max N]
+
+  streamed   issues read per group from NDJSON, tables of REPORT['table_chunk_rows']
+  one table  every issue loaded into memory and rendered as a single table
+             (what lifting the 20/25-row caps would do); skipped above
+             --one-table-max issues (default 10000) because it grows quadratically
+
+Every run happens in a fresh interpreter so peak RSS is its own.
+"""
+
+import json
+import os
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+
+from app.crawler.sinks import group_issues, read_ndjson_issues
+
+
+def write_issues(path, count):
+    """Synthetic crawl output: half broken links, a third missing alt text, the rest meta issues"""
+    with open(path, 'w', encoding='utf-8') as f:
+        for i in range(count):
+            page = f'https://shop.example.com/category-{i % 97}/product-{i}'
+            if i % 6 < 3:
+                issue = {'type': 'broken_link', 'url': f'https://shop.example.com/old/item-{i}', 'status': 404,
+                         'referenced_from': page, 'link_type': 'page'}
+            elif i % 6 < 5:
+                issue = {'type': 'missing_alt_text', 'page_url': page, 'page_title': f'Product {i} | Example Shop',
+                         'img_src': f'https://cdn.example.com/img/{i}.jpg', 'img_filename': f'{i}.jpg'}
+            else:
+                issue = {'type': 'meta_issues', 'page_url': page, 'issues': ['Missing meta description']}
+            f.write(json.dumps(issue) + '\n')
+
+
+def render(mode, issues_file, output):
+    """Child process: render one report, print its stats as JSON"""
+    from app.reports.pdf_generator import SEOReportGenerator
+
+    counts = {'broken_link': 0, 'missing_alt_text': 0, 'meta_issues': 0}
+    for issue in read_ndjson_issues(issues_file):
+        counts[issue['type']] += 1
+    data = {
+        'domain': 'shop.example.com',
+        'stats': {'pages_crawled': 10000, 'broken_links': counts['broken_link'],
+                  'missing_alt_text': counts['missing_alt_text'], 'meta_issues': counts['meta_issues']},
+        'issues_file': issues_file,
+    }
+    started = time.perf_counter()
+    if mode == 'one table':
+        data['issues'] = group_issues(read_ndjson_issues(issues_file))
+        generator = SEOReportGenerator(None, output, data=data, full_detail=True)
+        generator.chunk_rows = sum(counts.values())
+    else:
+        generator = SEOReportGenerator(None, output, data=data, full_detail=True)
+    generator.generate()
+    seconds = time.perf_counter() - started
+    print(json.dumps({
+        'pages': generator.pages,
+        'seconds': seconds,
+        'rss_mb': resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024,
+        'pdf_mb': os.path.getsize(output) / 1024 / 1024,
+    }))
+
+
+def run(mode, issues_file, output):
+    completed = subprocess.run(
+        [sys.executable, '-m', 'scripts.bench_pdf_report', '--child', mode, issues_file, output],
+        check=True, capture_output=True, text=True,
+    )
+    return json.loads(completed.stdout.strip().splitlines()[-1])
+
+
+def main():
+    args = sys.argv[1:]
+    if args and args[0] == '--child':
+        render(*args[1:4])
+        return
+    one_table_max = 10000
+    if '--one-table-max' in args:
+        one_table_max = int(args[args.index('--one-table-max') + 1])
+        del args[args.index('--one-table-max'):args.index('--one-table-max') + 2]
+    sizes = [int(arg) for arg in args] or [1000, 10000, 100000]
+
+    print(f"{'Issues':>8}  {'Mode':<11}{'Pages':>8}{'Seconds':>10}{'Pages/s':>10}{'Peak RSS MB':>13}{'PDF MB':>9}")
+    print("-" * 69)
+    with tempfile.TemporaryDirectory() as tmp:
+        for size in sizes:
+            issues_file = os.path.join(tmp, f'issues_{size}.ndjson')
+            write_issues(issues_file, size)
+            for mode in ('streamed', 'one table'):
+                if mode == 'one table' and size > one_table_max:
+                    print(f"{size:>8,}  {mode:<11}{'skipped':>8}")
+                    continue
+                stats = run(mode, issues_file, os.path.join(tmp, 'report.pdf'))
+                print(f"{size:>8,}  {mode:<11}{stats['pages']:>8,}{stats['seconds']:>10.1f}"
+                      f"{stats['pages'] / stats['seconds']:>10.1f}{stats['rss_mb']:>13.1f}{stats['pdf_mb']:>9.1f}")
+
+
+if __name__ == '__main__':
+    main()
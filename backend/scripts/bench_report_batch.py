@@ -0,0 +1,109 @@
+"""
+SEO Sentinel - Batch Report Rendering Benchmark
+Reports per second for a weekly batch of Starter-sized reports: serial vs the render pool
+
+Run from backend/:  python -m scripts.bench_report_batch [reports] [--processes 2,4,8]
+
+  rebuilt styles  one after another, stylesheet and table styles rebuilt per report
+  cached styles   one after another, styles built once (report_styles())
+  pool N          render_jobs() across N worker processes
+"""
+
+import json
+import os
+import random
+import sys
+import tempfile
+import time
+
+from app.reports.pdf_generator import report_styles
+from app.services.report_service import render_job, render_jobs
+
+
+def make_jobs(directory, count, rng):
+    """Summary-mode report jobs with 20-300 issues each, like a Starter site"""
+    jobs = []
+    for scan_id in range(1, count + 1):
+        issues_file = os.path.join(directory, f'scan_{scan_id}_issues.ndjson')
+        counts = {'broken_links': 0, 'missing_alt_text': 0, 'meta_issues': 0}
+        with open(issues_file, 'w', encoding='utf-8') as f:
+            for i in range(rng.randint(20, 300)):
+                page = f'https://site{scan_id}.example.com/page-{i % 40}'
+                kind = rng.choice(['broken_link', 'missing_alt_text', 'meta_issues'])
+                if kind == 'broken_link':
+                    issue = {'type': kind, 'url': f'{page}/gone-{i}', 'status': 404, 'referenced_from': page}
+                    counts['broken_links'] += 1
+                elif kind == 'missing_alt_text':
+                    issue = {'type': kind, 'page_url': page, 'page_title': f'Page {i}', 'img_filename': f'{i}.jpg'}
+                    counts['missing_alt_text'] += 1
+                else:
+                    issue = {'type': kind, 'page_url': page, 'issues': ['Missing meta description']}
+                    counts['meta_issues'] += 1
+                f.write(json.dumps(issue) + '\n')
+        jobs.append({
+            'scan_id': scan_id,
+            'website_id': scan_id,
+            'path': os.path.join(directory, f'scan_{scan_id}_report.pdf'),
+            'data': {'domain': f'site{scan_id}.example.com', 'scan_id': scan_id,
+                     'stats': {'pages_crawled': 40, **counts}, 'issues_file': issues_file},
+            'full_detail': False,
+            'weight': sum(counts.values()),
+        })
+    return jobs
+
+
+def rebuilt_styles(jobs):
+    outcomes = []
+    for job in jobs:
+        report_styles.cache_clear()
+        outcomes.append(render_job(job))
+    return outcomes
+
+
+def cached_styles(jobs):
+    report_styles()
+    return [render_job(job) for job in jobs]
+
+
+def main():
+    args = sys.argv[1:]
+    processes = sorted({2, os.cpu_count() or 1})
+    if '--processes' in args:
+        processes = [int(value) for value in args[args.index('--processes') + 1].split(',')]
+        del args[args.index('--processes'):args.index('--processes') + 2]
+    count = int(args[0]) if args else 200
+
+    # The generator prints one line per report; keep the table readable
+    sys.stdout.flush()
+    real_stdout = os.dup(1)
+    with tempfile.TemporaryDirectory() as tmp:
+        jobs = make_jobs(tmp, count, random.Random(3))
+        print(f"{count} summary reports, {os.cpu_count()} CPU(s)")
+        print(f"{'Mode':<16}{'Reports':>9}{'Pages':>8}{'Seconds':>10}{'Reports/s':>12}{'Pages/s':>10}")
+        print("-" * 65)
+        modes = [('rebuilt styles', rebuilt_styles), ('cached styles', cached_styles)]
+        modes += [(f'pool {n}', lambda jobs, n=n: render_jobs(jobs, n)) for n in processes]
+        for label, render in modes:
+            sys.stdout.flush()
+            devnull = os.open(os.devnull, os.O_WRONLY)
+            os.dup2(devnull, 1)
+            try:
+                started = time.perf_counter()
+                outcomes = render(jobs)
+                seconds = time.perf_counter() - started
+            finally:
+                sys.stdout.flush()
+                os.dup2(real_stdout, 1)
+                os.close(devnull)
+            for job in jobs:
+                if os.path.exists(job['path']):
+                    os.remove(job['path'])  # or the next mode would find every report already rendered
+            ok = [outcome for outcome in outcomes if not outcome['error']]
+            pages = sum(outcome['pages'] for outcome in ok)
+            print(f"{label:<16}{len(ok):>9}{pages:>8,}{seconds:>10.2f}{len(ok) / seconds:>12.1f}{pages / seconds:>10.1f}")
+            if len(ok) < len(outcomes):
+                print(f"  {len(outcomes) - len(ok)} failed, e.g. {next(o['error'] for o in outcomes if o['error'])}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,87 @@
+"""
+SEO Sentinel - Report Cache Benchmark
+Reports per second of a weekly rescan when some sites' findings haven't changed
+
+Run from backend/:  python -m scripts.bench_report_cache [reports] [--unchanged 0.6]
+
+  week 1          every report rendered and added to an empty cache
+  week 2 cold     every report rendered again (key and store overhead, all misses)
+  week 2 cached   --unchanged of the sites found the same issues (reshuffled);
+                  their reports are linked from the cache, the rest rendered
+"""
+
+import json
+import os
+import random
+import sys
+import tempfile
+import time
+
+from app.reports.cache import ReportCache
+from app.services.scan_service import write_report
+from scripts.bench_report_batch import make_jobs
+
+
+def rescan(jobs, directory, unchanged, rng):
+    """Week 2: the same sites, issues reshuffled; the changed ones lose one issue"""
+    week = []
+    for job in jobs:
+        with open(job['data']['issues_file'], encoding='utf-8') as f:
+            lines = f.readlines()
+        rng.shuffle(lines)
+        stats = dict(job['data']['stats'])
+        if rng.random() >= unchanged:
+            fixed = json.loads(lines.pop())
+            group = {'broken_link': 'broken_links'}.get(fixed['type'], fixed['type'])
+            stats[group] -= 1
+        issues_file = os.path.join(directory, f"week2_scan_{job['scan_id']}_issues.ndjson")
+        with open(issues_file, 'w', encoding='utf-8') as f:
+            f.writelines(lines)
+        week.append({**job, 'path': os.path.join(directory, f"week2_scan_{job['scan_id']}_report.pdf"),
+                     'data': {**job['data'], 'stats': stats, 'issues_file': issues_file}})
+    return week
+
+
+def run(label, jobs, cache):
+    sys.stdout.flush()
+    real_stdout, devnull = os.dup(1), os.open(os.devnull, os.O_WRONLY)
+    os.dup2(devnull, 1)  # the generator prints one line per report
+    try:
+        started = time.perf_counter()
+        written = [write_report(job['path'], job['data'], cache=cache) for job in jobs]
+        seconds = time.perf_counter() - started
+    finally:
+        sys.stdout.flush()
+        os.dup2(real_stdout, 1)
+        os.close(devnull)
+    hits = sum(1 for report in written if report['cache_hit'])
+    print(f"{label:<17}{len(jobs):>9}{hits:>7}{seconds:>10.2f}{len(jobs) / seconds:>12.1f}")
+
+
+def main():
+    args = sys.argv[1:]
+    unchanged = 0.6
+    if '--unchanged' in args:
+        unchanged = float(args[args.index('--unchanged') + 1])
+        del args[args.index('--unchanged'):args.index('--unchanged') + 2]
+    count = int(args[0]) if args else 200
+    rng = random.Random(3)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        jobs = make_jobs(tmp, count, rng)
+        week2 = rescan(jobs, tmp, unchanged, rng)
+        cache = ReportCache(os.path.join(tmp, 'cache'))
+        print(f"{count} Starter reports, {unchanged:.0%} of sites unchanged in week 2")
+        print(f"{'Run':<17}{'Reports':>9}{'Hits':>7}{'Seconds':>10}{'Reports/s':>12}")
+        print("-" * 55)
+        run('week 1', jobs, cache)
+        run('week 2 cold', week2, ReportCache(os.path.join(tmp, 'cold')))
+        for job in week2:
+            os.remove(job['path'])
+        run('week 2 cached', week2, cache)
+        size = cache.evict()
+        print(f"Cache: {size['entries']} entries, {size['bytes'] / 1024 ** 2:.1f} MB")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,112 @@
+"""
+SEO Sentinel - Retention Benchmark
+Longest single delete transaction: one ON DELETE CASCADE vs batched archival deletes
+
+Run from backend/:  python -m scripts.bench_retention [issues_per_scan] [scans]
+
+Builds a site whose old scans each own many resolved issues (plus a few
+still-open ones), then expires them both ways on fresh SQLite files.
+"""
+
+import os
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+from sqlalchemy import create_engine, event, func, select
+from sqlalchemy.orm import Session
+
+from app.db.models import Base, Issue, Scan, ScanStatus, User, Website
+from app.services.retention_service import RetentionService, read_archive
+
+OPEN_PER_SCAN = 10
+
+
+def build(url, issues_per_scan, scan_count):
+    engine = create_engine(url)
+
+    @event.listens_for(engine, 'connect')
+    def enable_foreign_keys(connection, record):
+        connection.execute('PRAGMA foreign_keys=ON')  # SQLite only cascades with this on
+
+    Base.metadata.create_all(engine)
+    old = datetime.now() - timedelta(days=400)
+    with Session(engine) as session:
+        user = User(email='bench@example.com', hashed_password='x')
+        session.add(user)
+        session.flush()
+        website = Website(user_id=user.id, domain='shop.example.com', url='https://shop.example.com')
+        session.add(website)
+        session.flush()
+        for n in range(scan_count + 1):
+            finished = old + timedelta(days=n) if n < scan_count else datetime.now()
+            scan = Scan(user_id=user.id, website_id=website.id, status=ScanStatus.COMPLETED, completed_at=finished)
+            session.add(scan)
+            session.flush()
+            if n == scan_count:
+                break  # Latest scan: always kept
+            session.execute(Issue.__table__.insert(), [
+                {
+                    'scan_id': scan.id, 'website_id': website.id, 'issue_type': 'missing_alt_text',
+                    'severity': 'low', 'page_url': f'https://shop.example.com/p-{n}-{i}',
+                    'image_url': f'https://shop.example.com/p-{n}-{i}/photo.jpg',
+                    'is_resolved': i >= OPEN_PER_SCAN, 'resolved_at': finished if i >= OPEN_PER_SCAN else None,
+                }
+                for i in range(issues_per_scan)
+            ])
+        session.commit()
+    return engine
+
+
+def cascade_delete(engine, now):
+    """Baseline: delete each expired scan row and let the database cascade"""
+    longest = 0.0
+    with Session(engine) as session:
+        ids = session.scalars(select(Scan.id).where(Scan.completed_at < now - timedelta(days=90))).all()
+        for scan_id in ids:
+            started = time.perf_counter()
+            session.execute(Scan.__table__.delete().where(Scan.id == scan_id))
+            session.commit()
+            longest = max(longest, time.perf_counter() - started)
+        remaining = session.scalar(select(func.count()).select_from(Issue))
+    return len(ids), longest * 1000, remaining
+
+
+def main():
+    args = sys.argv[1:]
+    issues_per_scan = int(args[0]) if args else 100000
+    scan_count = int(args[1]) if len(args) > 1 else 5
+    now = datetime.now()
+
+    tmp_dir = tempfile.mkdtemp()
+    total = issues_per_scan * scan_count
+    print(f"{scan_count} expired scans x {issues_per_scan:,} issues ({OPEN_PER_SCAN} still open per scan)\n")
+    print(f"{'Method':<28}{'Seconds':>10}{'Longest txn ms':>16}{'Issues left':>13}")
+    print("-" * 67)
+
+    engine = build(f'sqlite:///{tmp_dir}/cascade.sqlite3', issues_per_scan, scan_count)
+    started = time.perf_counter()
+    _, longest_ms, remaining = cascade_delete(engine, now)
+    print(f"{'ON DELETE CASCADE':<28}{time.perf_counter() - started:>10.2f}{longest_ms:>16.1f}{remaining:>13,}")
+    engine.dispose()
+
+    engine = build(f'sqlite:///{tmp_dir}/batched.sqlite3', issues_per_scan, scan_count)
+    with Session(engine) as session:
+        service = RetentionService(session, archive_dir=os.path.join(tmp_dir, 'archive'), batch_pause=0)
+        started = time.perf_counter()
+        stats = service.run(now)
+        elapsed = time.perf_counter() - started
+        remaining = session.scalar(select(func.count()).select_from(Issue))
+    print(f"{'archive + batched deletes':<28}{elapsed:>10.2f}{stats['max_batch_ms']:>16.1f}{remaining:>13,}")
+    engine.dispose()
+
+    archived = sum(1 for path in stats['archives'] for record in read_archive(path) if record['record'] == 'issue')
+    size = sum(os.path.getsize(path) for path in stats['archives'])
+    print(f"\nArchived {archived:,} of {total:,} issues in {len(stats['archives'])} files "
+          f"({size / 1024:,.0f} KiB, {stats['archives'][0].rsplit('.', 1)[-1]}), "
+          f"{stats['batches']} delete batches; open issues kept, scans trimmed: {stats['scans_trimmed']}")
+
+
+if __name__ == '__main__':
+    main()
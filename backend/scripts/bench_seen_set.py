@@ -0,0 +1,87 @@
+"""
+SEO Sentinel - Seen Set Benchmark
+Bytes per URL and lookup throughput of FingerprintSet vs Python sets
+
+Run from backend/:  python -m scripts.bench_seen_set [urls] [--mmap PATH]
+"""
+
+import hashlib
+import os
+import sys
+import time
+
+from app.crawler.frontier import url_fingerprint
+from app.crawler.seen_set import FingerprintSet
+
+
+def synthetic_urls(count, offset=0):
+    for i in range(offset, offset + count):
+        yield f'https://shop.example.com/category-{i % 997}/product-{i}?color={i % 13}'
+
+
+def container_bytes(container):
+    """Table size for FingerprintSet; table plus element objects for Python sets"""
+    if isinstance(container, FingerprintSet):
+        return container.nbytes
+    return sys.getsizeof(container) + sum(sys.getsizeof(item) for item in container)
+
+
+def measure(label, build, lookup, count):
+    started = time.perf_counter()
+    container = build()
+    build_seconds = time.perf_counter() - started
+
+    started = time.perf_counter()
+    hits = lookup(container)
+    lookup_seconds = time.perf_counter() - started
+
+    nbytes = container_bytes(container)
+    print(f"{label:<28}{nbytes / count:>12.1f}{count / build_seconds:>14,.0f}{2 * count / lookup_seconds:>16,.0f}{hits:>10}")
+    return container
+
+
+def main():
+    args = sys.argv[1:]
+    mmap_path = None
+    if '--mmap' in args:
+        mmap_path = args[args.index('--mmap') + 1]
+        del args[args.index('--mmap'):args.index('--mmap') + 2]
+    count = int(args[0]) if args else 500000
+
+    print(f"Preparing {count:,} URL fingerprints...")
+    fingerprints = [url_fingerprint(url) for url in synthetic_urls(count)]
+    misses = [url_fingerprint(url) for url in synthetic_urls(count, offset=count)]
+    hex_digests = [hashlib.sha1(str(fp).encode()).hexdigest() for fp in fingerprints]
+    hex_misses = [hashlib.sha1(str(fp).encode()).hexdigest() for fp in misses]
+
+    print(f"\n{'Structure':<28}{'Bytes/URL':>12}{'Inserts/s':>14}{'Lookups/s':>16}{'Hits':>10}")
+    print("-" * 80)
+
+    def build_packed():
+        packed = FingerprintSet(path=mmap_path)
+        for fp in fingerprints:
+            packed.add(fp)
+        return packed
+
+    def lookup_ints(container):
+        return sum(1 for fp in fingerprints if fp in container) + sum(1 for fp in misses if fp in container)
+
+    packed = measure('FingerprintSet' + (' (mmap)' if mmap_path else ''), build_packed, lookup_ints, count)
+    measure('set[int]', lambda: set(fingerprints), lookup_ints, count)
+    measure(
+        'set[str] (scrapy default)',
+        lambda: set(hex_digests),
+        lambda c: sum(1 for h in hex_digests if h in c) + sum(1 for h in hex_misses if h in c),
+        count
+    )
+
+    projected = packed.nbytes / count * 5_000_000
+    print(f"\nProjected FingerprintSet size for 5M URLs: {projected / 1024 ** 2:,.0f} MB")
+
+    packed.close()
+    if mmap_path and os.path.exists(mmap_path):
+        os.remove(mmap_path)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,120 @@
+"""
+SEO Sentinel - Trend Query Benchmark
+90-day health chart from raw scans/issues vs the ScanTrend rollups, as history grows
+
+Run from backend/:  python -m scripts.bench_trends [issues] [years]
+
+Simulates one daily scan per day with 1% churn, then times the chart
+query after each simulated year of history.
+"""
+
+import random
+import statistics
+import sys
+import time
+from datetime import datetime, timedelta
+
+from sqlalchemy import create_engine, func, or_, select
+from sqlalchemy.orm import Session
+
+from app.crawler.crawler_with_db import ScanCrawler
+from app.db.models import Base, Issue, Scan, ScanStatus, User, Website
+from app.db.repositories import TrendRepository
+
+CHART_DAYS = 90
+SEVERITIES = ['low', 'medium', 'high', 'critical']
+
+
+def site_issues(ids):
+    for i in ids:
+        page = f'https://shop.example.com/product-{i // 3}'
+        if i % 4:
+            yield {'type': 'missing_alt_text', 'page_url': page, 'img_src': f'{page}/photo-{i}.jpg'}
+        else:
+            yield {'type': 'broken_link', 'url': f'{page}/old-{i}', 'status': 404 if i % 8 else 500,
+                   'referenced_from': page}
+
+
+def raw_chart(session, website_id, since):
+    """What a chart costs without rollups: open issues as of each day's last scan"""
+    scans = session.execute(
+        select(func.date(Scan.completed_at), func.max(Scan.id))
+        .where(Scan.website_id == website_id, Scan.completed_at >= since)
+        .group_by(func.date(Scan.completed_at))
+    ).all()
+    points = []
+    for day, scan_id in scans:
+        counts = session.execute(
+            select(Issue.issue_type, Issue.severity, func.count(Issue.id))
+            .where(Issue.website_id == website_id, Issue.scan_id <= scan_id,
+                   or_(Issue.resolved_scan_id.is_(None), Issue.resolved_scan_id > scan_id))
+            .group_by(Issue.issue_type, Issue.severity)
+        ).all()
+        points.append((day, counts))
+    return points
+
+
+def timed(fn, repeat=5):
+    samples = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        fn()
+        samples.append(time.perf_counter() - started)
+    return statistics.median(samples) * 1000
+
+
+def main():
+    args = sys.argv[1:]
+    issue_count = int(args[0]) if args else 2000
+    years = int(args[1]) if len(args) > 1 else 3
+
+    engine = create_engine('sqlite://')
+    Base.metadata.create_all(engine)
+    rng = random.Random(42)
+    first_day = datetime(2026, 1, 1, 3, 0)
+
+    print(f"Daily scans of ~{issue_count:,} issues, {CHART_DAYS}-day chart\n")
+    print(f"{'History':<12}{'Scans':>8}{'Issue rows':>12}{'Raw ms':>10}{'Rollup ms':>12}{'Rollup rows':>13}")
+    print("-" * 67)
+
+    with Session(engine) as session:
+        user = User(email='bench@example.com', hashed_password='x')
+        session.add(user)
+        session.flush()
+        website = Website(user_id=user.id, domain='shop.example.com', url='https://shop.example.com')
+        session.add(website)
+        session.commit()
+
+        crawler = ScanCrawler(session)
+        trends = TrendRepository(session)
+        current = set(range(issue_count))
+        next_id = issue_count
+        day = 0
+
+        for year in range(1, years + 1):
+            for _ in range(365):
+                completed_at = first_day + timedelta(days=day)
+                scan = Scan(user_id=user.id, website_id=website.id, status=ScanStatus.COMPLETED,
+                            completed_at=completed_at)
+                session.add(scan)
+                session.flush()
+                result = crawler.ingest_issues(scan, site_issues(sorted(current)))
+                trends.record_scan(scan, result['breakdown'], completed_at)
+                session.commit()
+
+                changes = max(1, issue_count // 100)
+                current.difference_update(rng.sample(sorted(current), changes))
+                current.update(range(next_id, next_id + changes))
+                next_id += changes
+                day += 1
+
+            since = first_day + timedelta(days=day - CHART_DAYS)
+            rows = session.scalar(select(func.count()).select_from(Issue))
+            raw_ms = timed(lambda: raw_chart(session, website.id, since), repeat=3)
+            rollup_ms = timed(lambda: trends.breakdown(website.id, 'day', since))
+            points = len(trends.breakdown(website.id, 'day', since))
+            print(f"{f'{year} year(s)':<12}{day:>8,}{rows:>12,}{raw_ms:>10.1f}{rollup_ms:>12.2f}{points:>13,}")
+
+
+if __name__ == '__main__':
+    main()
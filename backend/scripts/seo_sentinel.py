@@ -3,44 +3,53 @@ SEO Sentinel - Complete Integration Script
 Run a full SEO audit and generate a PDF report in one command
 """
 
-import subprocess
+import json
 import sys
 import os
 from datetime import datetime
-from app.reports.pdf_generator import SEOReportGenerator
+from app.crawler.preflight import crawl_kwargs, run_preflight
+from app.crawler.runner import get_crawl_runner
+from app.services.scan_service import write_report
 
 
 class SEOSentinel:
     """Orchestrates the complete SEO audit workflow"""
     
     def __init__(self, domain, max_pages=500):
+        self.target = domain
         self.domain = domain.replace('https://', '').replace('http://', '').strip('/')
         self.max_pages = max_pages
         self.timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
         self.json_file = f'seo_report_{self.domain.replace(".", "_")}.json'
         self.pdf_file = f'seo_report_{self.domain.replace(".", "_")}_{self.timestamp}.pdf'
+        self.results = None
+        self.preflight = None
+    
+    def run_preflight(self):
+        """Probe DNS, redirects, robots.txt and sitemaps before committing to a crawl"""
+        print(f"\n🛫 Pre-flight check for: {self.target}")
+        self.preflight = run_preflight(self.target)
+        if not self.preflight['ok']:
+            print(f"❌ Pre-flight failed ({self.preflight['reason']}), not crawling")
+            return False
+        sitemaps = self.preflight['sitemaps']
+        print(f"✅ {self.preflight['start_url']} in {self.preflight['elapsed']}s "
+              f"(~{self.preflight['estimated_pages']} pages, {sitemaps['files']} sitemap file(s))")
+        return True
     
     def run_crawler(self):
-        """Execute the Scrapy spider"""
+        """Execute the Scrapy spider in-process"""
         print(f"\n🕷️  Starting SEO crawl for: {self.domain}")
         print(f"📊 Max pages: {self.max_pages}")
         print("-" * 60)
         
-        cmd = [
-            'scrapy', 'runspider', 'seo_spider.py',
-            '-a', f'domain={self.domain}',
-            '-a', f'max_pages={self.max_pages}',
-            '--nolog'  # Suppress Scrapy logs for cleaner output
-        ]
-        
         try:
-            result = subprocess.run(cmd, capture_output=True, text=True, check=True)
-            print(result.stdout)
+            spider_kwargs = crawl_kwargs(self.preflight) if self.preflight else {}
+            self.results = get_crawl_runner().crawl(self.domain, self.max_pages, **spider_kwargs)
             print("✅ Crawl completed successfully!")
             return True
-        except subprocess.CalledProcessError as e:
+        except Exception as e:
             print(f"❌ Crawler failed: {e}")
-            print(e.stderr)
             return False
     
     def generate_pdf(self):
@@ -48,13 +57,19 @@ class SEOSentinel:
         print(f"\n📄 Generating PDF report...")
         print("-" * 60)
         
-        if not os.path.exists(self.json_file):
+        if self.results is None and not os.path.exists(self.json_file):
             print(f"❌ JSON file not found: {self.json_file}")
             return False
         
         try:
-            generator = SEOReportGenerator(self.json_file, self.pdf_file)
-            generator.generate()
+            data = self.results
+            if data is None:
+                with open(self.json_file) as f:
+                    data = json.load(f)
+            # Unchanged findings since the last audit: link the earlier PDF instead of rendering again
+            written = write_report(self.pdf_file, data)
+            if written['cache_hit']:
+                print(f"♻️  Findings unchanged since the last audit, reused its report")
             print(f"✅ PDF report saved: {self.pdf_file}")
             return True
         except Exception as e:
@@ -73,15 +88,19 @@ class SEOSentinel:
         print("🎯 SEO SENTINEL - Automated Website Health Check")
         print("=" * 60)
         
-        # Step 1: Crawl the site
+        # Step 1: Pre-flight, so a dead or blocked site fails in seconds
+        if not self.run_preflight():
+            return False
+        
+        # Step 2: Crawl the site
         if not self.run_crawler():
             return False
         
-        # Step 2: Generate PDF
+        # Step 3: Generate PDF
         if not self.generate_pdf():
             return False
         
-        # Step 3: Cleanup
+        # Step 4: Cleanup
         if cleanup_json:
             self.cleanup(keep_json=False)
         
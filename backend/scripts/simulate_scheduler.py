@@ -0,0 +1,139 @@
+"""
+SEO Sentinel - Scheduler Simulation
+Queue latency per tier for the scan scheduler over simulated days of 1-minute ticks
+
+Run from backend/:  python -m scripts.simulate_scheduler [websites] [days] [--max-in-flight N]
+
+Two scenarios on the same synthetic customer base (in-memory SQLite):
+  herd    every website due at midnight, no jitter (what a cron at 00:00 does)
+  spread  first runs spread over one interval, +/- jitter on every reschedule
+Crawls take 1-15 minutes; at most max_in_flight run at once (the default mix
+needs ~75% of the default capacity). The full 100k run takes ~12 minutes.
+"""
+
+import heapq
+import random
+import statistics
+import sys
+import time
+from datetime import datetime, timedelta
+
+from sqlalchemy import create_engine, func, insert, select, update
+from sqlalchemy.orm import Session
+
+from app.core.config import config
+from app.db.models import Base, Scan, ScanStatus, SubscriptionTier, User, Website
+from app.services.scheduler_service import ScanScheduler
+
+# tier: (share of users, websites per user range, scan frequency)
+CUSTOMERS = {
+    SubscriptionTier.FREE: (0.45, (1, 1), 'weekly'),
+    SubscriptionTier.STARTER: (0.35, (1, 1), 'weekly'),
+    SubscriptionTier.PROFESSIONAL: (0.17, (1, 5), 'daily'),
+    SubscriptionTier.ENTERPRISE: (0.03, (2, 10), 'daily'),
+}
+MAX_WEBSITES = {'free': 1, 'starter': 1, 'professional': 5, 'enterprise': 100}
+
+
+def build(engine, website_count, rng, due_at=None):
+    """Users and websites in the CUSTOMERS mix; returns the website count per tier"""
+    users, websites, per_tier = [], [], {}
+    user_id = 0
+    while len(websites) < website_count:
+        user_id += 1
+        pick = rng.random()
+        for tier, (share, (low, high), frequency) in CUSTOMERS.items():
+            pick -= share
+            if pick <= 0:
+                break
+        users.append({'id': user_id, 'email': f'user{user_id}@example.com', 'hashed_password': 'x',
+                      'subscription_tier': tier, 'max_websites': MAX_WEBSITES[tier.value]})
+        for _ in range(min(rng.randint(low, high), website_count - len(websites))):
+            websites.append({'user_id': user_id, 'domain': f'site{len(websites)}.example.com',
+                             'url': f'https://site{len(websites)}.example.com', 'is_active': True,
+                             'scan_frequency': frequency, 'next_scan_at': due_at})
+            per_tier[tier.value] = per_tier.get(tier.value, 0) + 1
+
+    with engine.begin() as conn:
+        conn.execute(insert(User), users)
+        conn.execute(insert(Website), websites)
+    return per_tier
+
+
+def percentile(values, fraction):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * fraction))] if values else 0.0
+
+
+def simulate(scenario, website_count, days, max_in_flight):
+    rng = random.Random(7)
+    engine = create_engine('sqlite://')
+    Base.metadata.create_all(engine)
+    start = datetime(2026, 1, 5)  # a Monday, 00:00
+    per_tier = build(engine, website_count, rng, due_at=start if scenario == 'herd' else None)
+
+    latencies = {}
+    dispatched_per_minute = []
+    tick_ms = []
+    running = []  # heap of (finish_time, scan_id)
+
+    with Session(engine) as session:
+        scheduler = ScanScheduler(session, rng=random.Random(11))
+        scheduler.settings = {**config.SCHEDULER, 'max_in_flight': max_in_flight,
+                              'jitter': 0 if scenario == 'herd' else config.SCHEDULER['jitter']}
+        if scenario == 'spread':
+            scheduler.schedule_new(start, limit=None)
+            session.commit()
+
+        now = start
+        end = start + timedelta(days=days)
+        while now < end:
+            finished = []
+            while running and running[0][0] <= now:
+                finished.append(heapq.heappop(running)[1])
+            if finished:
+                session.execute(update(Scan).where(Scan.id.in_(finished))
+                                .values(status=ScanStatus.COMPLETED, completed_at=now))
+
+            started = time.perf_counter()
+            result = scheduler.tick(now)
+            tick_ms.append((time.perf_counter() - started) * 1000)
+
+            for scan_id in result['scan_ids']:
+                heapq.heappush(running, (now + timedelta(minutes=rng.uniform(1, 15)), scan_id))
+            for tier, values in result['latency_seconds'].items():
+                latencies.setdefault(tier, []).extend(values)
+            dispatched_per_minute.append(result['dispatched'])
+            now += timedelta(minutes=1)
+
+        backlog = session.scalar(select(func.count()).select_from(Website).where(Website.next_scan_at <= now))
+    engine.dispose()
+
+    print(f"\n[{scenario}] {website_count:,} websites "
+          f"({', '.join(f'{tier} {count:,}' for tier, count in per_tier.items())}), "
+          f"{days} day(s), max {max_in_flight} crawls in flight")
+    print(f"{'Tier':<14}{'Scans':>9}{'p50 min':>10}{'p95 min':>10}{'max min':>10}")
+    print("-" * 53)
+    for tier in sorted(latencies, key=lambda tier: -config.SCHEDULER['tier_weights'].get(tier, 1)):
+        minutes = [value / 60 for value in latencies[tier]]
+        print(f"{tier:<14}{len(minutes):>9,}{percentile(minutes, 0.5):>10.1f}"
+              f"{percentile(minutes, 0.95):>10.1f}{max(minutes):>10.1f}")
+    print(f"Peak dispatch {max(dispatched_per_minute):,}/min, still due at end {backlog:,}, "
+          f"tick p50 {statistics.median(tick_ms):.1f} ms / p95 {percentile(tick_ms, 0.95):.1f} ms")
+
+
+def main():
+    args = sys.argv[1:]
+    max_in_flight = config.SCHEDULER['max_in_flight']
+    if '--max-in-flight' in args:
+        max_in_flight = int(args[args.index('--max-in-flight') + 1])
+        del args[args.index('--max-in-flight'):args.index('--max-in-flight') + 2]
+    website_count = int(args[0]) if args else 100000
+    days = float(args[1]) if len(args) > 1 else 2
+
+    for scenario in ('herd', 'spread'):
+        simulate(scenario, website_count, days, max_in_flight)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,47 @@
+"""
+SEO Sentinel Test Fixtures
+Throwaway SQLite databases and a user/website to hang scans off
+"""
+
+import pytest
+from sqlalchemy import create_engine, event
+from sqlalchemy.orm import sessionmaker
+
+from app.core.config import config
+from app.db import database as db
+from app.db.models import Base, SubscriptionTier, User, Website
+
+
+@pytest.fixture
+def session(tmp_path):
+    """Session on a fresh SQLite file, with foreign keys (and so ON DELETE) enforced"""
+    engine = create_engine(f'sqlite:///{tmp_path / "test.db"}')
+    event.listen(engine, 'connect', lambda connection, _: connection.execute('PRAGMA foreign_keys=ON'))
+    Base.metadata.create_all(engine)
+    session = sessionmaker(bind=engine, expire_on_commit=False)()
+    yield session
+    session.close()
+    engine.dispose()
+
+
+@pytest.fixture
+def database(tmp_path, monkeypatch):
+    """Point session_scope() (tasks, services) at a fresh SQLite file; yields its engine"""
+    monkeypatch.setitem(config.DATABASE, 'url', f'sqlite:///{tmp_path / "app.db"}')
+    for cache in ('_engines', '_session_factories', '_metrics'):
+        monkeypatch.setattr(db, cache, {})
+    engine = db.get_engine()
+    Base.metadata.create_all(engine)
+    yield engine
+    engine.dispose()
+
+
+@pytest.fixture
+def website(session):
+    user = User(email='owner@example.com', hashed_password='x', subscription_tier=SubscriptionTier.FREE)
+    session.add(user)
+    session.flush()
+    site = Website(user_id=user.id, domain='example.com', url='https://example.com')
+    session.add(site)
+    session.commit()
+    return site
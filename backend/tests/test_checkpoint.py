@@ -0,0 +1,110 @@
+"""
+SEO Sentinel Checkpoint Tests
+Generational crawl checkpoints: whatever is on disk belongs to one instant
+"""
+
+import os
+
+from app.crawler import sinks
+from app.crawler.checkpoint import CrawlCheckpoint
+from app.crawler.incremental import PageSnapshotWriter
+from app.crawler.seen_set import FingerprintSet
+from app.crawler.sinks import NDJSONFileSink, read_ndjson_issues
+
+
+def seen(*values):
+    fingerprints = FingerprintSet()
+    for value in values:
+        fingerprints.add(value)
+    return fingerprints
+
+
+def test_no_checkpoint(tmp_path):
+    checkpoint = CrawlCheckpoint(tmp_path / 'scan_1')
+
+    assert not checkpoint.exists()
+    assert checkpoint.load() is None
+
+
+def test_save_and_load(tmp_path):
+    CrawlCheckpoint(tmp_path / 'scan_1').save(
+        {'frontier': [['https://example.com/a', 90, 1]], 'stats': {'pages_crawled': 3}},
+        {'seen': seen(11, 12), 'links_seen': None},
+    )
+
+    checkpoint = CrawlCheckpoint(tmp_path / 'scan_1')
+    state = checkpoint.load()
+
+    assert state['frontier'] == [['https://example.com/a', 90, 1]]
+    assert state['stats'] == {'pages_crawled': 3}
+    assert state['generation'] == checkpoint.generation == 1
+    assert checkpoint.saved_at == state['saved_at']
+    assert set(state['files']) == {'seen'}
+    restored = FingerprintSet.load(state['files']['seen'])
+    assert 11 in restored and 12 in restored and len(restored) == 2
+
+
+def test_each_save_replaces_the_previous_generation(tmp_path):
+    checkpoint = CrawlCheckpoint(tmp_path / 'scan_1')
+    checkpoint.save({'stats': {'pages_crawled': 1}}, {'seen': seen(1)})
+    checkpoint.save({'stats': {'pages_crawled': 2}}, {'seen': seen(1, 2)})
+
+    assert sorted(os.listdir(checkpoint.directory)) == ['seen.2.bin', 'state.json']
+    state = CrawlCheckpoint(checkpoint.directory).load()
+    assert state['stats'] == {'pages_crawled': 2} and state['files']['seen'].endswith('seen.2.bin')
+
+
+def test_a_save_interrupted_before_state_json_leaves_the_last_checkpoint(tmp_path):
+    checkpoint = CrawlCheckpoint(tmp_path / 'scan_1')
+    checkpoint.save({'stats': {'pages_crawled': 1}}, {'seen': seen(1)})
+    # The next generation's set was written, then the worker died
+    seen(1, 2).save(checkpoint.path('seen', 2))
+    with open(checkpoint.state_path + '.tmp', 'w') as f:
+        f.write('{"stats": {"pag')
+
+    state = CrawlCheckpoint(checkpoint.directory).load()
+
+    assert state['generation'] == 1 and state['stats'] == {'pages_crawled': 1}
+    assert len(FingerprintSet.load(state['files']['seen'])) == 1
+
+
+def test_clear(tmp_path):
+    checkpoint = CrawlCheckpoint(tmp_path / 'scan_1')
+    checkpoint.save({}, {'seen': seen(1)})
+
+    checkpoint.clear()
+
+    assert not os.path.exists(checkpoint.directory)
+    assert checkpoint.load() is None and checkpoint.generation == 0
+
+
+def test_the_issue_file_is_only_fsynced_for_checkpoints_and_on_close(tmp_path, monkeypatch):
+    synced = []
+    monkeypatch.setattr(sinks.os, 'fsync', lambda fd: synced.append(fd))
+    sink = NDJSONFileSink(tmp_path / 'issues.ndjson', flush_every=10)
+    issue = {'type': 'meta_issues', 'page_url': 'https://example.com/', 'issues': ['Missing meta description']}
+
+    for _ in range(1000):
+        sink.write(issue)
+    assert synced == []
+    assert len(list(read_ndjson_issues(sink.path))) == 1000  # flushed, readable by another process
+
+    state = sink.state()
+    assert len(synced) == 1 and state['offset'] == os.path.getsize(sink.path)
+
+    sink.close()
+    assert len(synced) == 2
+
+
+def test_files_a_checkpoint_points_at_are_fsynced_first(tmp_path, monkeypatch):
+    synced = []
+    monkeypatch.setattr(os, 'fsync', lambda fd: synced.append(fd))
+    snapshots = PageSnapshotWriter(tmp_path / 'pages.ndjson')
+    snapshots.write('https://example.com/', body_hash='abc')
+
+    offset = snapshots.offset()
+    assert len(synced) == 1 and offset == os.path.getsize(snapshots.path)
+
+    CrawlCheckpoint(tmp_path / 'scan_1').save({'frontier': []}, {'seen': seen(1)})
+    assert len(synced) == 3  # the seen set, then state.json
+    snapshots.close()
@@ -0,0 +1,73 @@
+"""
+SEO Sentinel Check Tests
+Check selection (explicit or by tier) and the CheckSuite's per-check counters
+"""
+
+import pytest
+
+from app.crawler.checks import CHECK_REGISTRY, CheckSuite, resolve_check_names
+from app.crawler.crawler_with_db import ScanCrawler
+from app.crawler.html_analyzer import PageRecord, analyze_html
+from app.db.models import Scan, SubscriptionTier
+
+
+def test_every_registered_check_runs_by_default():
+    assert resolve_check_names() == list(CHECK_REGISTRY)
+
+
+def test_an_explicit_list_or_csv_picks_the_checks():
+    assert resolve_check_names('broken_links, meta_issues') == ['broken_links', 'meta_issues']
+    assert resolve_check_names(['missing_alt_text']) == ['missing_alt_text']
+
+
+def test_unknown_checks_are_rejected():
+    with pytest.raises(ValueError, match='seo_magic'):
+        resolve_check_names('broken_links,seo_magic')
+
+
+def test_the_suite_only_runs_the_enabled_checks():
+    suite = CheckSuite(['meta_issues'])
+    page = analyze_html('<html><body><img src="/a.png"></body></html>', 'https://example.com/', fields=suite.fields)
+    issues = list(suite.run(page))
+    assert [issue['type'] for issue in issues] == ['meta_issues']
+    assert set(suite.report()) == {'meta_issues'}
+
+
+def scan_checks(session, website, tier, **spider_kwargs):
+    """Checks a scan of `website` would run when its owner is on `tier`"""
+    website.user.subscription_tier = tier
+    scan = Scan(user_id=website.user_id, website_id=website.id)
+    session.add(scan)
+    session.flush()
+    return resolve_check_names(ScanCrawler(session)._begin(scan, spider_kwargs)['checks'])
+
+
+def test_a_free_tier_scan_skips_the_checks_reserved_for_paid_tiers(session, website):
+    assert scan_checks(session, website, SubscriptionTier.FREE) == ['broken_links', 'meta_issues']
+    assert 'missing_alt_text' in scan_checks(session, website, SubscriptionTier.STARTER)
+    assert 'missing_alt_text' in scan_checks(session, website, SubscriptionTier.ENTERPRISE)
+
+
+def test_an_explicit_list_wins_over_the_tier(session, website):
+    assert scan_checks(session, website, SubscriptionTier.FREE, checks='missing_alt_text') == ['missing_alt_text']
+
+
+def test_the_suite_times_and_counts_each_check():
+    suite = CheckSuite(['broken_links', 'missing_alt_text', 'meta_issues'])
+    pages = [
+        analyze_html('<html><head><title>A long enough title</title></head>'
+                     '<body><img src="/a.png"><img src="/b.png" alt=""></body></html>',
+                     'https://example.com/', fields=suite.fields),
+        PageRecord('https://example.com/gone', status=404, referer='https://example.com/'),
+    ]
+    issues = [issue for page in pages for issue in suite.run(page)]
+
+    assert [issue['type'] for issue in issues].count('missing_alt_text') == 2
+    report = suite.report()
+    # Only broken_links runs on the error page
+    assert {name: (timing['pages'], timing['issues']) for name, timing in report.items()} == {
+        'broken_links': (2, 1),
+        'missing_alt_text': (1, 2),
+        'meta_issues': (1, 1),
+    }
+    assert all(timing['cpu_seconds'] >= 0 for timing in report.values())
@@ -0,0 +1,307 @@
+"""
+SEO Sentinel Crawler Tests
+In-process crawls of a small site served from a local HTTP server
+"""
+
+import os
+import threading
+import time
+from collections import Counter
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+from twisted.internet import reactor
+
+from app.core.config import config
+from app.crawler.crawler_with_db import ScanCrawler
+from app.crawler.checks import resolve_check_names
+from app.crawler.frontier import FrontierDupeFilter
+from app.crawler import link_validator
+from app.crawler.incremental import PageSnapshotWriter
+from app.crawler.runner import get_crawl_runner
+from app.db.models import Scan, ScanStatus
+
+DEPTH_LIMIT = config.CRAWLER['depth_limit']
+
+
+def chain_site(depth):
+    """/page0 -> /page1 -> ... -> /page{depth}; the last page has a broken image"""
+    pages = {'/': '<html><head><title>Home</title></head><body><a href="/page1">1</a></body></html>'}
+    for level in range(1, depth + 1):
+        link = f'<a href="/page{level + 1}">next</a>' if level < depth else '<img src="/missing.png" alt="gone">'
+        pages[f'/page{level}'] = (
+            f'<html><head><title>Page {level}</title><meta name="description" content="Level {level}"></head>'
+            f'<body>{link}</body></html>'
+        )
+    return pages
+
+
+class SiteHandler(BaseHTTPRequestHandler):
+    """Serves server.pages and server.redirects; HEAD is refused with 405 so link checks fall back to GET
+
+    With server.etag set, every page carries it and a matching If-None-Match gets a 304.
+    """
+
+    def do_HEAD(self):
+        self.server.requests.append(('HEAD', self.path))
+        self.send_response(405)
+        self.end_headers()
+
+    def do_GET(self):
+        self.server.requests.append(('GET', self.path))
+        if self.headers.get('If-None-Match') or self.headers.get('If-Modified-Since'):
+            self.server.conditional.append(self.path)
+        if self.server.on_get:
+            self.server.on_get(self.path)
+        time.sleep(self.server.delay)
+        if self.path in self.server.redirects:
+            self.send_response(301)
+            self.send_header('Location', self.server.redirects[self.path])
+            self.end_headers()
+            return
+        body = self.server.pages.get(self.path)
+        etag = self.server.etag if body is not None else None
+        if etag and self.headers.get('If-None-Match') == etag:
+            self.send_response(304)
+            self.end_headers()
+            return
+        self.send_response(200 if body is not None else 404)
+        self.send_header('Content-Type', 'text/html; charset=utf-8')
+        if etag:
+            self.send_header('ETag', etag)
+        self.end_headers()
+        if body is not None:
+            self.wfile.write(body.encode('utf-8'))
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def site():
+    server = ThreadingHTTPServer(('127.0.0.1', 0), SiteHandler)
+    server.pages = {}
+    server.redirects = {}
+    server.etag = None
+    server.requests = []
+    server.conditional = []
+    server.on_get = None
+    server.delay = 0
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    server.url = f'http://127.0.0.1:{server.server_port}/'
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+def crawl(site, **kwargs):
+    kwargs.setdefault('use_sitemaps', False)
+    return get_crawl_runner().crawl('127.0.0.1', start_url=site.url, timeout=60, **kwargs)
+
+
+def test_links_on_pages_at_the_depth_limit_are_validated(site):
+    site.pages = chain_site(DEPTH_LIMIT)
+
+    results = crawl(site)
+
+    assert results['stats']['pages_crawled'] == DEPTH_LIMIT + 1
+    # HEAD refused, then the GET fallback (two levels below the deepest page) finds the 404
+    assert ('HEAD', '/missing.png') in site.requests and ('GET', '/missing.png') in site.requests
+    broken = results['issues']['broken_links']
+    assert [(issue['url'], issue['status']) for issue in broken] == [(site.url + 'missing.png', 404)]
+    assert results['stats']['link_validation']['get_fallbacks'] == 1
+
+
+LINKED_PAGES = 30
+PAGES = {'/', '/orphan1', '/orphan2', '/orphan3', *(f'/page{i}' for i in range(1, LINKED_PAGES + 1))}
+
+
+def shop_site(url):
+    """Home links to LINKED_PAGES pages; three more are only listed in the sitemap"""
+    page = '<html><head><title>{0}</title><meta name="description" content="{0}"></head><body>{1}</body></html>'
+    pages = {
+        '/': page.format('Home', ''.join(f'<a href="/page{i}">{i}</a>' for i in range(1, LINKED_PAGES + 1))),
+        '/robots.txt': f'User-agent: *\nAllow: /\nSitemap: {url}sitemap.xml\n',
+        '/sitemap.xml': (
+            '<?xml version="1.0" encoding="UTF-8"?><urlset xmlns="http://www.sitemaps.org/schemas/sitemap/0.9">'
+            + ''.join(f'<url><loc>{url}orphan{i}</loc></url>' for i in range(1, 4)) + '</urlset>'
+        ),
+    }
+    for path in PAGES - {'/'}:
+        pages[path] = page.format(path, '<img src="/logo.png" alt="Logo">')
+    return pages
+
+
+def kill_after(site, pages):
+    """Shut the running crawl down, like a worker being stopped, once `pages` pages were requested"""
+    def on_get(path):
+        if path in ('/robots.txt', '/sitemap.xml') or sum(1 for _, p in site.requests if p in PAGES) < pages:
+            return
+        site.on_get = None
+        site.delay = 0.5  # so requests in flight don't complete first
+        for crawler in list(get_crawl_runner()._runner.crawlers):
+            reactor.callFromThread(crawler.engine.close_spider, crawler.spider, 'shutdown')
+    return on_get
+
+
+def test_interrupted_crawl_resumes_from_its_checkpoint(site, tmp_path):
+    site.pages = shop_site(site.url)
+    site.pages['/logo.png'] = 'png'
+    checkpoint_dir = str(tmp_path / 'checkpoint')
+    site.on_get = kill_after(site, 5)
+
+    first = crawl(site, use_sitemaps=True, checkpoint_dir=checkpoint_dir)
+
+    assert first['stats']['close_reason'] == 'shutdown'
+    assert os.path.exists(os.path.join(checkpoint_dir, 'state.json'))
+    crawled_before = first['stats']['pages_crawled']
+    first_fetched = {path for method, path in site.requests if method == 'GET' and path in PAGES}
+    assert 0 < crawled_before < len(PAGES)
+    site.requests.clear()
+    site.delay = 0
+
+    resumed = crawl(site, use_sitemaps=True, checkpoint_dir=checkpoint_dir)
+
+    assert resumed['stats']['close_reason'] == 'finished'
+    assert resumed['stats']['resumes'] == 1
+    assert resumed['stats']['pages_crawled'] == len(PAGES)
+    # robots.txt and the sitemap are read again despite the restored seen set
+    assert ('GET', '/robots.txt') in site.requests and ('GET', '/sitemap.xml') in site.requests
+    # Only the pages not crawled before the interruption are fetched, each once
+    fetched = Counter(path for method, path in site.requests if method == 'GET' and path in PAGES)
+    assert sum(fetched.values()) == len(PAGES) - crawled_before
+    assert set(fetched) | first_fetched == PAGES and max(fetched.values()) == 1
+    assert resumed['stats']['sitemap_pages_crawled'] == 3
+    assert not os.path.exists(os.path.join(checkpoint_dir, 'state.json'))
+
+
+def test_a_304_without_a_snapshot_is_fetched_again(site, tmp_path):
+    """/old moved to /new since the last scan; the redirect carries /old's validator to /new"""
+    page = '<html><head><title>{0} page title</title><meta name="description" content="{0}"></head><body>{1}</body></html>'
+    site.pages = {'/': page.format('Home', '<a href="/old">old</a>'), '/new': page.format('New', '')}
+    site.redirects = {'/old': '/new'}
+    site.etag = '"v1"'
+    previous = PageSnapshotWriter(tmp_path / 'previous.ndjson')
+    checks = resolve_check_names()
+    previous.write(site.url, etag=site.etag, body_hash='x', links=[site.url + 'old'], checks=checks)
+    previous.write(site.url + 'old', etag=site.etag, body_hash='x', checks=checks)
+    previous.close()
+
+    results = crawl(site, previous_snapshots=str(tmp_path / 'previous.ndjson'))
+
+    assert results['stats']['incremental']['not_modified'] == 1
+    assert results['stats']['incremental']['refetched'] == 1
+    assert site.requests.count(('GET', '/new')) == 2  # 304, then the page itself
+    assert results['stats']['pages_crawled'] == 2
+    assert not results['issues']['meta_issues']
+
+
+def test_the_next_scan_of_a_website_sends_conditional_requests(site, session, website, tmp_path, monkeypatch):
+    monkeypatch.setattr(config, 'REPORTS_DIR', tmp_path)
+    monkeypatch.setitem(config.CRAWLER, 'checkpoint_dir', str(tmp_path / 'checkpoints'))
+    page = '<html><head><title>{0} page title</title></head><body>{1}</body></html>'  # no description
+    site.pages = {'/': page.format('Home', '<a href="/about">about</a>'), '/about': page.format('About', '')}
+    site.etag = '"v1"'
+    website.domain = '127.0.0.1'
+    session.commit()
+
+    scans = []
+    for _ in range(2):
+        scan = Scan(user_id=website.user_id, website_id=website.id)
+        session.add(scan)
+        session.commit()
+        results = ScanCrawler(session).run(scan, start_url=site.url, use_sitemaps=False, validate_links=False)
+        scans.append((scan, results))
+        if len(scans) == 1:
+            assert not site.conditional
+
+    (first, _), (second, results) = scans
+    assert first.page_snapshots_path == str(tmp_path / f'scan_{first.id}_pages.ndjson')
+    assert second.page_snapshots_path == str(tmp_path / f'scan_{second.id}_pages.ndjson')
+    assert sorted(site.conditional) == ['/', '/about']
+    assert results['stats']['incremental']['not_modified'] == 2
+    # Issues of unchanged pages are replayed from the snapshots
+    assert second.status == ScanStatus.COMPLETED
+    assert second.meta_issues_count == first.meta_issues_count == 2
+
+
+def test_pages_are_checked_again_when_the_enabled_checks_change(site, session, website, tmp_path, monkeypatch):
+    monkeypatch.setattr(config, 'REPORTS_DIR', tmp_path)
+    monkeypatch.setitem(config.CRAWLER, 'checkpoint_dir', str(tmp_path / 'checkpoints'))
+    page = '<html><head><title>{0} page title</title></head><body>{1}</body></html>'  # no description
+    site.pages = {
+        '/': page.format('Home', '<a href="/about">about</a>'),
+        '/about': page.format('About', '<img src="/a.png">'),
+    }
+    site.etag = '"v1"'
+    website.domain = '127.0.0.1'
+    session.commit()
+
+    scans = []
+    for checks in (['meta_issues'], ['meta_issues', 'missing_alt_text']):  # the owner upgraded
+        scan = Scan(user_id=website.user_id, website_id=website.id)
+        session.add(scan)
+        session.commit()
+        results = ScanCrawler(session).run(scan, start_url=site.url, use_sitemaps=False, validate_links=False,
+                                           checks=checks)
+        scans.append((scan, results))
+
+    (first, _), (second, results) = scans
+    assert results['stats']['incremental']['other_checks'] == 2
+    assert results['stats']['incremental']['not_modified'] == 0 and not site.conditional
+    assert (first.missing_alt_text_count, second.missing_alt_text_count) == (0, 1)
+    assert second.meta_issues_count == 2
+
+
+def test_link_statuses_are_shared_by_scans_on_other_workers(site, session, website, tmp_path, monkeypatch):
+    monkeypatch.setattr(config, 'REPORTS_DIR', tmp_path)
+    monkeypatch.setitem(config.CRAWLER, 'checkpoint_dir', str(tmp_path / 'checkpoints'))
+    monkeypatch.setitem(config.CRAWLER, 'link_cache_dir', str(tmp_path / 'link_cache'))
+    site.pages = {'/': '<html><head><title>Home page title</title></head><body><img src="/missing.png" alt="x"></body></html>'}
+    website.domain = '127.0.0.1'
+    session.commit()
+
+    scans = []
+    for _ in range(2):
+        # A fresh worker process: nothing cached in memory
+        monkeypatch.setattr(link_validator, '_site_caches', link_validator.OrderedDict())
+        scan = Scan(user_id=website.user_id, website_id=website.id)
+        session.add(scan)
+        session.commit()
+        results = ScanCrawler(session).run(scan, start_url=site.url, use_sitemaps=False)
+        scans.append(scan)
+
+    assert os.path.exists(tmp_path / 'link_cache' / f'website_{website.id}.json')
+    assert site.requests.count(('HEAD', '/missing.png')) == 1  # only the first scan checked it
+    assert results['stats']['link_validation']['cache_hits'] == 1
+    assert scans[1].broken_links_count == scans[0].broken_links_count == 1
+
+
+def record_path(init, opened):
+    """FrontierDupeFilter.__init__ that notes the seen-set path it was given"""
+    def wrapped(self, path=None, checkpoint=None):
+        opened.append(path)
+        init(self, path, checkpoint)
+    return wrapped
+
+
+def test_a_scan_with_no_page_budget_crawls_with_its_seen_set_on_disk(site, session, website, tmp_path, monkeypatch):
+    monkeypatch.setattr(config, 'REPORTS_DIR', tmp_path)
+    monkeypatch.setitem(config.CRAWLER, 'checkpoint_dir', str(tmp_path / 'checkpoints'))
+    monkeypatch.setitem(config.CRAWLER, 'seen_set_dir', str(tmp_path / 'seen_sets'))
+    site.pages = chain_site(2)
+    website.domain = '127.0.0.1'
+    website.max_pages = 0  # unlimited
+    scan = Scan(user_id=website.user_id, website_id=website.id)
+    session.add(scan)
+    session.commit()
+    opened = []
+    monkeypatch.setattr(FrontierDupeFilter, '__init__', record_path(FrontierDupeFilter.__init__, opened))
+
+    results = ScanCrawler(session).run(scan, start_url=site.url, use_sitemaps=False, validate_links=False)
+
+    assert opened == [ScanCrawler.seen_set_path(scan)]
+    assert results['stats']['pages_crawled'] == 3
+    assert scan.status == ScanStatus.COMPLETED
+    assert not os.listdir(tmp_path / 'seen_sets')  # removed once the crawl can no longer resume
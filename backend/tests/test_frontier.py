@@ -0,0 +1,113 @@
+"""
+SEO Sentinel Frontier Tests
+URL normalization, de-duplication, priorities and sitemap parsing
+"""
+
+import gzip
+
+import pytest
+from scrapy import Request
+
+from app.crawler.frontier import FrontierDupeFilter, TopK, iter_sitemap, normalize_url, url_fingerprint, url_priority
+
+
+@pytest.mark.parametrize('url, expected', [
+    ('HTTPS://Shop.Example.COM/Products', 'https://shop.example.com/Products'),
+    ('https://shop.example.com:443/a', 'https://shop.example.com/a'),
+    ('http://shop.example.com:80/a', 'http://shop.example.com/a'),
+    ('https://shop.example.com:8443/a', 'https://shop.example.com:8443/a'),
+    ('https://shop.example.com', 'https://shop.example.com/'),
+    ('https://shop.example.com//a///b', 'https://shop.example.com/a/b'),
+    ('https://shop.example.com/a#reviews', 'https://shop.example.com/a'),
+    ('https://shop.example.com/a?b=2&a=1', 'https://shop.example.com/a?a=1&b=2'),
+    ('https://shop.example.com/a?utm_source=x&sort=price&id=3', 'https://shop.example.com/a?id=3'),
+    ('https://shop.example.com/a?filter_color=red&filter[brand]=x&page=2', 'https://shop.example.com/a?page=2'),
+    ('https://shop.example.com/a?Gclid=1&q=', 'https://shop.example.com/a?q='),
+])
+def test_normalize_url(url, expected):
+    assert normalize_url(url) == expected
+
+
+def test_normalize_url_with_custom_ignored_params():
+    assert normalize_url('https://example.com/?sort=1&ref=2', ignored_params=['ref']) == 'https://example.com/?sort=1'
+
+
+def test_equivalent_urls_share_a_fingerprint():
+    assert url_fingerprint('https://Example.com/a?b=1&utm_medium=mail#x') == url_fingerprint('https://example.com/a?b=1')
+    assert url_fingerprint('https://example.com/a') != url_fingerprint('https://example.com/b')
+
+
+def test_dupefilter_drops_equivalent_urls():
+    dupefilter = FrontierDupeFilter()
+
+    assert not dupefilter.request_seen(Request('https://example.com/shoes?sort=price'))
+    assert dupefilter.request_seen(Request('https://EXAMPLE.com/shoes#top'))
+    assert not dupefilter.request_seen(Request('https://example.com/shoes?page=2'))
+    assert len(dupefilter) == 2
+    dupefilter.close('finished')
+
+
+def test_dupefilter_resumes_from_a_checkpointed_set(tmp_path):
+    first = FrontierDupeFilter()
+    first.request_seen(Request('https://example.com/a'))
+    first.fingerprints.save(tmp_path / 'seen.bin')
+    first.close('shutdown')
+
+    resumed = FrontierDupeFilter(path=tmp_path / 'seen.mmap', checkpoint=tmp_path / 'seen.bin')
+
+    assert resumed.request_seen(Request('https://example.com/a'))
+    assert not resumed.request_seen(Request('https://example.com/b'))
+    resumed.close('finished')
+
+
+def test_url_priority_prefers_shallow_pages_and_sitemap_priorities():
+    home = url_priority('https://example.com/')
+    category = url_priority('https://example.com/shoes')
+    product = url_priority('https://example.com/shoes/red-runner')
+    listing_page = url_priority('https://example.com/shoes?page=7')
+
+    assert home > category > product
+    assert category > listing_page
+    assert url_priority('https://example.com/shoes', depth=2) < category
+    assert url_priority('https://example.com/shoes/red-runner', sitemap_priority=1.0) > product
+
+
+SITEMAP = b'''<?xml version="1.0" encoding="UTF-8"?>
+<urlset xmlns="http://www.sitemaps.org/schemas/sitemap/0.9">
+  <url><loc>https://example.com/a</loc><priority>0.8</priority><lastmod>2026-01-02</lastmod></url>
+  <url><loc> https://example.com/b </loc><priority>high</priority></url>
+  <url><loc></loc></url>
+</urlset>'''
+
+SITEMAP_INDEX = b'''<?xml version="1.0" encoding="UTF-8"?>
+<sitemapindex xmlns="http://www.sitemaps.org/schemas/sitemap/0.9">
+  <sitemap><loc>https://example.com/sitemap-products.xml.gz</loc></sitemap>
+</sitemapindex>'''
+
+
+def test_iter_sitemap():
+    assert list(iter_sitemap(SITEMAP)) == [
+        ('url', 'https://example.com/a', 0.8, '2026-01-02'),
+        ('url', 'https://example.com/b', None, None),
+    ]
+    assert list(iter_sitemap(SITEMAP_INDEX)) == [('sitemap', 'https://example.com/sitemap-products.xml.gz', None, None)]
+
+
+def test_iter_sitemap_reads_gzip_and_keeps_what_a_truncated_file_had():
+    assert [loc for _, loc, _, _ in iter_sitemap(gzip.compress(SITEMAP))] == ['https://example.com/a', 'https://example.com/b']
+
+    truncated = SITEMAP[:SITEMAP.index(b'<url><loc> https')]
+    assert [loc for _, loc, _, _ in iter_sitemap(truncated)] == ['https://example.com/a']
+
+
+def test_top_k_keeps_the_best_items_in_order():
+    best = TopK(3)
+    for priority, item in [(5, 'e'), (1, 'a'), (9, 'i'), (7, 'g'), (3, 'c'), (9, 'j')]:
+        best.push(priority, item)
+
+    assert best.drain() == [(9, 'i'), (9, 'j'), (7, 'g')]
+    assert best.drain() == []
+
+    nothing = TopK(0)
+    nothing.push(1, 'a')
+    assert nothing.drain() == []
@@ -0,0 +1,149 @@
+"""
+SEO Sentinel Issue Tracking Tests
+Issues are stored once per fingerprint, resolved when they disappear, and listed per scan
+"""
+
+from sqlalchemy import event
+
+from app.crawler.crawler_with_db import ScanCrawler
+from app.db.models import Issue, Scan, ScanStatus
+from app.db.repositories import IssueRepository
+from app.services.scan_service import db_issue_source
+
+
+def broken(path, page='https://example.com/'):
+    return {'type': 'broken_link', 'url': f'https://example.com/{path}', 'status': 404,
+            'referenced_from': page, 'link_type': 'page'}
+
+
+def ingest(session, website, issues, scan=None):
+    """Ingest `issues` as a (new) completed scan of the website; returns (scan, counts)"""
+    if scan is None:
+        scan = Scan(user_id=website.user_id, website_id=website.id, status=ScanStatus.COMPLETED)
+        session.add(scan)
+        session.flush()
+    counts = ScanCrawler(session).ingest_issues(scan, issues)
+    session.commit()
+    return scan, counts
+
+
+def urls(issues):
+    return sorted(issue.broken_url.rsplit('/', 1)[-1] for issue in issues)
+
+
+def test_persisting_issues_are_stored_once(session, website):
+    _, first = ingest(session, website, [broken('a'), broken('b'), broken('b')])
+    # Same issues, URLs spelled differently (fragment, default port)
+    _, second = ingest(session, website, [broken('a#top'), {**broken('b'), 'url': 'https://example.com:443/b'}])
+
+    assert (first['new'], first['unchanged'], first['resolved']) == (2, 0, 0)
+    assert (second['new'], second['unchanged'], second['resolved']) == (0, 2, 0)
+    assert session.query(Issue).count() == 2
+
+
+def test_a_broken_link_found_from_another_page_is_the_same_issue(session, website):
+    ingest(session, website, [broken('a', page='https://example.com/shop')])
+    _, counts = ingest(session, website, [broken('a', page='https://example.com/blog')])
+
+    assert (counts['new'], counts['unchanged'], counts['resolved']) == (0, 1, 0)
+    issue = session.query(Issue).one()
+    assert not issue.is_resolved and issue.referenced_from == 'https://example.com/shop'
+
+
+def test_disappearing_issues_are_resolved_by_the_scan(session, website):
+    first, _ = ingest(session, website, [broken('a'), broken('b')])
+    second, counts = ingest(session, website, [broken('a'), broken('c')])
+
+    assert (counts['new'], counts['unchanged'], counts['resolved']) == (1, 1, 1)
+    fixed = session.query(Issue).filter(Issue.broken_url.endswith('/b')).one()
+    assert fixed.is_resolved and fixed.resolved_scan_id == second.id and fixed.last_seen_scan_id == first.id
+    assert second.new_issues_count == 1 and second.resolved_issues_count == 1
+
+
+def test_reingesting_a_scan_undoes_the_previous_ingest(session, website):
+    ingest(session, website, [broken('a'), broken('b')])
+    second, _ = ingest(session, website, [broken('a'), broken('c')])
+
+    _, counts = ingest(session, website, [broken('a'), broken('b'), broken('d')], scan=second)
+
+    assert (counts['new'], counts['unchanged'], counts['resolved']) == (1, 2, 0)
+    assert urls(session.query(Issue).filter(Issue.is_resolved.is_(False))) == ['a', 'b', 'd']
+    assert session.query(Issue).count() == 3  # 'c' went with the undone ingest
+
+
+def test_scan_listings_include_issues_carried_over_from_earlier_scans(session, website):
+    first, _ = ingest(session, website, [broken('a'), broken('b')])
+    second, _ = ingest(session, website, [broken('a'), broken('c')])
+    third, _ = ingest(session, website, [broken('c')])
+    repository = IssueRepository(session)
+
+    assert urls(repository.list_issues(first.id)[0]) == ['a', 'b']
+    assert urls(repository.list_issues(second.id)[0]) == ['a', 'c']
+    assert urls(repository.list_issues(third.id)[0]) == ['c']
+    assert urls(repository.list_issues(second.id, new_only=True)[0]) == ['c']
+    assert urls(repository.list_issues(second.id, is_resolved=True)[0]) == ['a']  # fixed since
+
+    assert repository.count_issues(second.id) == 2
+    assert repository.count_issues(second.id, new_only=True) == 1
+    assert repository.summary(second.id) == {('broken_link', 'high'): 2}
+    assert repository.summary(third.id, new_only=True) == {}
+
+
+def test_scan_listing_pages(session, website):
+    scan, _ = ingest(session, website, [broken(f'page-{i}') for i in range(7)])
+    repository = IssueRepository(session)
+
+    pages, cursor = [], None
+    while True:
+        issues, cursor = repository.list_issues(scan.id, after_id=cursor, limit=3)
+        pages.append(len(issues))
+        if cursor is None:
+            break
+    assert pages == [3, 3, 1]
+
+
+def test_scan_listing_pages_merge_open_and_since_resolved_issues_in_id_order(session, website):
+    first, _ = ingest(session, website, [broken(path) for path in 'abcde'])
+    ingest(session, website, [broken('a'), broken('c'), broken('e')])  # b and d fixed since
+    repository = IssueRepository(session)
+
+    for descending in (False, True):
+        pages, cursor = [], None
+        while True:
+            issues, cursor = repository.list_issues(first.id, after_id=cursor, limit=2, descending=descending)
+            pages.append([issue.broken_url[-1] for issue in issues])
+            if cursor is None:
+                break
+        expected = [['a', 'b'], ['c', 'd'], ['e']] if not descending else [['e', 'd'], ['c', 'b'], ['a']]
+        assert pages == expected
+
+
+def test_scan_listings_seek_in_id_order_without_sorting_the_history(session, website):
+    ingest(session, website, [broken('a'), broken('b')])
+    latest, _ = ingest(session, website, [broken('a'), broken('c')])
+    statements = []
+    event.listen(session.bind, 'before_cursor_execute',
+                 lambda conn, cursor, sql, params, context, many: statements.append((sql, params)))
+
+    IssueRepository(session).list_issues(latest.id)
+
+    plans = {}
+    with session.bind.connect() as connection:
+        for sql, params in statements:
+            if sql.startswith('SELECT issues.id'):
+                plan = ' / '.join(row[-1] for row in connection.exec_driver_sql('EXPLAIN QUERY PLAN ' + sql, params))
+                plans['resolved' if 'resolved_scan_id BETWEEN' in sql else 'open'] = plan
+    assert 'ix_issues_website_open_id' in plans['open'] and 'TEMP B-TREE' not in plans['open']
+    assert 'ix_issues_website_resolved_scan_id' in plans['resolved']  # an empty range for the latest scan
+
+
+def test_a_report_streams_the_issues_of_its_own_scan(session, website):
+    first, _ = ingest(session, website, [broken('a'), broken('b')])
+    second, _ = ingest(session, website, [broken('a'), broken('c')])  # resolves b
+
+    def reported(scan):
+        return sorted(issue['url'].rsplit('/', 1)[-1] for issue in db_issue_source(session, scan.id)('broken_links'))
+
+    assert reported(first) == ['a', 'b']
+    assert reported(second) == ['a', 'c']
+    assert urls(IssueRepository(session).iter_issues(first.id, batch_size=1)) == ['a', 'b']
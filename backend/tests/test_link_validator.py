@@ -0,0 +1,37 @@
+"""
+SEO Sentinel Link Validator Tests
+Status caches: bounded per worker process, shared between workers through a file
+"""
+
+from app.core.config import config
+from app.crawler import link_validator
+from app.crawler.link_validator import StatusCache, get_status_cache
+
+
+def test_the_least_recently_crawled_sites_are_dropped(monkeypatch):
+    monkeypatch.setattr(link_validator, '_site_caches', link_validator.OrderedDict())
+    monkeypatch.setitem(config.CRAWLER, 'link_cache_max_sites', 2)
+    a = get_status_cache('a.com')
+    get_status_cache('b.com')
+    assert get_status_cache('a.com') is a  # a.com is now the most recent
+
+    get_status_cache('c.com')
+
+    assert list(link_validator._site_caches) == ['a.com', 'c.com']
+
+
+def test_a_saved_cache_is_merged_without_overwriting_fresher_entries(tmp_path):
+    path = str(tmp_path / 'links' / 'website_1.json')
+    saved = StatusCache()
+    saved.set('https://cdn.example.com/a.png', 404, now=1000.0)
+    saved.set('https://cdn.example.com/b.png', 200, now=1000.0)
+    saved.ttl = float('inf')
+    saved.save(path)
+
+    cache = StatusCache(ttl=float('inf'))
+    cache.set('https://cdn.example.com/a.png', 200, now=2000.0)
+    cache.load(path)
+
+    assert cache.get('https://cdn.example.com/a.png') == 200
+    assert cache.get('https://cdn.example.com/b.png') == 200
+    assert [p.name for p in (tmp_path / 'links').iterdir()] == ['website_1.json']
@@ -0,0 +1,278 @@
+"""
+SEO Sentinel Pipeline Tests
+Multi-domain crawl batches: planning, and handing scans on to their own pipelines
+"""
+
+import json
+import re
+import threading
+from concurrent.futures import Future
+from datetime import datetime, timedelta
+from pathlib import Path
+
+import pytest
+from celery.exceptions import Ignore
+
+from app import tasks
+from app.core.config import config
+from app.crawler.checkpoint import CrawlCheckpoint
+from app.crawler.seo_spider import SEOSentinelSpider
+from app.db.database import session_scope
+from app.db.models import Scan, ScanStatus, SubscriptionTier, User, Website
+from app.services.scan_service import CrawlLeaseHeld, ScanService
+
+COMPOSE_FILE = Path(__file__).resolve().parents[2] / 'docker-compose.yml'
+
+
+def add_scans(session, sites):
+    """One scan per (domain, max_pages); returns their ids"""
+    user = User(email='owner@example.com', hashed_password='x', subscription_tier=SubscriptionTier.FREE)
+    session.add(user)
+    session.flush()
+    ids = []
+    for domain, max_pages in sites:
+        website = Website(user_id=user.id, domain=domain, url=f'https://{domain}', max_pages=max_pages)
+        session.add(website)
+        session.flush()
+        scan = Scan(user_id=user.id, website_id=website.id, status=ScanStatus.RUNNING)
+        session.add(scan)
+        session.flush()
+        ids.append(scan.id)
+    session.commit()
+    return ids
+
+
+def test_plan_batches(session, monkeypatch):
+    monkeypatch.setitem(config.MULTI_CRAWL, 'batch_size', 2)
+    small = add_scans(session, [('a.com', 50), ('www.a.com', 50), ('b.com', 100), ('c.com', 20), ('big.com', 5000)])
+    dispatched = [(scan_id, 'free') for scan_id in small]
+    dispatched.append((small[0], 'professional'))
+
+    batches, singles = ScanService(session).plan_batches(dispatched)
+
+    # a.com and www.a.com are one site, so never in the same batch
+    assert batches == [[(small[0], 'free'), (small[2], 'free')], [(small[1], 'free'), (small[3], 'free')]]
+    assert singles == [(small[4], 'free'), (small[0], 'professional')]
+
+
+def probed(session, scan_id, estimated_pages, sitemap_files=1):
+    """Store a passed pre-flight result on a scan"""
+    session.get(Scan, scan_id).preflight_result = json.dumps({
+        'ok': True, 'start_url': 'https://example.com/', 'estimated_pages': estimated_pages,
+        'sitemaps': {'files': sitemap_files, 'estimated_urls': estimated_pages},
+    })
+    session.commit()
+
+
+def test_plan_batches_sizes_sites_by_their_preflight_estimate(session):
+    ids = add_scans(session, [('a.com', 5000), ('b.com', 0), ('c.com', 5000), ('d.com', 5000)])
+    probed(session, ids[0], 40)
+    probed(session, ids[1], 60)
+    probed(session, ids[2], 4000)
+    probed(session, ids[3], 3, sitemap_files=0)  # homepage links only: no size estimate
+    dispatched = [(scan_id, 'free') for scan_id in ids]
+
+    batches, singles = ScanService(session).plan_batches(dispatched)
+
+    assert batches == [[(ids[0], 'free'), (ids[1], 'free')]]
+    assert singles == [(ids[2], 'free'), (ids[3], 'free')]
+
+
+def test_plan_batches_leaves_a_lone_small_site_single(session):
+    scan_id, = add_scans(session, [('a.com', 50)])
+
+    assert ScanService(session).plan_batches([(scan_id, 'starter')]) == ([], [(scan_id, 'starter')])
+
+
+def test_plan_batches_when_disabled(session, monkeypatch):
+    monkeypatch.setitem(config.MULTI_CRAWL, 'enabled', False)
+    ids = add_scans(session, [('a.com', 50), ('b.com', 50)])
+    dispatched = [(scan_id, 'free') for scan_id in ids]
+
+    assert ScanService(session).plan_batches(dispatched) == ([], dispatched)
+
+
+@pytest.fixture
+def crawled_batch(database):
+    """A batch payload of two scans whose crawls finished (their next stage is ingest)"""
+    with session_scope() as session:
+        ids = add_scans(session, [('a.com', 50), ('b.com', 50)])
+        for scan_id in ids:
+            session.get(Scan, scan_id).crawled_at = datetime.now()
+    return tasks.batch_payload([(scan_id, 'free') for scan_id in ids]), ids
+
+
+def test_crawl_batch_retry_only_queues_scans_not_yet_handed_off(crawled_batch, monkeypatch):
+    payload, (first, second) = crawled_batch
+    queued = []
+    broker_down = [second]
+
+    def start_pipeline(scan_id, tier=None, first_stage=None):
+        if scan_id in broker_down:
+            broker_down.remove(scan_id)
+            queued.append('failed')
+            raise ConnectionError('broker unavailable')
+        assert first_stage is tasks.ingest_issues
+        queued.append(scan_id)
+
+    monkeypatch.setattr(tasks, 'start_pipeline', start_pipeline)
+
+    with pytest.raises(ConnectionError):
+        tasks.crawl_batch(payload)
+    assert queued == [first, 'failed']
+
+    tasks.crawl_batch(payload)  # the retry
+    assert queued == [first, 'failed', second]
+
+    tasks.crawl_batch(payload)
+    assert queued == [first, 'failed', second]
+    with session_scope() as session:
+        service = ScanService(session)
+        assert service.handed_off(first) and service.handed_off(second)
+        assert service.crawl_batch([first, second]) == ([], [])
+
+
+def test_giving_up_on_a_batch_only_fails_scans_not_handed_off(crawled_batch, monkeypatch):
+    payload, (first, second) = crawled_batch
+    monkeypatch.setattr(tasks, 'start_pipeline', lambda *args, **kwargs: None)
+    with session_scope() as session:
+        ScanService(session).hand_off(first, 'tasks.ingest_issues')
+
+    tasks.crawl_batch.on_failure(RuntimeError('worker lost'), 'task-id', (payload,), {}, None)
+
+    with session_scope() as session:
+        assert session.get(Scan, first).status == ScanStatus.RUNNING
+        failed = session.get(Scan, second)
+        assert failed.status == ScanStatus.FAILED and failed.error_message == 'worker lost'
+
+
+def test_crawls_that_lost_their_worker_and_task_are_requeued(database, tmp_path, monkeypatch):
+    monkeypatch.setitem(config.CRAWLER, 'checkpoint_dir', str(tmp_path / 'checkpoints'))
+    with session_scope() as session:
+        dead, alive, crawled = add_scans(session, [('a.com', 50), ('b.com', 50), ('c.com', 50)])
+        for scan_id in (dead, alive, crawled):
+            scan = session.get(Scan, scan_id)
+            scan.started_at = datetime.now() - timedelta(hours=2)
+            scan.checkpoint_path = CrawlCheckpoint.for_scan(scan_id).directory
+        session.get(Scan, crawled).checkpoint_path = None  # crawl finished, ingest pending
+    CrawlCheckpoint.for_scan(alive).save({'frontier': []}, {})  # still checkpointing
+    queued = []
+    monkeypatch.setattr(tasks, 'start_pipeline', lambda scan_id, tier=None, first_stage=None: queued.append(
+        (scan_id, tier, first_stage)))
+
+    assert tasks.resume_interrupted_scans() == {'requeued': [dead]}
+    assert queued == [(dead, 'free', tasks.crawl_website)]
+    # Not queued again while the resume waits for a crawl worker
+    assert tasks.resume_interrupted_scans() == {'requeued': []}
+
+
+def test_a_requeued_scan_is_queued_again_once_that_goes_stale_too(database, tmp_path, monkeypatch):
+    monkeypatch.setitem(config.CRAWLER, 'checkpoint_dir', str(tmp_path / 'checkpoints'))
+    with session_scope() as session:
+        scan_id, = add_scans(session, [('a.com', 50)])
+        scan = session.get(Scan, scan_id)
+        scan.started_at = datetime.now() - timedelta(hours=2)
+        scan.checkpoint_path = CrawlCheckpoint.for_scan(scan_id).directory
+        long_ago = (datetime.now() - timedelta(hours=1)).isoformat()
+        scan.stage_timings = json.dumps({'requeued': {'at': long_ago}})
+    monkeypatch.setattr(tasks, 'start_pipeline', lambda scan_id, tier=None, first_stage=None: None)
+
+    assert tasks.resume_interrupted_scans() == {'requeued': [scan_id]}
+
+
+def test_every_beat_task_is_routed_to_a_queue_a_worker_consumes():
+    consumed = {queue for queues in re.findall(r'worker .*-Q (\S+)', COMPOSE_FILE.read_text())
+                for queue in queues.split(',')}
+
+    for entry in tasks.celery_app.conf.beat_schedule.values():
+        route = tasks.celery_app.amqp.router.route({}, entry['task'])
+        assert route['queue'].name in consumed, entry['task']
+
+
+def compose_services():
+    """{service name: its lines} from docker-compose.yml"""
+    services, name = {}, None
+    for line in COMPOSE_FILE.read_text().splitlines():
+        if re.match(r'^\S', line):
+            name = None
+        match = re.match(r'^  ([\w-]+):\s*$', line)
+        if match:
+            name = match.group(1)
+            services[name] = []
+        elif name and line.strip():
+            services[name].append(line.strip())
+    return services
+
+
+def test_the_api_and_every_worker_share_the_data_volume():
+    services = compose_services()
+    sharing = [name for name, lines in services.items()
+               if name == 'app' or any(line.startswith('command:') and ' worker ' in line for line in lines)]
+
+    assert len(sharing) == 6
+    for name in sharing:
+        assert '- sentinel-data:/data' in services[name], name
+        assert 'SEO_SENTINEL_DATA_DIR: /data' in services[name], name
+
+
+class DelayedRunner:
+    """Crawl runner whose crawls finish `seconds` after they start, without fetching anything"""
+
+    def __init__(self, seconds):
+        self.seconds = seconds
+        self.submitted = []
+
+    def submit(self, domain, max_pages=500, **spider_kwargs):
+        future = Future()
+        results = {'stats': {'pages_crawled': 1, 'close_reason': 'finished'}, 'issues_file': spider_kwargs['sink']}
+        threading.Timer(self.seconds, future.set_result, [results]).start()
+        self.submitted.append(domain)
+        return future
+
+
+def test_a_scan_is_crawled_by_one_worker_at_a_time(session, tmp_path, monkeypatch):
+    monkeypatch.setitem(config.CRAWLER, 'checkpoint_dir', str(tmp_path))
+    monkeypatch.setitem(config.CRAWLER, 'lease_seconds', 0.3)
+    scan_id, = add_scans(session, [('a.com', 50)])
+    runner = DelayedRunner(0.5)
+    service = ScanService(session, runner)
+    assert service.take_crawl_lease(scan_id, 'elsewhere')
+
+    with pytest.raises(CrawlLeaseHeld):
+        service.crawl(scan_id)
+    assert runner.submitted == []
+
+    heartbeats = []
+    renew = service.renew_crawl_lease
+    monkeypatch.setattr(service, 'renew_crawl_lease', lambda *args: heartbeats.append(renew(*args)))
+    session.get(Scan, scan_id).crawl_lease_expires_at = datetime.now() - timedelta(seconds=1)  # its worker died
+    session.commit()
+
+    scan = service.crawl(scan_id)
+
+    assert runner.submitted == ['a.com']
+    assert scan.crawled_at is not None
+    assert len(heartbeats) >= 2  # renewed while the crawl outlived its lease
+    assert (scan.crawl_lease, scan.crawl_lease_expires_at) == (None, None)
+
+
+def test_a_redelivered_crawl_task_stops_its_chain_while_the_crawl_runs(database):
+    with session_scope() as session:
+        scan_id, = add_scans(session, [('a.com', 50)])
+        ScanService(session).take_crawl_lease(scan_id, 'elsewhere')
+
+    with pytest.raises(Ignore):
+        tasks.crawl_website(tasks.stage_payload(scan_id))
+
+    with session_scope() as session:
+        scan = session.get(Scan, scan_id)
+        assert (scan.status, scan.crawl_lease) == (ScanStatus.RUNNING, 'elsewhere')
+        assert ScanService(session).interrupted() == []
+
+
+def test_a_crawl_run_ends_before_the_broker_redelivers_its_task():
+    visibility_timeout = config.CELERY['broker_transport_options']['visibility_timeout']
+
+    assert SEOSentinelSpider.custom_settings['CLOSESPIDER_TIMEOUT'] == config.CRAWLER['max_crawl_seconds']
+    assert config.CRAWLER['max_crawl_seconds'] + config.CRAWLER['lease_seconds'] < visibility_timeout
+    assert config.CRAWLER['lease_seconds'] < config.CRAWLER['resume_stale_after']
@@ -0,0 +1,142 @@
+"""
+SEO Sentinel Pre-flight Tests
+Probes against mocked sites: DNS, redirects, robots.txt, sitemap size estimates
+"""
+
+import asyncio
+import socket
+
+import httpx
+import pytest
+
+from app.core.config import config
+from app.crawler import preflight
+from app.crawler.preflight import Preflight, crawl_kwargs, expected_pages
+
+HOME = '<html><head><title>Home</title></head><body><a href="/a">A</a><a href="/b">B</a></body></html>'
+
+
+def urlset(count, base='https://example.com'):
+    return ('<?xml version="1.0"?><urlset xmlns="http://www.sitemaps.org/schemas/sitemap/0.9">'
+            + ''.join(f'<url><loc>{base}/p{i}</loc></url>' for i in range(count)) + '</urlset>')
+
+
+def sitemap_index(urls):
+    return ('<?xml version="1.0"?><sitemapindex xmlns="http://www.sitemaps.org/schemas/sitemap/0.9">'
+            + ''.join(f'<sitemap><loc>{url}</loc></sitemap>' for url in urls) + '</sitemapindex>')
+
+
+@pytest.fixture(autouse=True)
+def resolver(monkeypatch):
+    """Every host resolves to 192.0.2.1 except those listed in resolver.failing"""
+    failing = set()
+
+    async def getaddrinfo(self, host, port, **kwargs):
+        if host in failing:
+            raise socket.gaierror(socket.EAI_NONAME, 'Name or service not known')
+        return [(socket.AF_INET, socket.SOCK_STREAM, 6, '', ('192.0.2.1', 0))]
+
+    monkeypatch.setattr(asyncio.BaseEventLoop, 'getaddrinfo', getaddrinfo)
+    return failing
+
+
+def probe(routes, target='example.com', **settings):
+    """Run a pre-flight against {url: response} (a 404 for anything else); returns (result, urls fetched)"""
+    fetched = []
+
+    def handler(request):
+        url = str(request.url)
+        fetched.append(url)
+        answer = routes.get(url)
+        if answer is None:
+            return httpx.Response(404, text='not found')
+        if isinstance(answer, httpx.Response):
+            return answer
+        content_type = 'application/xml' if url.endswith('.xml') else 'text/html'
+        return httpx.Response(200, text=answer, headers={'Content-Type': content_type})
+
+    client = httpx.AsyncClient(transport=httpx.MockTransport(handler), follow_redirects=True)
+
+    async def run():
+        async with client:
+            return await Preflight(client=client, settings=settings).run(target)
+
+    return asyncio.run(run()), fetched
+
+
+def redirect(location):
+    return httpx.Response(301, headers={'Location': location})
+
+
+def test_an_unresolvable_host_fails_before_any_request(resolver):
+    resolver.add('example.com')
+
+    result, fetched = probe({'https://example.com/': HOME})
+
+    assert (result['ok'], result['reason']) == (False, preflight.DNS_FAILED)
+    assert fetched == []
+
+
+def test_the_crawl_starts_on_the_host_the_apex_redirects_to():
+    result, _ = probe({
+        'https://example.com/': redirect('https://www.example.com/'),
+        'https://www.example.com/': HOME,
+    })
+
+    assert result['ok']
+    assert result['redirects'] == ['https://example.com/']
+    assert result['canonical_host'] == 'www.example.com'
+    assert crawl_kwargs(result)['start_url'] == 'https://www.example.com/'
+
+
+def test_a_redirect_to_another_site_is_not_crawled():
+    result, _ = probe({
+        'https://example.com/': redirect('https://parked-domains.test/landing'),
+        'https://parked-domains.test/landing': HOME,
+    })
+
+    assert (result['ok'], result['reason']) == (False, preflight.OFFSITE_REDIRECT)
+
+
+def test_a_site_disallowing_our_bot_is_not_crawled(monkeypatch):
+    monkeypatch.setitem(config.CRAWLER, 'obey_robots_txt', True)
+    result, fetched = probe({
+        'https://example.com/': HOME,
+        'https://example.com/robots.txt': 'User-agent: *\nDisallow: /\n',
+    })
+
+    assert (result['ok'], result['reason']) == (False, preflight.ROBOTS_DISALLOWED)
+    assert not any(url.endswith('.xml') for url in fetched)
+
+
+def test_unread_sitemaps_of_a_big_index_are_extrapolated():
+    children = [f'https://example.com/sitemap-{i}.xml' for i in range(10)]
+    routes = {
+        'https://example.com/': HOME,
+        'https://example.com/robots.txt': 'User-agent: *\nAllow: /\nSitemap: https://example.com/sitemap.xml\n',
+        'https://example.com/sitemap.xml': sitemap_index(children),
+    }
+    routes.update({url: urlset(5) for url in children})
+
+    result, fetched = probe(routes, max_sitemaps=3)
+
+    sitemaps = result['sitemaps']
+    # The index and two children are read: 10 URLs, 5 per child, 8 children unread
+    assert (sitemaps['files'], sitemaps['urls'], sitemaps['truncated']) == (3, 10, True)
+    assert sitemaps['estimated_urls'] == result['estimated_pages'] == 10 + 5 * 8
+    assert sum(url in children for url in fetched) == 2
+    assert crawl_kwargs(result)['estimated_pages'] == 50
+
+
+def test_without_sitemaps_the_homepage_is_no_size_estimate():
+    result, _ = probe({'https://example.com/': HOME})
+
+    assert result['ok'] and result['estimated_pages'] == 3  # homepage + two links, a lower bound
+    assert crawl_kwargs(result) == {'start_url': 'https://example.com/', 'use_sitemaps': False}
+
+
+def test_expected_pages_caps_the_budget_with_the_estimate():
+    assert expected_pages(500, 40) == 40
+    assert expected_pages(50, 4000) == 50
+    assert expected_pages(0, 40) == 40
+    assert expected_pages(None) == float('inf')
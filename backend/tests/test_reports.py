@@ -0,0 +1,175 @@
+"""
+SEO Sentinel Report Tests
+Signed report links, PDF downloads (ETag, Range), batch renders and idle eviction
+"""
+
+import os
+import time
+from datetime import datetime, timedelta
+from urllib.parse import parse_qsl, urlsplit
+
+import pytest
+from fastapi import FastAPI, HTTPException
+from fastapi.testclient import TestClient
+
+from app.api import reports
+from app.api.reports import _byte_range
+from app.core.config import config
+from app.core.security import report_link_params
+from app.db.models import Scan, ScanStatus
+from app.main import app as api
+from app.services.scan_service import report_url
+from app.services.report_service import evict_idle_pdfs, render_jobs
+
+PDF = b'%PDF-1.4\n' + bytes(range(256)) * 4 + b'\n%%EOF\n'
+NOW = datetime(2026, 6, 1)
+
+
+@pytest.fixture(autouse=True)
+def reports_dir(tmp_path, monkeypatch):
+    """Render locks (and anything else under REPORTS_DIR) in a throwaway directory"""
+    monkeypatch.setattr(config, 'REPORTS_DIR', tmp_path)
+    return tmp_path
+
+
+@pytest.fixture
+def anonymous(tmp_path, monkeypatch):
+    """Client of the reports API holding no report link"""
+    path = tmp_path / 'scan_7_report.pdf'
+    path.write_bytes(PDF)
+    monkeypatch.setattr(reports, '_report_pdf', lambda scan_id: (str(path), 'a' * 64))
+    monkeypatch.setattr(reports, '_report_model', lambda scan_id: {'scan_id': scan_id})
+    monkeypatch.setattr(reports, 'report_json', lambda model: '{}')
+    monkeypatch.setattr(reports, 'report_html', lambda model, pdf_url=None: f'<a href="{pdf_url}">PDF</a>')
+    app = FastAPI()
+    app.include_router(reports.router, prefix='/api/reports')
+    return TestClient(app)
+
+
+@pytest.fixture
+def client(anonymous):
+    """Client that opened scan 7's emailed report link"""
+    anonymous.params = report_link_params(7)
+    return anonymous
+
+
+def query(url):
+    return dict(parse_qsl(urlsplit(url).query))
+
+
+def test_emailed_report_links_open_every_view_of_their_report_only(anonymous):
+    link = urlsplit(report_url(Scan(id=7)))
+    assert link.path == '/api/reports/7/html'
+    params = query(link.geturl())
+
+    page = anonymous.get('/api/reports/7/html', params=params)
+    assert page.status_code == 200
+    pdf_url = page.text.split('"')[1]
+    assert anonymous.get(pdf_url).content == PDF  # the page's PDF link is signed too
+    assert anonymous.get('/api/reports/7', params=params).status_code == 200
+
+    for path in ('/api/reports/7', '/api/reports/7/html', '/api/reports/7/pdf'):
+        assert anonymous.get(path).status_code == 403
+        assert anonymous.get(path, params={**params, 'token': '0' * 64}).status_code == 403
+    # A link is for its own report, and until it expires
+    assert anonymous.get('/api/reports/8/pdf', params=params).status_code == 403
+    assert anonymous.get('/api/reports/7/pdf', params={**params, 'expires': int(params['expires']) + 1}).status_code == 403
+    expired = report_link_params(7, now=time.time() - config.REPORT['link_days'] * 86400 - 1)
+    assert anonymous.get('/api/reports/7/pdf', params=expired).status_code == 403
+
+
+def test_db_metrics_need_the_metrics_token(monkeypatch):
+    client = TestClient(api)
+    assert client.get('/metrics/db').status_code == 401  # no token configured: nobody gets in
+
+    monkeypatch.setitem(config.API, 'metrics_token', 's3cret')
+    assert client.get('/metrics/db').status_code == 401
+    assert client.get('/metrics/db', headers={'Authorization': 'Bearer wrong'}).status_code == 401
+    assert client.get('/metrics/db', headers={'Authorization': 'Bearer s3cret'}).status_code == 200
+
+
+@pytest.mark.parametrize('header, expected', [
+    ('bytes=0-9', (0, 9)),
+    ('bytes=10-', (10, 99)),
+    ('bytes=-10', (90, 99)),
+    ('bytes=90-200', (90, 99)),
+    ('bytes=-500', (0, 99)),
+    ('bytes=9-3', None),  # invalid, so the whole file
+    ('bytes=0-1,5-6', None),  # multiple ranges aren't served
+    ('items=0-9', None),
+])
+def test_byte_range(header, expected):
+    assert _byte_range(header, 100) == expected
+
+
+@pytest.mark.parametrize('header', ['bytes=100-', 'bytes=100-120', 'bytes=-0'])
+def test_unsatisfiable_byte_range(header):
+    with pytest.raises(HTTPException) as error:
+        _byte_range(header, 100)
+    assert error.value.status_code == 416
+    assert error.value.headers['Content-Range'] == 'bytes */100'
+
+
+def test_pdf_download_and_revalidation(client):
+    response = client.get('/api/reports/7/pdf')
+    assert response.status_code == 200
+    assert response.content == PDF
+    etag = response.headers['etag']
+    assert etag.startswith('"' + 'a' * 24)
+    assert response.headers['accept-ranges'] == 'bytes'
+
+    assert client.get('/api/reports/7/pdf', headers={'If-None-Match': etag}).status_code == 304
+    assert client.get('/api/reports/7/pdf', headers={'If-None-Match': '"other"'}).status_code == 200
+
+
+def test_pdf_range_requests(client):
+    etag = client.get('/api/reports/7/pdf').headers['etag']
+
+    partial = client.get('/api/reports/7/pdf', headers={'Range': 'bytes=0-7'})
+    assert partial.status_code == 206
+    assert partial.content == PDF[:8]
+    assert partial.headers['content-range'] == f'bytes 0-7/{len(PDF)}'
+
+    tail = client.get('/api/reports/7/pdf', headers={'Range': 'bytes=-7', 'If-Range': etag})
+    assert tail.status_code == 206 and tail.content == PDF[-7:]
+
+    # A client resuming a different version gets the whole current file
+    stale = client.get('/api/reports/7/pdf', headers={'Range': 'bytes=0-7', 'If-Range': '"old"'})
+    assert stale.status_code == 200 and stale.content == PDF
+
+    assert client.get('/api/reports/7/pdf', headers={'Range': f'bytes={len(PDF)}-'}).status_code == 416
+
+
+def test_batch_render_leaves_an_existing_pdf_alone(tmp_path):
+    path = tmp_path / 'scan_3_report.pdf'
+    path.write_bytes(PDF)
+    issues_file = tmp_path / 'scan_3_issues.ndjson'
+    issues_file.write_text('')
+    job = {'scan_id': 3, 'website_id': 1, 'path': str(path), 'full_detail': False,
+           'data': {'domain': 'example.com', 'scan_id': 3, 'issues_file': str(issues_file),
+                    'stats': {'pages_crawled': 1, 'broken_links': 0, 'missing_alt_text': 0, 'meta_issues': 0}}}
+
+    outcome, = render_jobs([job], processes=1)
+
+    assert outcome['existing'] and outcome['error'] is None
+    assert path.read_bytes() == PDF
+    assert sorted(os.listdir(tmp_path)) == ['locks', 'scan_3_issues.ndjson', 'scan_3_report.pdf']
+
+
+def test_evict_idle_pdfs(session, website, tmp_path):
+    scans = {}
+    for name, accessed_days_ago in (('idle', 30), ('recent', 1)):
+        path = tmp_path / f'{name}.pdf'
+        path.write_bytes(PDF)
+        scans[name] = Scan(user_id=website.user_id, website_id=website.id, status=ScanStatus.COMPLETED,
+                           completed_at=NOW - timedelta(days=60), report_pdf_path=str(path),
+                           report_accessed_at=NOW - timedelta(days=accessed_days_ago))
+    session.add_all(scans.values())
+    session.commit()
+
+    stats = evict_idle_pdfs(session, idle_days=14, now=NOW)
+
+    assert stats == {'evicted': 1, 'freed_bytes': len(PDF)}
+    session.expire_all()
+    assert scans['idle'].report_pdf_path is None and not (tmp_path / 'idle.pdf').exists()
+    assert scans['recent'].report_pdf_path == str(tmp_path / 'recent.pdf') and (tmp_path / 'recent.pdf').exists()
@@ -0,0 +1,92 @@
+"""
+SEO Sentinel Retention Tests
+Expired scans are archived and deleted without taking newer history with them
+"""
+
+from datetime import datetime, timedelta
+
+from sqlalchemy import select
+
+from app.db.models import Issue, Scan, ScanStatus
+from app.services.retention_service import RetentionService, read_archive
+
+NOW = datetime(2026, 6, 1)
+
+
+def add_scan(session, website, days_ago):
+    finished = NOW - timedelta(days=days_ago)
+    scan = Scan(user_id=website.user_id, website_id=website.id, status=ScanStatus.COMPLETED,
+                created_at=finished, completed_at=finished)
+    session.add(scan)
+    session.commit()
+    return scan
+
+
+def add_issue(session, scan, resolved_days_ago=None):
+    issue = Issue(scan_id=scan.id, website_id=scan.website_id, issue_type='broken_link',
+                  page_url='https://example.com/', broken_url=f'https://example.com/gone-{resolved_days_ago}')
+    if resolved_days_ago is not None:
+        issue.is_resolved = True
+        issue.resolved_at = NOW - timedelta(days=resolved_days_ago)
+    session.add(issue)
+    session.commit()
+    return issue
+
+
+def issue_ids(session):
+    return set(session.scalars(select(Issue.id)))
+
+
+def test_expired_scan_with_only_old_issues_is_archived_and_deleted(session, website, tmp_path):
+    old = add_scan(session, website, 60)
+    resolved = add_issue(session, old, resolved_days_ago=45)
+    add_scan(session, website, 1)
+
+    stats = RetentionService(session, archive_dir=tmp_path / 'archive', batch_pause=0).run(now=NOW)
+
+    assert stats['scans_deleted'] == 1 and stats['issues_deleted'] == 1
+    assert session.get(Scan, old.id) is None
+    records = [record for path in stats['archives'] for record in read_archive(path)]
+    assert {(record['record'], record['id']) for record in records} == {('scan', old.id), ('issue', resolved.id)}
+
+
+def test_scan_keeping_open_issues_is_trimmed(session, website, tmp_path):
+    old = add_scan(session, website, 60)
+    add_issue(session, old, resolved_days_ago=45)
+    still_open = add_issue(session, old)
+    add_scan(session, website, 1)
+
+    stats = RetentionService(session, archive_dir=tmp_path / 'archive', batch_pause=0).run(now=NOW)
+
+    assert stats['scans_trimmed'] == 1 and stats['scans_deleted'] == 0
+    assert session.get(Scan, old.id) is not None
+    assert issue_ids(session) == {still_open.id}
+
+
+def test_issues_resolved_after_the_cutoff_keep_their_scan(session, website, tmp_path):
+    old = add_scan(session, website, 60)
+    add_issue(session, old, resolved_days_ago=45)
+    recent = add_issue(session, old, resolved_days_ago=5)
+    add_scan(session, website, 1)
+    service = RetentionService(session, archive_dir=tmp_path / 'archive', batch_pause=0)
+
+    stats = service.run(now=NOW)
+
+    assert stats['scans_trimmed'] == 1 and stats['scans_deleted'] == 0
+    assert issue_ids(session) == {recent.id}
+
+    # Once that issue ages out too, it is archived and the scan goes
+    stats = service.run(now=NOW + timedelta(days=30))
+    assert stats['issues_deleted'] == 1 and stats['scans_deleted'] == 1
+    assert issue_ids(session) == set()
+    assert any(record['id'] == recent.id for record in read_archive(stats['archives'][0]) if record['record'] == 'issue')
+
+
+def test_latest_completed_scan_never_expires(session, website, tmp_path):
+    only = add_scan(session, website, 400)
+    add_issue(session, only, resolved_days_ago=300)
+
+    stats = RetentionService(session, archive_dir=tmp_path / 'archive', batch_pause=0).run(now=NOW)
+
+    assert stats['scans_deleted'] == 0 and stats['issues_deleted'] == 0
+    assert session.get(Scan, only.id) is not None
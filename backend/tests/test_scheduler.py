@@ -0,0 +1,139 @@
+"""
+SEO Sentinel Scheduler Tests
+Tier shares, per-user limits, busy websites and jitter in ScanScheduler.tick, and resending unqueued scans
+"""
+
+import random
+from datetime import datetime, timedelta
+
+import pytest
+
+from app import tasks
+from app.core.config import config
+from app.db.database import session_scope
+from app.db.models import Scan, ScanStatus, SubscriptionTier, User, Website
+from app.services.scheduler_service import FREQUENCIES, ScanScheduler
+
+NOW = datetime(2026, 3, 2, 12, 0)
+
+
+def add_user(session, tier, sites, max_websites=100, due_at=NOW - timedelta(hours=1), frequency='daily'):
+    """A user on `tier` with `sites` websites due at due_at; returns the websites"""
+    user = User(email=f'{tier.value}{random.random()}@example.com', hashed_password='x',
+                subscription_tier=tier, max_websites=max_websites)
+    session.add(user)
+    session.flush()
+    websites = [
+        Website(user_id=user.id, domain=f'site{i}.{user.id}.example.com', url=f'https://site{i}.{user.id}.example.com',
+                scan_frequency=frequency, next_scan_at=due_at)
+        for i in range(sites)
+    ]
+    session.add_all(websites)
+    session.commit()
+    return websites
+
+
+def tick(session, now=NOW, seed=1):
+    dispatched = []
+    result = ScanScheduler(session, enqueue=lambda scan_id, tier: dispatched.append((scan_id, tier)),
+                           rng=random.Random(seed)).tick(now)
+    return result, dispatched
+
+
+def test_users_get_no_more_scans_than_their_concurrency_limit(session):
+    professional = add_user(session, SubscriptionTier.PROFESSIONAL, 5, max_websites=5)
+    free = add_user(session, SubscriptionTier.FREE, 2, max_websites=1)
+
+    tick(session)
+
+    scans = session.query(Scan).all()
+    assert sum(scan.user_id == professional[0].user_id for scan in scans) == 3  # max_concurrent_scans cap
+    assert sum(scan.user_id == free[0].user_id for scan in scans) == 1  # User.max_websites
+    # The next tick adds nothing while those are in flight
+    assert tick(session, NOW + timedelta(minutes=1))[0]['dispatched'] == 0
+
+
+def test_a_website_whose_scan_is_in_flight_is_skipped(session):
+    busy, idle = add_user(session, SubscriptionTier.ENTERPRISE, 2)
+    session.add(Scan(user_id=busy.user_id, website_id=busy.id, status=ScanStatus.RUNNING))
+    session.commit()
+    busy_due = busy.next_scan_at
+
+    result, dispatched = tick(session)
+
+    assert result['dispatched'] == 1
+    assert session.get(Scan, dispatched[0][0]).website_id == idle.id
+    assert busy.next_scan_at == busy_due  # Still due: dispatched once its scan finishes
+
+
+def test_no_tier_goes_without_scans_under_load(session, monkeypatch):
+    monkeypatch.setitem(config.SCHEDULER, 'max_in_flight', 12)
+    for tier in SubscriptionTier:
+        for _ in range(20):
+            add_user(session, tier, 1)
+
+    _, dispatched = tick(session)
+
+    per_tier = {tier: sum(1 for _, t in dispatched if t == tier) for tier in config.SCHEDULER['tier_weights']}
+    assert sum(per_tier.values()) == 12
+    assert all(count >= 1 for count in per_tier.values())
+    assert per_tier['enterprise'] > per_tier['professional'] > per_tier['free']
+
+
+def test_unused_share_flows_to_tiers_with_work(session, monkeypatch):
+    monkeypatch.setitem(config.SCHEDULER, 'max_in_flight', 10)
+    for _ in range(20):
+        add_user(session, SubscriptionTier.FREE, 1)
+
+    result, _ = tick(session)
+
+    assert result['dispatched'] == 10
+
+
+@pytest.mark.parametrize('frequency', ['daily', 'weekly'])
+def test_jitter_keeps_next_scan_at_moving_forward(session, frequency):
+    websites = add_user(session, SubscriptionTier.ENTERPRISE, 10, frequency=frequency)
+    interval = FREQUENCIES[frequency]
+    jitter = interval * config.SCHEDULER['jitter']
+    due = NOW - timedelta(hours=1)
+
+    tick(session)
+
+    next_runs = [website.next_scan_at for website in websites]
+    assert all(due + interval - jitter <= run <= due + interval + jitter for run in next_runs)
+    assert all(run > NOW for run in next_runs)
+    assert len(set(next_runs)) == len(next_runs)  # sites due together drift apart
+
+
+def test_a_site_a_whole_interval_behind_is_not_piled_up(session):
+    website, = add_user(session, SubscriptionTier.ENTERPRISE, 1, due_at=NOW - timedelta(days=5))
+
+    tick(session)
+
+    assert website.next_scan_at > NOW + timedelta(days=1) - FREQUENCIES['daily'] * config.SCHEDULER['jitter']
+
+
+def test_scans_the_broker_never_got_are_sent_again(database, monkeypatch):
+    monkeypatch.setitem(config.SCHEDULER, 'requeue_after', 0)
+    monkeypatch.setitem(config.MULTI_CRAWL, 'enabled', False)
+    with session_scope() as session:
+        add_user(session, SubscriptionTier.PROFESSIONAL, 2, due_at=datetime.now() - timedelta(hours=1))
+    sent = []
+
+    def broker_down(scan_id, tier=None, first_stage=None):
+        raise ConnectionError('broker unreachable')
+
+    monkeypatch.setattr(tasks, 'start_pipeline', broker_down)
+    with pytest.raises(ConnectionError):
+        tasks.schedule_scans()
+
+    monkeypatch.setattr(tasks, 'start_pipeline', lambda scan_id, tier=None, first_stage=None: sent.append(scan_id))
+    result = tasks.schedule_scans()
+
+    assert (result['requeued'], result['dispatched']) == (2, 0)
+    with session_scope() as session:
+        assert sorted(sent) == sorted(scan.id for scan in session.query(Scan))
+        scheduler = ScanScheduler(session)
+        assert scheduler.unqueued(datetime.now() + timedelta(hours=1)) == []
+    # Once queued they are not sent again
+    assert tasks.schedule_scans()['requeued'] == 0 and len(sent) == 2
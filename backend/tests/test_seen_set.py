@@ -0,0 +1,103 @@
+"""
+SEO Sentinel Seen Set Tests
+The packed fingerprint set, in memory and mmap'd to a file, and which scans spill it to disk
+"""
+
+import pytest
+
+from app.core.config import config
+from app.crawler.crawler_with_db import ScanCrawler
+from app.crawler.seen_set import FingerprintSet, fingerprint64
+from app.db.models import Scan
+
+VALUES = [fingerprint64(f'https://example.com/product-{i}') for i in range(5000)]
+
+
+def test_add_and_contains_across_growth():
+    fingerprints = FingerprintSet()
+
+    assert all(fingerprints.add(value) for value in VALUES)
+    assert not any(fingerprints.add(value) for value in VALUES[:100])
+    assert len(fingerprints) == len(VALUES)
+    assert all(value in fingerprints for value in VALUES)
+    assert fingerprint64('https://example.com/other') not in fingerprints
+    assert fingerprints.nbytes >= len(VALUES) / fingerprints.max_load * 8
+
+
+def test_zero_is_stored_as_one():
+    fingerprints = FingerprintSet()
+
+    assert fingerprints.add(0)
+    assert 1 in fingerprints and 0 in fingerprints
+    assert not fingerprints.add(1)
+
+
+def test_file_backed_set_reopens(tmp_path):
+    path = tmp_path / 'seen.mmap'
+    fingerprints = FingerprintSet(path=path)
+    for value in VALUES:
+        fingerprints.add(value)
+    fingerprints.close()
+    assert not (tmp_path / 'seen.mmap.grow').exists()
+
+    reopened = FingerprintSet(path=path)
+    assert len(reopened) == len(VALUES)
+    assert all(value in reopened for value in VALUES)
+    reopened.close()
+
+
+@pytest.mark.parametrize('mmap_copy', [False, True])
+def test_saved_set_loads_without_changing_the_checkpoint(tmp_path, mmap_copy):
+    fingerprints = FingerprintSet()
+    for value in VALUES[:1000]:
+        fingerprints.add(value)
+    fingerprints.save(tmp_path / 'seen.bin')
+    saved = (tmp_path / 'seen.bin').read_bytes()
+
+    loaded = FingerprintSet.load(tmp_path / 'seen.bin', path=tmp_path / 'seen.mmap' if mmap_copy else None)
+    assert len(loaded) == 1000 and all(value in loaded for value in VALUES[:1000])
+    for value in VALUES[1000:]:
+        loaded.add(value)
+    loaded.close()
+
+    assert (tmp_path / 'seen.bin').read_bytes() == saved
+
+
+def test_load_rejects_other_files(tmp_path):
+    (tmp_path / 'other.bin').write_bytes(b'not a fingerprint set at all')
+
+    with pytest.raises(ValueError):
+        FingerprintSet.load(tmp_path / 'other.bin')
+
+
+@pytest.mark.parametrize('max_pages, spills', [(500, False), (5000, True), (0, True), (None, True)])
+def test_unlimited_and_very_large_scans_keep_the_seen_set_on_disk(session, website, tmp_path, monkeypatch, max_pages, spills):
+    monkeypatch.setitem(config.CRAWLER, 'seen_set_spill_pages', 1000)
+    monkeypatch.setitem(config.CRAWLER, 'seen_set_dir', str(tmp_path / 'seen_sets'))
+    monkeypatch.setitem(config.CRAWLER, 'checkpoint_dir', str(tmp_path / 'checkpoints'))
+    website.max_pages = max_pages
+    scan = Scan(user_id=website.user_id, website_id=website.id)
+    session.add(scan)
+    session.flush()
+
+    kwargs = ScanCrawler(session)._begin(scan, {})
+
+    expected = str(tmp_path / 'seen_sets' / f'scan_{scan.id}_seen.bin') if spills else None
+    assert kwargs['seen_set_path'] == expected
+
+
+@pytest.mark.parametrize('estimated_pages, spills', [(50000, True), (400, False)])
+def test_an_unlimited_scan_spills_only_when_the_preflight_expects_a_big_site(
+        session, website, tmp_path, monkeypatch, estimated_pages, spills):
+    monkeypatch.setitem(config.CRAWLER, 'seen_set_spill_pages', 1000)
+    monkeypatch.setitem(config.CRAWLER, 'seen_set_dir', str(tmp_path / 'seen_sets'))
+    monkeypatch.setitem(config.CRAWLER, 'checkpoint_dir', str(tmp_path / 'checkpoints'))
+    website.max_pages = 0
+    scan = Scan(user_id=website.user_id, website_id=website.id)
+    session.add(scan)
+    session.flush()
+
+    kwargs = ScanCrawler(session)._begin(scan, {'estimated_pages': estimated_pages})
+
+    assert 'estimated_pages' not in kwargs  # consumed here, never passed to the spider
+    assert (kwargs['seen_set_path'] is not None) == spills
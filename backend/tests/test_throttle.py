@@ -0,0 +1,134 @@
+"""
+SEO Sentinel Throttle Tests
+Delay floor of AdaptiveThrottleMiddleware and the per-host rate it reaches
+"""
+
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from types import SimpleNamespace
+
+from scrapy.http import Request, TextResponse
+from scrapy.utils.test import get_crawler
+
+from app.core.config import config
+from app.crawler.runner import get_crawl_runner
+from app.crawler.throttle import AdaptiveThrottleMiddleware
+
+
+def throttle(download_delay=0.5, min_delay=0.0):
+    crawler = get_crawler(settings_dict={
+        'ADAPTIVE_THROTTLE_ENABLED': True,
+        'DOWNLOAD_DELAY': download_delay,
+        'ADAPTIVE_THROTTLE_MIN_DELAY': min_delay,
+        'CONCURRENT_REQUESTS_PER_DOMAIN': 2,
+        'ADAPTIVE_THROTTLE_MAX_CONCURRENCY': 8,
+        'ADAPTIVE_THROTTLE_MAX_DELAY': 10.0,
+        'ADAPTIVE_THROTTLE_TARGET_LATENCY': 1.0,
+        'USER_AGENT': 'SEOSentinel',
+    })
+    crawler.engine = SimpleNamespace(downloader=SimpleNamespace(slots={}))  # no slot: state only
+    return AdaptiveThrottleMiddleware(crawler)
+
+
+def respond(middleware, path='/', body=b'', latency=0.1, status=200):
+    request = Request(f'https://example.com{path}', meta={'download_latency': latency})
+    response = TextResponse(request.url, status=status, body=body, encoding='utf-8', request=request)
+    middleware.process_response(request, response, None)
+    return middleware.hosts['example.com']
+
+
+def test_fast_responses_shed_download_delay_then_add_slots():
+    middleware = throttle(download_delay=0.5)
+    for _ in range(50):
+        state = respond(middleware)
+    assert state.delay == 0.0
+    assert state.concurrency > 2
+
+
+def test_the_configured_min_delay_is_kept():
+    middleware = throttle(download_delay=0.5, min_delay=0.2)
+    for _ in range(50):
+        state = respond(middleware)
+    assert state.delay == 0.2
+
+
+def test_crawl_delay_is_a_hard_floor():
+    middleware = throttle(download_delay=0.5)
+    respond(middleware, '/robots.txt', b'User-agent: *\nCrawl-delay: 2\n')
+    for _ in range(50):
+        state = respond(middleware)
+    assert state.delay == 2.0
+    assert state.concurrency == 1
+    assert state.report()['crawl_delay'] == 2.0
+
+
+def test_a_crawl_delay_shorter_than_download_delay_is_reached():
+    middleware = throttle(download_delay=1.0)
+    respond(middleware, '/robots.txt', b'User-agent: *\nCrawl-delay: 0.2\n')
+    for _ in range(50):
+        state = respond(middleware)
+    assert state.delay == 0.2
+    assert state.concurrency == 1
+
+
+def test_errors_back_off_without_dropping_below_crawl_delay():
+    middleware = throttle(download_delay=0.5)
+    respond(middleware, '/robots.txt', b'User-agent: *\nCrawl-delay: 2\n')
+    state = respond(middleware, status=503)
+    assert state.delay == 4.0
+
+
+def test_a_crawl_delay_above_the_max_delay_is_obeyed():
+    middleware = throttle(download_delay=0.5)
+    respond(middleware, '/robots.txt', b'User-agent: *\nCrawl-delay: 30\n')
+    for _ in range(10):
+        state = respond(middleware)
+    assert state.delay == 30.0
+    state = respond(middleware, status=503)
+    assert state.delay == 30.0  # backs off no further than the host's own limit
+    assert state.report()['crawl_delay'] == 30.0
+
+
+class FastHandler(BaseHTTPRequestHandler):
+    """Home links to every page; each page answers at once"""
+
+    pages = 80
+
+    def do_GET(self):
+        if self.path == '/':
+            body = ''.join(f'<a href="/p{i}">{i}</a>' for i in range(self.pages))
+        elif self.path.startswith('/p'):
+            body = f'<title>{self.path}</title>'
+        else:
+            self.send_error(404)
+            return
+        self.send_response(200)
+        self.send_header('Content-Type', 'text/html')
+        self.end_headers()
+        self.wfile.write(f'<html><head>{body}</head><body>{body}</body></html>'.encode())
+
+    def log_message(self, *args):
+        pass
+
+
+def test_a_fast_host_is_crawled_faster_than_one_request_per_download_delay():
+    server = ThreadingHTTPServer(('127.0.0.1', 0), FastHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    try:
+        started = time.monotonic()
+        results = get_crawl_runner().crawl(
+            '127.0.0.1', FastHandler.pages + 1, start_url=f'http://127.0.0.1:{server.server_port}/',
+            timeout=60, use_sitemaps=False, validate_links=False,
+        )
+        elapsed = time.monotonic() - started
+    finally:
+        server.shutdown()
+        server.server_close()
+
+    download_delay = config.CRAWLER['download_delay']
+    assert results['stats']['pages_crawled'] == FastHandler.pages + 1
+    assert results['stats']['pages_crawled'] / elapsed > 1 / download_delay
+    host = results['stats']['throughput']['127.0.0.1']
+    assert host['final_delay'] < download_delay
+    assert host['peak_concurrency'] > config.CRAWLER['concurrent_requests_per_domain']
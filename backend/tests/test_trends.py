@@ -0,0 +1,68 @@
+"""
+SEO Sentinel Trend Rollup Tests
+Scans fold into their day/week buckets once each, in whatever order they complete
+"""
+
+from datetime import datetime
+
+from app.db.models import Scan, ScanStatus
+from app.db.repositories import TrendRepository
+
+MONDAY = datetime(2026, 6, 1, 9)
+
+
+def scans(session, website, count):
+    created = [Scan(user_id=website.user_id, website_id=website.id, status=ScanStatus.COMPLETED) for _ in range(count)]
+    session.add_all(created)
+    session.flush()
+    return created
+
+
+def breakdown(open_issues, new=0, resolved=0):
+    return {('broken_link', 'high'): {'open': open_issues, 'new': new, 'resolved': resolved}}
+
+
+def week_total(session, website):
+    rows = TrendRepository(session).series(website.id, period='week')
+    assert len(rows) == 1
+    return rows[0]
+
+
+def test_scans_accumulate_in_their_buckets(session, website):
+    first, second = scans(session, website, 2)
+    trends = TrendRepository(session)
+    trends.record_scan(first, breakdown(4, new=4), MONDAY)
+    trends.record_scan(second, breakdown(3, resolved=1), MONDAY.replace(day=2))
+    session.commit()
+
+    week = week_total(session, website)
+    assert (week.scans, week.open_issues, week.max_open_issues, week.total_open_issues) == (2, 3, 4, 7)
+    assert (week.new_issues, week.resolved_issues, week.last_scan_id) == (4, 1, second.id)
+    assert len(trends.series(website.id, period='day')) == 2
+
+
+def test_a_retried_scan_is_counted_once(session, website):
+    scan, = scans(session, website, 1)
+    trends = TrendRepository(session)
+    trends.record_scan(scan, breakdown(4, new=4), MONDAY)
+    trends.record_scan(scan, breakdown(4, new=4), MONDAY)
+    session.commit()
+
+    week = week_total(session, website)
+    assert (week.scans, week.total_open_issues, week.new_issues) == (1, 4, 4)
+
+
+def test_a_scan_completing_after_a_later_one_still_counts(session, website):
+    earlier, later = scans(session, website, 2)
+    trends = TrendRepository(session)
+    trends.record_scan(later, breakdown(3), MONDAY.replace(hour=10))
+    trends.record_scan(earlier, {('missing_alt_text', 'low'): {'open': 5, 'new': 5, 'resolved': 0}}, MONDAY.replace(hour=11))
+    trends.record_scan(earlier, breakdown(9), MONDAY.replace(hour=11))  # retry: already in
+    session.commit()
+
+    week = week_total(session, website)
+    assert (week.scans, week.total_open_issues, week.new_issues) == (2, 8, 5)
+    # open_issues stays as of the latest scan
+    assert (week.open_issues, week.max_open_issues, week.last_scan_id) == (3, 5, later.id)
+    alt_text, = trends.series(website.id, period='week', issue_type='missing_alt_text', severity='low')
+    assert (alt_text.scans, alt_text.open_issues, alt_text.total_open_issues) == (2, 0, 5)